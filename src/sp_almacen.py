@@ -0,0 +1,140 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from .sp_tipos import a_arrow
+
+
+# Directorio de los datos procesados (data/data_processed)
+DIRECTORIO_PROCESADO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    'data', 'data_processed')
+
+# Directorio de los ficheros de origen (data/data_raw)
+DIRECTORIO_RAW = os.path.join(os.path.dirname(DIRECTORIO_PROCESADO), 'data_raw')
+
+# Directorio donde se guardan las salidas identificadas por su huella (data/data_processed/cache)
+DIRECTORIO_CACHE = os.path.join(DIRECTORIO_PROCESADO, 'cache')
+
+FORMATOS = ('parquet', 'feather')
+
+# Columnas de fecha de los CSV antiguos, que se parsean al cargarlos
+COLUMNAS_FECHA = ['Order_Date', 'Ship_Date']
+
+
+def _ruta(nombre, formato, directorio):
+    return os.path.join(directorio or DIRECTORIO_PROCESADO, f'{nombre}.{formato}')
+
+
+def reducir_numericos(df):
+    """
+    Reduce el tipo de las columnas enteras al tipo más pequeño que admite sus valores.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a reducir.
+
+    Retorno:
+    pd.DataFrame: Copia del DataFrame con las columnas enteras reducidas.
+    """
+
+    df = df.copy()
+    for col in df.select_dtypes(include=['integer']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+def guardar_etapa(df, nombre, directorio=None, formato='parquet', reducir=True):
+    """
+    Guarda la salida de una etapa del pipeline en un formato binario columnar tipado.
+
+    - Conserva los tipos de dato (categorías, fechas y numéricos), por lo que al cargarla
+      no hay que volver a parsear texto ni fechas.
+    - Opcionalmente reduce las columnas enteras a su tipo más pequeño antes de guardar.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a guardar.
+    nombre (str): Nombre de la etapa (por ejemplo, 'limpieza'); se usa como nombre de fichero.
+    directorio (str, opcional): Directorio de destino (por defecto `DIRECTORIO_PROCESADO`).
+    formato (str, opcional): 'parquet' o 'feather' (por defecto 'parquet'). Ambos requieren pyarrow.
+    reducir (bool, opcional): Si es True, reduce el tipo de las columnas enteras (por defecto True).
+
+    Retorno:
+    str: Ruta del fichero guardado.
+    """
+
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato no soportado: {formato}. Usar uno de {FORMATOS}')
+
+    if reducir:
+        df = reducir_numericos(df)
+
+    ruta = _ruta(nombre, formato, directorio)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+
+    if formato == 'parquet':
+        df.to_parquet(ruta, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(ruta)
+    return ruta
+
+
+def cargar_etapa(nombre, columnas=None, directorio=None, formato=None, arrow=False):
+    """
+    Carga la salida de una etapa del pipeline guardada con `guardar_etapa`.
+
+    - Permite cargar solo las columnas necesarias (proyección de columnas).
+    - Si no existe el fichero binario, carga el CSV antiguo de la etapa parseando las fechas.
+    - Opcionalmente carga el texto y los numéricos en tipos de Arrow (el CSV, con el lector de pyarrow).
+
+    Parámetros:
+    nombre (str): Nombre de la etapa (por ejemplo, 'limpieza').
+    columnas (list, opcional): Columnas a cargar (por defecto todas).
+    directorio (str, opcional): Directorio de origen (por defecto `DIRECTORIO_PROCESADO`).
+    formato (str, opcional): 'parquet', 'feather' o 'csv'. Por defecto se usa el primero que exista.
+    arrow (bool, opcional): Si es True, las columnas de texto y numéricas se cargan en memoria de Arrow
+                            (ver `sp_tipos.a_arrow`) (por defecto False).
+
+    Retorno:
+    pd.DataFrame: DataFrame de la etapa.
+    """
+
+    formatos = (formato,) if formato else FORMATOS + ('csv',)
+
+    for fmt in formatos:
+        ruta = _ruta(nombre, fmt, directorio)
+        if not os.path.exists(ruta):
+            continue
+
+        if fmt == 'parquet':
+            df = pd.read_parquet(ruta, columns=columnas)
+        elif fmt == 'feather':
+            df = pd.read_feather(ruta, columns=columnas)
+        else:
+            cabecera = pd.read_csv(ruta, nrows=0).columns
+            fechas = [col for col in COLUMNAS_FECHA
+                      if col in cabecera and (columnas is None or col in columnas)]
+            opciones = {'engine': 'pyarrow', 'dtype_backend': 'pyarrow'} if arrow else {'low_memory': False}
+            df = pd.read_csv(ruta, usecols=columnas, parse_dates=fechas, **opciones)
+
+        return a_arrow(df) if arrow else df
+
+    raise FileNotFoundError(f'No existe la etapa {nombre!r} en {directorio or DIRECTORIO_PROCESADO}')
+
+
+def huella_fichero(ruta, tamano_bloque=1 << 20):
+    """
+    Calcula el hash SHA-256 del contenido de un fichero, leyéndolo por bloques.
+
+    Parámetros:
+    ruta (str): Ruta del fichero.
+    tamano_bloque (int, opcional): Bytes leídos en cada bloque (por defecto 1 MiB).
+
+    Retorno:
+    str: Hash hexadecimal del contenido.
+    """
+
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
@@ -1,10 +1,16 @@
-import pandas as pd
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
+from .sp_calculos import (resumen_descriptivo, eficiencia_envio, evolucion, tendencias, correlaciones,
+                          muestra_estratificada)
+from .sp_graficos import plt, sns, dibujar_densidad, dibujar_recta, finalizar
+from .sp_instrumentacion import instrumentar_si_activado
+from .sp_series import GRANULARIDADES
+from .sp_tipos import a_numpy
 
 
-def analisis_descriptivo(df):
+# Nombres de las medidas en los títulos de los gráficos
+NOMBRES_MEDIDAS = {'Sales': 'Ventas', 'Profit': 'Beneficio', 'Quantity': 'Cantidad', 'Shipping_Cost': 'Coste de envío'}
+
+
+def analisis_descriptivo(df, mostrar=True):
     """
     Realiza un análisis descriptivo del DataFrame, mostrando un resumen estadístico y distribuciones de ventas, beneficios y cantidad.
 
@@ -13,153 +19,231 @@ def analisis_descriptivo(df):
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas "Sales", "Profit" y "Quantity" para realizar el análisis y las visualizaciones.
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra el resumen y los gráficos directamente).
+    None (muestra el resumen y los gráficos directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
     
-    resumen = df.describe()
+    resumen = resumen_descriptivo(df)
     print("\nResumen Estadístico:\n", resumen)
     
     # Ver distribución de ventas, beneficios y cantidad
     numeric_cols = ['Sales', 'Profit', 'Quantity']
     df[numeric_cols].hist(bins=50, figsize=(12, 6))
+    fig = plt.gcf()
     plt.suptitle("Distribución de Ventas, Beneficios y Cantidad")
-    plt.show()
+    return finalizar(fig, mostrar)
     
 
-def impacto_descuento(df):
+def impacto_descuento(df, modo='puntos', bins=80, muestra=0, mostrar=True):
     """
     Analiza la relación entre el descuento y la rentabilidad utilizando un gráfico de dispersión con línea de tendencia.
 
-    - Utiliza un gráfico de dispersión para mostrar la relación entre el descuento aplicado y la rentabilidad (Profit).
-    - Añade una línea de tendencia para visualizar la correlación.
+    - Utiliza un gráfico de dispersión (o de densidad) para mostrar la relación entre el descuento aplicado y la rentabilidad (Profit).
+    - Añade la línea de tendencia ajustada por mínimos cuadrados (`obtener_regresiones`) con su banda de confianza analítica.
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas "Discount" y "Profit" para realizar la visualización.
+    modo (str, opcional): 'puntos' dibuja cada fila; 'densidad' dibuja una rejilla 2-D de recuentos,
+                          cuyo coste no depende del número de filas (por defecto 'puntos').
+    bins (int, opcional): Número de intervalos por eje en modo 'densidad' (por defecto 80).
+    muestra (int, opcional): En modo 'densidad', número de filas de una muestra estratificada por mercado
+                             que se superpone como puntos (por defecto 0, sin muestra).
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra el gráfico directamente).
+    None (muestra el gráfico directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
 
-    plt.figure(figsize=(8, 5))
+    fig = plt.figure(figsize=(8, 5))
 
     # Gráfico de dispersión con línea de tendencia
-    sns.regplot(x=df["Discount"], y=df["Profit"], scatter_kws={"alpha": 0.6}, line_kws={"color": "red"})
+    if modo == 'densidad':
+        dibujar_densidad(plt.gca(), df["Discount"], df["Profit"], bins=bins,
+                         muestra=_muestra(df, muestra), hue='Market' if muestra else None)
+    else:
+        plt.scatter(df["Discount"], df["Profit"], alpha=0.6)
+    dibujar_recta(plt.gca(), tendencias(df).loc["Discount"], color="red")
 
     plt.title("Relación entre Descuento y Rentabilidad", fontsize=14)
     plt.xlabel("Descuento", fontsize=12)
     plt.ylabel("Rentabilidad (Profit)", fontsize=12)
-    plt.show()
+    return finalizar(fig, mostrar)
 
 
-def evolucion_ventas(df):
+def evolucion_ventas(df, granularidad='M', medida='Sales', por=None, ventana=None, mostrar=True):
     """
     Analiza la evolución de las ventas a lo largo del tiempo, mostrando la suma de ventas por mes.
 
-    - Convierte la columna "Order_Date" a formato datetime.
-    - Agrupa los datos por mes y calcula la suma de las ventas para cada mes.
+    - Toma la serie pre-agregada del almacén de series temporales (`obtener_series`), sin volver a parsear las fechas
+      ni a agrupar los pedidos.
     - Genera un gráfico de línea que muestra cómo evolucionaron las ventas mes a mes.
+    - Opcionalmente cambia la granularidad o la medida, separa la serie por grupo y superpone la media móvil.
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas "Order_Date" y "Sales" para realizar el análisis.
+    granularidad (str, opcional): 'D' (día), 'W' (semana), 'M' (mes) o 'Q' (trimestre) (por defecto 'M').
+    medida (str, opcional): Medida a representar: 'Sales', 'Profit', 'Quantity' o 'Shipping_Cost' (por defecto 'Sales').
+    por (str, opcional): Dimensión por la que separar la serie: 'Market', 'Segment' o 'Category' (por defecto ninguna).
+    ventana (int, opcional): Si se indica, dibuja también la media móvil de ese número de periodos.
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra el gráfico directamente).
+    None (muestra el gráfico directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
    
-    df['Order_Date'] = pd.to_datetime(df['Order_Date'])
-    ventas_por_mes = df.groupby(df['Order_Date'].dt.to_period('M'))['Sales'].sum()
-    
-    plt.figure(figsize=(8, 5))
-    ventas_por_mes.plot()
-    plt.title("Evolución de Ventas por Mes", fontsize=14)
+    serie = evolucion(df, granularidad, medida, por)
+    nombre = NOMBRES_MEDIDAS.get(medida, medida)
+
+    fig = plt.figure(figsize=(8, 5))
+    ax = serie.plot(ax=plt.gca())
+    if ventana:
+        # Cada media móvil con el color de su serie
+        colores = [linea.get_color() for linea in ax.get_lines()]
+        evolucion(df, granularidad, medida, por, ventana).plot(ax=ax, linestyle='--', color=colores, legend=False, alpha=0.7)
+    plt.title(f"Evolución de {nombre} por {GRANULARIDADES[granularidad]}", fontsize=14)
     plt.xlabel("Fecha", fontsize=12)
-    plt.ylabel("Ventas", fontsize=12)
-    plt.show()
+    plt.ylabel(nombre, fontsize=12)
+    return finalizar(fig, mostrar)
     
 
-def relacion_pib_ventas(df):
+def relacion_pib_ventas(df, modo='puntos', bins=80, muestra=0, mostrar=True):
     """
     Analiza la relación entre el PIB per cápita y las ventas utilizando un gráfico de dispersión y una línea de tendencia.
 
     - Crea un gráfico de dispersión donde el tamaño de los puntos representa las ventas y el color se utiliza para diferenciar los mercados.
-    - Añade una línea de tendencia con el gráfico de dispersión para mostrar la relación entre las variables.
+      En modo 'densidad' se dibuja la rejilla de recuentos y, opcionalmente, una muestra coloreada por mercado.
+    - Añade la línea de tendencia ajustada por mínimos cuadrados (`obtener_regresiones`) para mostrar la relación entre las variables.
     - Utiliza un gráfico de dispersión para visualizar cómo el crecimiento del PIB está relacionado con las ventas totales.
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas "GDP_Growth(%)", "Sales" y "Market" para realizar el análisis.
+    modo (str, opcional): 'puntos' dibuja cada fila; 'densidad' dibuja una rejilla 2-D de recuentos,
+                          cuyo coste no depende del número de filas (por defecto 'puntos').
+    bins (int, opcional): Número de intervalos por eje en modo 'densidad' (por defecto 80).
+    muestra (int, opcional): En modo 'densidad', número de filas de una muestra estratificada por mercado
+                             que se superpone como puntos (por defecto 0, sin muestra).
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra el gráfico directamente).
+    None (muestra el gráfico directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
    
-    plt.figure(figsize=(8, 5))
+    fig = plt.figure(figsize=(8, 5))
 
     # Gráfico de dispersión con línea de tendencia
-    ax = sns.scatterplot(x=df["GDP_Growth(%)"], y=df["Sales"], hue=df["Market"], size=df["Sales"], palette="coolwarm", legend=True, sizes=(20, 200))
-    sns.regplot(x=df["GDP_Growth(%)"], y=df["Sales"], scatter=False, color="black", line_kws={"linestyle": "dashed"})  
+    if modo == 'densidad':
+        dibujar_densidad(plt.gca(), df["GDP_Growth(%)"], df["Sales"], bins=bins,
+                         muestra=_muestra(df, muestra), hue='Market', palette="coolwarm")
+    else:
+        datos = a_numpy(df, ["GDP_Growth(%)", "Sales", "Market"])
+        ax = sns.scatterplot(x=datos["GDP_Growth(%)"], y=datos["Sales"], hue=datos["Market"], size=datos["Sales"], palette="coolwarm", legend=True, sizes=(20, 200))
+    ajuste = tendencias(df, y="Sales", x=["GDP_Growth(%)"]).loc["GDP_Growth(%)"]
+    dibujar_recta(plt.gca(), ajuste, color="black", linestyle="dashed")
 
     plt.title("Relación entre PIB per cápita y Ventas", fontsize=14)
     plt.xlabel("PIB per cápita (%)", fontsize=12)
     plt.ylabel("Ventas Totales", fontsize=12)
     plt.grid(True, linestyle="--", alpha=0.6)
-    plt.show()
+    return finalizar(fig, mostrar)
 
 
-def impacto_inflacion(df):
+def impacto_inflacion(df, modo='puntos', bins=80, muestra=0, mostrar=True):
     """
     Analiza el impacto de la inflación en los márgenes de beneficio utilizando un gráfico de dispersión y una línea de tendencia.
 
-    - Crea un gráfico de dispersión que muestra la relación entre la inflación y el beneficio (Profit).
-    - Añade una línea de tendencia (regresión lineal) para observar cómo la inflación afecta a los márgenes de beneficio.
+    - Crea un gráfico de dispersión (o de densidad) que muestra la relación entre la inflación y el beneficio (Profit).
+    - Añade una línea de tendencia (regresión lineal por mínimos cuadrados, `obtener_regresiones`) para observar cómo la inflación afecta a los márgenes de beneficio.
 
     Parámetros:
     df (pd.DataFrame): DataFrame que debe contener las columnas "Inflation(%)" y "Profit" para realizar el análisis.
+    modo (str, opcional): 'puntos' dibuja cada fila; 'densidad' dibuja una rejilla 2-D de recuentos,
+                          cuyo coste no depende del número de filas (por defecto 'puntos').
+    bins (int, opcional): Número de intervalos por eje en modo 'densidad' (por defecto 80).
+    muestra (int, opcional): En modo 'densidad', número de filas de una muestra estratificada por mercado
+                             que se superpone como puntos (por defecto 0, sin muestra).
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra el gráfico directamente).
+    None (muestra el gráfico directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
 
-    plt.figure(figsize=(8, 5))
+    fig = plt.figure(figsize=(8, 5))
 
     # Gráfico de dispersión
-    sns.scatterplot(data=df, x="Inflation(%)", y="Profit", alpha=0.6)
+    if modo == 'densidad':
+        dibujar_densidad(plt.gca(), df["Inflation(%)"], df["Profit"], bins=bins,
+                         muestra=_muestra(df, muestra), hue='Market' if muestra else None)
+    else:
+        sns.scatterplot(data=a_numpy(df, ["Inflation(%)", "Profit"]), x="Inflation(%)", y="Profit", alpha=0.6)
 
     # Línea de tendencia
-    sns.regplot(data=df, x="Inflation(%)", y="Profit", scatter=False, color='red')
+    dibujar_recta(plt.gca(), tendencias(df).loc["Inflation(%)"], color='red')
 
     # Personalización del gráfico
     plt.title("Impacto de la Inflación en los Márgenes de Beneficio")
     plt.xlabel("Inflación (%)")
     plt.ylabel("Profit")
     plt.grid(True)
-    plt.show()
+    return finalizar(fig, mostrar)
+
 
+def _muestra(df, n):
+    """Muestra estratificada por mercado para superponer en los gráficos de densidad."""
 
-def correlaciones_heatmap(df):
+    if not n:
+        return None
+    return muestra_estratificada(df, n, estratos='Market' if 'Market' in df.columns else None)
+
+
+def correlaciones_heatmap(df, metodo='pearson', por=None, mostrar=True):
     """
     Crea un mapa de calor (heatmap) para visualizar las correlaciones entre las variables numéricas del DataFrame.
 
-    - Filtra las columnas numéricas del DataFrame.
-    - Calcula la matriz de correlación entre las variables numéricas.
+    - Toma la matriz de correlación de `sp_correlacion`, que excluye las columnas de calendario
+      (Year, Weeknum, Month y Quarter) y se calcula una sola vez por DataFrame.
     - Muestra la matriz de correlación como un mapa de calor, donde cada valor se representa con una escala de colores.
+    - Si se indica `por`, dibuja un mapa de calor por grupo (por ejemplo, por Market o por Segment).
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las variables numéricas para calcular las correlaciones.
+    metodo (str, opcional): 'pearson' o 'spearman' (por defecto 'pearson').
+    por (str, opcional): Columna por la que calcular una matriz por grupo (por defecto ninguna).
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra el gráfico del heatmap directamente).
+    None (muestra el gráfico del heatmap directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
-    
-    numeric_df = df.select_dtypes(include=['number'])  # Filtrar solo numéricas
-    plt.figure(figsize=(10, 5))
-    sns.heatmap(numeric_df.corr(), annot=True, cmap='coolwarm', fmt='.2f')
-    plt.title("Matriz de Correlación")
-    plt.show()
 
+    matriz = correlaciones(df, metodo=metodo, por=por)
+    titulo = "Matriz de Correlación" if metodo == 'pearson' else f"Matriz de Correlación ({metodo.capitalize()})"
+
+    if por is None:
+        fig = plt.figure(figsize=(10, 5))
+        sns.heatmap(matriz, annot=True, cmap='coolwarm', fmt='.2f')
+        plt.title(titulo)
+        return finalizar(fig, mostrar)
 
-def distribucion_prioridad_envio(df):
+    grupos = matriz.index.get_level_values(0).unique()
+    ncols = min(3, len(grupos))
+    nrows = -(-len(grupos) // ncols)
+    fig, axes = plt.subplots(nrows, ncols, figsize=(7 * ncols, 5.5 * nrows), squeeze=False)
+
+    for ax, grupo in zip(axes.flat, grupos):
+        sns.heatmap(matriz.loc[grupo], annot=True, cmap='coolwarm', fmt='.2f', vmin=-1, vmax=1,
+                    annot_kws={'size': 7}, cbar=False, ax=ax)
+        ax.set_title(f'{por}: {grupo}')
+        ax.set_ylabel('')
+    for ax in axes.flat[len(grupos):]:
+        ax.set_visible(False)
+
+    fig.suptitle(f'{titulo} por {por}')
+    plt.tight_layout(rect=(0, 0, 1, 0.97))
+    return finalizar(fig, mostrar)
+
+
+def distribucion_prioridad_envio(df, mostrar=True):
     """
     Visualiza la distribución de las columnas de prioridad de pedido y modo de envío en el DataFrame.
 
@@ -168,51 +252,44 @@ def distribucion_prioridad_envio(df):
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas 'Order_Priority' y 'Ship_Mode' para analizar la distribución.
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra los gráficos de distribución).
+    None (muestra los gráficos de distribución) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
 
     exp_cols = ['Order_Priority', 'Ship_Mode']
     
-    plt.figure(figsize=(10, 5))
+    fig = plt.figure(figsize=(10, 5))
     
     for i, column in enumerate(exp_cols):
         plt.subplot(1, 2, i + 1)
-        sns.histplot(data=df, x=column, kde=True, bins=30)
+        sns.histplot(data=a_numpy(df[column]).to_frame(), x=column, kde=True, bins=30)
         plt.title(f'Distribución de {column}')
         plt.xticks(rotation=45)
         plt.tight_layout()
-    plt.show()
+    return finalizar(fig, mostrar)
 
 
-def eficiencia_metodos_envio(df):
+def eficiencia_metodos_envio(df, mostrar=True):
     """
     Calcula y visualiza la eficiencia de los diferentes métodos de envío, en términos de:
     - Tiempo de entrega promedio.
     - Coste de envío promedio.
     - Rentabilidad promedio por método de envío.
 
+    Las medias se obtienen del cubo de ventas (`obtener_cubo`).
+
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas 'Order_Date', 'Ship_Date', 'Shipping_Cost', 'Profit' y 'Ship_Mode'.
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra los gráficos de barras con la información calculada).
+    None (muestra los gráficos de barras con la información calculada) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
     
-    # Asegurar que las fechas son de tipo datetime
-    df['Order_Date'] = pd.to_datetime(df['Order_Date'])
-    df['Ship_Date'] = pd.to_datetime(df['Ship_Date'])
-    
-    # Calcular días de entrega
-    df['Delivery_Time'] = (df['Ship_Date'] - df['Order_Date']).dt.days
-
-    # Agrupar por método de envío
-    envio_stats = df.groupby("Ship_Mode").agg(
-        Avg_Delivery_Time=('Delivery_Time', 'mean'),
-        Avg_Shipping_Cost=('Shipping_Cost', 'mean'),
-        Avg_Profit=('Profit', 'mean')
-    ).reset_index()
+    # Medias por método de envío a partir del cubo de ventas (el DataFrame original no se modifica)
+    envio_stats = eficiencia_envio(df)
 
     # Visualización
     fig, axes = plt.subplots(1, 3, figsize=(18, 5))
@@ -226,5 +303,8 @@ def eficiencia_metodos_envio(df):
     sns.barplot(x='Ship_Mode', y='Avg_Profit', data=envio_stats, ax=axes[2])
     axes[2].set_title("Rentabilidad por método de envío")
 
-    plt.show()
+    return finalizar(fig, mostrar)
+
 
+# Instrumentación opcional (variable de entorno SP_INSTRUMENTACION)
+instrumentar_si_activado(__name__)
@@ -0,0 +1,350 @@
+import argparse
+import builtins
+import contextlib
+import io
+import multiprocessing as mp
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+import matplotlib
+import matplotlib.figure
+import pandas as pd
+import numpy as np
+
+from . import sp_analisis_general as ag
+from . import sp_cleaning as cl
+from . import sp_visualizations as vis
+from .sp_almacen import DIRECTORIO_PROCESADO, guardar_etapa, cargar_etapa
+from .sp_indicadores import RUTA_INDICADORES
+from .sp_informe import INFORME
+from .sp_pipeline import COLUMNAS_OUTLIERS, Pipeline, etapas_por_defecto
+from .sp_sintetico import TAMANOS, escribir
+from .sp_streaming import procesar_por_bloques
+
+
+# Directorio de los resultados y de los datasets sintéticos de los benchmarks (data/data_processed/benchmark)
+DIRECTORIO_BENCHMARK = os.path.join(DIRECTORIO_PROCESADO, 'benchmark')
+
+# Funciones públicas a medir sobre el dataset final: grupo -> nombre -> (función, argumentos)
+FUNCIONES = {
+    'cleaning': {
+        'eda_preliminar': (cl.eda_preliminar, {}),
+        'convertir_col': (cl.convertir_col, {}),
+        'compactar_df': (cl.compactar_df, {'verbose': False}),
+        'calcular_nulos': (cl.calcular_nulos, {}),
+        'analisis_general_cat': (cl.analisis_general_cat, {}),
+        'contar_outliers': (cl.contar_outliers, {}),
+        'columnas_con_nulos': (cl.columnas_con_nulos, {}),
+        'ajustar_outliers': (cl.ajustar_outliers, {'columnas_a_ajustar': COLUMNAS_OUTLIERS}),
+    },
+    'analisis_general': {nombre: (funcion, {**kwargs, 'mostrar': False})
+                         for nombre, (funcion, kwargs) in INFORME.items() if funcion.__module__ == ag.__name__},
+    'visualizations': {
+        'subplot_col_cat': (vis.subplot_col_cat, {'mostrar': False}),
+        'subplot_col_num': (vis.subplot_col_num, {'col': COLUMNAS_OUTLIERS, 'mostrar': False}),
+        'boxplot_con_nulos': (vis.boxplot_con_nulos, {'mostrar': False}),
+        **{nombre: (funcion, {**kwargs, 'mostrar': False})
+           for nombre, (funcion, kwargs) in INFORME.items() if funcion.__module__ == vis.__name__},
+    },
+}
+
+GRUPOS = ('generacion', 'pipeline', 'streaming') + tuple(FUNCIONES)
+
+COLUMNAS_RESULTADOS = ['tamano', 'n_filas', 'grupo', 'funcion', 'tiempo_s', 'memoria_mb', 'estado']
+
+
+def _rss():
+    """Memoria residente actual del proceso en bytes (Linux), o None si no se puede leer."""
+
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+@contextlib.contextmanager
+def _sin_salida():
+    """
+    Silencia la salida de las funciones medidas: redirige stdout y sustituye `display` (IPython) por una
+    función vacía. Al salir restaura el `display` anterior, o lo elimina si no existía.
+    """
+
+    ausente = object()
+    anterior = getattr(builtins, 'display', ausente)
+    builtins.display = lambda *objetos, **opciones: None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        if anterior is ausente:
+            del builtins.display
+        else:
+            builtins.display = anterior
+
+
+def _ejecutar_medido(funcion, args, kwargs, en_hijo):
+    """Ejecuta la función sin salida por pantalla y devuelve (tiempo en s, memoria pico en bytes)."""
+
+    matplotlib.use('Agg')
+
+    if en_hijo:
+        import resource
+        inicial = _rss()
+    else:
+        tracemalloc.start()
+
+    with _sin_salida():
+        inicio = time.perf_counter()
+        resultado = funcion(*args, **kwargs)
+        tiempo = time.perf_counter() - inicio
+
+    if en_hijo:
+        # ru_maxrss está en KB en Linux
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - inicial
+    else:
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    if isinstance(resultado, matplotlib.figure.Figure):
+        import matplotlib.pyplot as plt
+        plt.close(resultado)
+    return tiempo, max(pico, 0)
+
+
+def _hijo(conexion, funcion, args, kwargs):
+    try:
+        conexion.send(('ok',) + _ejecutar_medido(funcion, args, kwargs, en_hijo=True))
+    except BaseException as error:
+        conexion.send((f'error: {type(error).__name__}: {error}', np.nan, np.nan))
+    finally:
+        conexion.close()
+
+
+def medir(funcion, *args, **kwargs):
+    """
+    Mide el tiempo de ejecución y la memoria pico de una llamada.
+
+    - Cuando el sistema lo permite (fork, Linux), la llamada se ejecuta en un proceso hijo que hereda
+      los datos sin copiarlos: cada medida empieza con las cachés vacías (`sp_cache`), no deja estado
+      en el proceso principal y un fallo o falta de memoria no detiene el resto de medidas. La memoria
+      pico es el máximo de memoria residente del hijo menos la que tenía al empezar.
+    - En otro caso, se ejecuta en el propio proceso y la memoria pico se mide con `tracemalloc`
+      (no incluye la memoria reservada por pyarrow).
+
+    Parámetros:
+    funcion (callable): Función a medir.
+    *args, **kwargs: Argumentos de la función.
+
+    Retorno:
+    dict: 'tiempo_s', 'memoria_mb' y 'estado' ('ok' o el error producido).
+    """
+
+    if 'fork' in mp.get_all_start_methods() and _rss() is not None:
+        contexto = mp.get_context('fork')
+        receptor, emisor = contexto.Pipe(duplex=False)
+        proceso = contexto.Process(target=_hijo, args=(emisor, funcion, args, kwargs))
+        proceso.start()
+        emisor.close()
+        try:
+            estado, tiempo, pico = receptor.recv()
+        except EOFError:
+            estado, tiempo, pico = 'error: proceso terminado', np.nan, np.nan
+        proceso.join()
+        if proceso.exitcode and estado == 'ok':
+            estado = f'error: código de salida {proceso.exitcode}'
+    else:
+        try:
+            tiempo, pico = _ejecutar_medido(funcion, args, kwargs, en_hijo=False)
+            estado = 'ok'
+        except Exception as error:
+            estado, tiempo, pico = f'error: {type(error).__name__}: {error}', np.nan, np.nan
+
+    return {'tiempo_s': tiempo, 'memoria_mb': pico / 2 ** 20, 'estado': estado}
+
+
+def _datos_sinteticos(n_filas, semilla, directorio, esquema, extension):
+    """Devuelve la ruta del dataset sintético, generándolo solo si no existe. Devuelve también la medida."""
+
+    ruta = os.path.join(directorio, f'sintetico_{esquema}_{n_filas}_{semilla}.{extension}')
+    if os.path.exists(ruta):
+        return ruta, None
+    return ruta, medir(escribir, ruta, n_filas, semilla, esquema)
+
+
+def _medir_pipeline(ruta_superstore, ruta_indicadores, directorio):
+    """Mide cada etapa del pipeline por separado; la lectura y escritura de entradas y salidas no se cuentan."""
+
+    pipeline = Pipeline(etapas_por_defecto(ruta_superstore, ruta_indicadores), directorio_cache=directorio)
+    medidas = {}
+    for nombre in pipeline.orden():
+        etapa = pipeline.etapas[nombre]
+        entradas = [cargar_etapa(dep, directorio=directorio) for dep in etapa.dependencias]
+        medidas[nombre] = medir(etapa.funcion, *entradas, **etapa.parametros)
+        if medidas[nombre]['estado'] != 'ok':
+            break
+        # La salida se calcula de nuevo, fuera de la medida, y se guarda para las etapas siguientes
+        with _sin_salida():
+            salida = etapa.funcion(*entradas, **etapa.parametros).reset_index(drop=True)
+        guardar_etapa(salida, nombre, directorio=directorio, reducir=False)
+        del entradas, salida
+    return medidas
+
+
+def ejecutar_benchmark(tamanos=('51k',), grupos=GRUPOS, semilla=0, directorio=DIRECTORIO_BENCHMARK,
+                       ruta_indicadores=RUTA_INDICADORES, max_filas_memoria=10_000_000, verbose=True):
+    """
+    Mide el tiempo y la memoria pico de las funciones públicas y de las etapas del pipeline sobre
+    datasets sintéticos de varios tamaños (`sp_sintetico`).
+
+    - 'generacion': escritura del dataset sintético (solo la primera vez; después se reutiliza).
+    - 'pipeline': cada etapa de `sp_pipeline` por separado, desde superstore.csv sintético.
+    - 'streaming': `procesar_por_bloques` sobre el mismo CSV, con memoria acotada.
+    - 'cleaning', 'analisis_general' y 'visualizations': cada función de `FUNCIONES` sobre el dataset final.
+
+    Los grupos que cargan el dataset entero en memoria se omiten por encima de `max_filas_memoria`.
+
+    Parámetros:
+    tamanos (tuple, opcional): Tamaños de `sp_sintetico.TAMANOS` o números de filas (por defecto ('51k',)).
+    grupos (tuple, opcional): Grupos a medir (por defecto todos, ver `GRUPOS`).
+    semilla (int, opcional): Semilla de los datasets sintéticos (por defecto 0).
+    directorio (str, opcional): Directorio de los datasets sintéticos (por defecto `DIRECTORIO_BENCHMARK`).
+    ruta_indicadores (str, opcional): Ruta de indicators.xlsx (por defecto `RUTA_INDICADORES`).
+    max_filas_memoria (int, opcional): Filas máximas para los grupos en memoria (por defecto 10.000.000).
+    verbose (bool, opcional): Si es True, muestra cada medida al obtenerla (por defecto True).
+
+    Retorno:
+    pd.DataFrame: Una fila por tamaño y función, con las columnas de `COLUMNAS_RESULTADOS`.
+    """
+
+    os.makedirs(directorio, exist_ok=True)
+    filas = []
+
+    def anotar(tamano, n_filas, grupo, funcion, medida):
+        fila = {'tamano': tamano, 'n_filas': n_filas, 'grupo': grupo, 'funcion': funcion, **medida}
+        filas.append(fila)
+        if verbose:
+            print(f'{tamano:>6s} {grupo:16s} {funcion:30s} {fila["tiempo_s"]:9.3f} s {fila["memoria_mb"]:9.1f} MB  {fila["estado"]}')
+
+    for tamano in tamanos:
+        n_filas = TAMANOS[tamano] if tamano in TAMANOS else int(tamano)
+        tamano = str(tamano)
+        en_memoria = n_filas <= max_filas_memoria
+
+        ruta_csv, medida = _datos_sinteticos(n_filas, semilla, directorio, 'raw', 'csv')
+        if medida is not None and 'generacion' in grupos:
+            anotar(tamano, n_filas, 'generacion', 'escribir_csv', medida)
+
+        if 'pipeline' in grupos:
+            if en_memoria:
+                directorio_etapas = os.path.join(directorio, f'etapas_{n_filas}_{semilla}')
+                os.makedirs(directorio_etapas, exist_ok=True)
+                for nombre, medida in _medir_pipeline(ruta_csv, ruta_indicadores, directorio_etapas).items():
+                    anotar(tamano, n_filas, 'pipeline', nombre, medida)
+            else:
+                anotar(tamano, n_filas, 'pipeline', '*', {'tiempo_s': np.nan, 'memoria_mb': np.nan, 'estado': 'omitido'})
+
+        if 'streaming' in grupos:
+            df_ind = cl.renombrar_indicadores(pd.read_excel(ruta_indicadores))
+            anotar(tamano, n_filas, 'streaming', 'procesar_por_bloques', medir(procesar_por_bloques, ruta_csv, df_ind))
+
+        grupos_funciones = [grupo for grupo in FUNCIONES if grupo in grupos]
+        if not grupos_funciones:
+            continue
+        if not en_memoria:
+            for grupo in grupos_funciones:
+                anotar(tamano, n_filas, grupo, '*', {'tiempo_s': np.nan, 'memoria_mb': np.nan, 'estado': 'omitido'})
+            continue
+
+        ruta_final, medida = _datos_sinteticos(n_filas, semilla, directorio, 'final', 'parquet')
+        if medida is not None and 'generacion' in grupos:
+            anotar(tamano, n_filas, 'generacion', 'escribir_parquet', medida)
+        df = pd.read_parquet(ruta_final)
+        for grupo in grupos_funciones:
+            for nombre, (funcion, kwargs) in FUNCIONES[grupo].items():
+                anotar(tamano, n_filas, grupo, nombre, medir(funcion, df, **kwargs))
+        del df
+
+    return pd.DataFrame(filas, columns=COLUMNAS_RESULTADOS)
+
+
+def tabla_escalado(resultados, medida='tiempo_s'):
+    """
+    Resume cómo crece una medida con el número de filas para cada función.
+
+    El exponente es la pendiente de log(medida) frente a log(filas) entre los dos tamaños mayores:
+    cerca de 1 es crecimiento lineal, y por encima de 1 indica el punto donde el escalado se rompe.
+
+    Parámetros:
+    resultados (pd.DataFrame): Resultados de `ejecutar_benchmark` con varios tamaños.
+    medida (str, opcional): 'tiempo_s' o 'memoria_mb' (por defecto 'tiempo_s').
+
+    Retorno:
+    pd.DataFrame: Una fila por (grupo, función), una columna por número de filas y la columna 'exponente'.
+    """
+
+    ok = resultados[resultados['estado'] == 'ok']
+    tabla = ok.pivot_table(index=['grupo', 'funcion'], columns='n_filas', values=medida, aggfunc='min')
+    tabla = tabla.sort_index(axis=1)
+
+    if tabla.shape[1] >= 2:
+        (n1, n2) = tabla.columns[-2:]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            tabla['exponente'] = np.log(tabla[n2] / tabla[n1]) / np.log(n2 / n1)
+    return tabla
+
+
+def comparar(actual, referencia, tolerancia=0.2, medida='tiempo_s'):
+    """
+    Compara dos ejecuciones del benchmark para detectar regresiones.
+
+    Parámetros:
+    actual (pd.DataFrame): Resultados nuevos.
+    referencia (pd.DataFrame): Resultados de referencia (por ejemplo, cargados de un CSV anterior).
+    tolerancia (float, opcional): Aumento relativo a partir del cual se marca una regresión (por defecto 0.2).
+    medida (str, opcional): 'tiempo_s' o 'memoria_mb' (por defecto 'tiempo_s').
+
+    Retorno:
+    pd.DataFrame: Medida de referencia, actual, cociente y columna 'regresion', ordenado por cociente.
+    """
+
+    claves = ['tamano', 'grupo', 'funcion']
+    comparacion = referencia[claves + [medida]].merge(actual[claves + [medida]], on=claves,
+                                                      suffixes=('_referencia', '_actual'))
+    comparacion['cociente'] = comparacion[f'{medida}_actual'] / comparacion[f'{medida}_referencia']
+    comparacion['regresion'] = comparacion['cociente'] > 1 + tolerancia
+    return comparacion.sort_values('cociente', ascending=False, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mide tiempo y memoria de las funciones y etapas del pipeline con datos sintéticos.')
+    parser.add_argument('--tamanos', nargs='+', default=['51k'], help=f'Tamaños ({list(TAMANOS)}) o números de filas')
+    parser.add_argument('--grupos', nargs='+', default=list(GRUPOS), choices=GRUPOS, help='Grupos a medir (por defecto todos)')
+    parser.add_argument('--semilla', type=int, default=0, help='Semilla de los datasets sintéticos (por defecto 0)')
+    parser.add_argument('--directorio', default=DIRECTORIO_BENCHMARK, help='Directorio de datos y resultados')
+    parser.add_argument('--max-filas-memoria', type=int, default=10_000_000,
+                        help='Filas máximas para los grupos que cargan el dataset en memoria')
+    parser.add_argument('--referencia', help='CSV de resultados anteriores con el que comparar')
+    args = parser.parse_args()
+
+    resultados = ejecutar_benchmark(args.tamanos, args.grupos, args.semilla, args.directorio,
+                                    max_filas_memoria=args.max_filas_memoria)
+    ruta = os.path.join(args.directorio, f'resultados_{datetime.now():%Y%m%d_%H%M%S}.csv')
+    resultados.to_csv(ruta, index=False)
+    print(f'\nResultados guardados en {ruta}')
+
+    if resultados['n_filas'].nunique() > 1:
+        print('\nEscalado del tiempo (s):')
+        print(tabla_escalado(resultados).round(3).to_string())
+
+    if args.referencia:
+        comparacion = comparar(resultados, pd.read_csv(args.referencia, dtype={'tamano': str}))
+        print('\nRegresiones respecto a la referencia:')
+        regresiones = comparacion[comparacion['regresion']]
+        print('Ninguna' if regresiones.empty else regresiones.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import weakref
+
+
+# Caché por DataFrame: id(df) -> (referencia débil, firma, {clave: valor})
+_CACHE = {}
+
+
+def _firma(df):
+    """Firma barata del DataFrame para detectar cambios de estructura (no recorre los datos)."""
+
+    return (df.shape, tuple(df.columns), tuple(map(str, df.dtypes)))
+
+
+def obtener(df, clave, calcular):
+    """
+    Devuelve un resultado calculado a partir de un DataFrame, memorizado mientras el DataFrame exista.
+
+    - El resultado se guarda asociado al DataFrame (por identidad) y a `clave`.
+    - Si cambia la estructura del DataFrame (filas, columnas o tipos), se descartan todos sus resultados.
+      La comprobación no recorre los datos, para que cada consulta a la caché cueste lo mismo con
+      cualquier número de filas.
+    - Si se modifican valores del DataFrame sin cambiar su estructura (`fillna(inplace=True)`,
+      `df.loc[m, col] = ...`), usar `invalidar(df)`. Las funciones de `sp_cleaning` que modifican
+      el DataFrame in place ya lo hacen.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame del que depende el resultado.
+    clave (hashable): Identificador del resultado (por ejemplo, 'perfil').
+    calcular (callable): Función sin argumentos que calcula el resultado si no está en caché.
+
+    Retorno:
+    object: Resultado memorizado.
+    """
+
+    id_df = id(df)
+    firma = _firma(df)
+    entrada = _CACHE.get(id_df)
+
+    if entrada is None or entrada[0]() is not df or entrada[1] != firma:
+        ref = weakref.ref(df, lambda _, i=id_df: _CACHE.pop(i, None))
+        entrada = (ref, firma, {})
+        _CACHE[id_df] = entrada
+
+    resultados = entrada[2]
+    if clave not in resultados:
+        resultados[clave] = calcular()
+    return resultados[clave]
+
+
+def invalidar(df):
+    """
+    Elimina de la caché todos los resultados asociados a un DataFrame (por ejemplo, tras modificarlo in place).
+    """
+
+    _CACHE.pop(id(df), None)
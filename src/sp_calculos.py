@@ -0,0 +1,245 @@
+import pandas as pd
+import numpy as np
+
+from .sp_correlacion import obtener_correlaciones
+from .sp_cubo import obtener_cubo, enrollar, semiamplitud_error
+from .sp_instrumentacion import instrumentar_si_activado
+from .sp_perfil import columnas_categoricas
+from .sp_regresion import VARIABLES_PROFIT, obtener_regresiones
+from .sp_series import obtener_series, media_movil
+
+
+# Capa de cálculo de los gráficos: devuelve los agregados como DataFrames, Series o arrays y solo
+# depende de pandas y numpy, para usarla en procesos por lotes sin cargar matplotlib ni seaborn
+
+
+def muestra_estratificada(df, n, estratos=None, semilla=0):
+    """
+    Devuelve una muestra de aproximadamente `n` filas, proporcional al tamaño de cada estrato.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a muestrear.
+    n (int): Número aproximado de filas de la muestra.
+    estratos (str o list, opcional): Columna o columnas que definen los estratos (por defecto muestreo simple).
+    semilla (int, opcional): Semilla para que la muestra sea reproducible (por defecto 0).
+
+    Retorno:
+    pd.DataFrame: Muestra del DataFrame.
+    """
+
+    if n >= len(df):
+        return df
+    fraccion = n / len(df)
+    if estratos is None:
+        return df.sample(frac=fraccion, random_state=semilla)
+    return df.groupby(estratos, observed=True, group_keys=False).sample(frac=fraccion, random_state=semilla)
+
+
+def binear_2d(x, y, bins=80):
+    """
+    Agrega dos variables en una rejilla 2-D de recuentos.
+
+    Parámetros:
+    x (pd.Series o array): Valores del eje x.
+    y (pd.Series o array): Valores del eje y.
+    bins (int, opcional): Número de intervalos por eje (por defecto 80).
+
+    Retorno:
+    tuple: Matriz de recuentos (bins × bins) y bordes de los intervalos en x e y.
+    """
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    validos = np.isfinite(x) & np.isfinite(y)
+    return np.histogram2d(x[validos], y[validos], bins=bins)
+
+
+def resumen_descriptivo(df):
+    """
+    Devuelve el resumen estadístico de las columnas numéricas (`analisis_descriptivo`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a resumir.
+
+    Retorno:
+    pd.DataFrame: Resultado de `df.describe()`.
+    """
+
+    return df.describe()
+
+
+def ventas_por(df, por='Category'):
+    """
+    Devuelve las ventas totales por grupo, de mayor a menor, a partir del cubo de ventas (`categorias_mas_vendidas`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las columnas `por` y "Sales".
+    por (str, opcional): Dimensión del cubo, por ejemplo 'Category' o 'Sub_Category' (por defecto 'Category').
+
+    Retorno:
+    pd.Series: Ventas por grupo.
+    """
+
+    return enrollar(obtener_cubo(df), por, ['Sales'])['Sales_sum'].sort_values(ascending=False)
+
+
+def rentabilidad_por_mercado(df):
+    """
+    Devuelve el beneficio total de cada mercado a partir del cubo de ventas (`mercados_rentabilidad`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las columnas "Market" y "Profit".
+
+    Retorno:
+    pd.Series: Beneficio total por mercado.
+    """
+
+    return enrollar(obtener_cubo(df), 'Market', ['Profit'])['Profit_sum']
+
+
+def medias_con_error(df, por, medidas, errorbar=('ci', 95)):
+    """
+    Devuelve las medias por grupo y la semiamplitud analítica de sus barras de error.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las columnas `por` y `medidas`.
+    por (list): Dimensiones del cubo, por ejemplo ['Market', 'Segment'].
+    medidas (list): Medidas a promediar, por ejemplo ['Sales', 'Profit'].
+    errorbar (str, tuple o None, opcional): Tipo de barra de error (ver `semiamplitud_error`); con None
+                                            no se añaden las columnas de error.
+
+    Retorno:
+    pd.DataFrame: Una fila por grupo con las columnas `por`, cada medida y, si hay errorbar, '<medida>_error'.
+    """
+
+    agregado = enrollar(obtener_cubo(df), por, medidas)
+    medias = {m: agregado[f'{m}_mean'] for m in medidas}
+    if errorbar is not None:
+        medias.update({f'{m}_error': semiamplitud_error(agregado, m, errorbar) for m in medidas})
+    return pd.DataFrame(medias).reset_index()
+
+
+def tiempo_envio_mercado(df):
+    """
+    Devuelve el tiempo medio de envío en días de cada mercado a partir del cubo de ventas (`tiempo_envio`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las columnas "Order_Date", "Ship_Date" y "Market".
+
+    Retorno:
+    pd.DataFrame: Columnas "Market" y "Shipping_Time".
+    """
+
+    medias = enrollar(obtener_cubo(df), 'Market', ['Delivery_Days'])['Delivery_Days_mean']
+    return medias.rename('Shipping_Time').reset_index()
+
+
+def eficiencia_envio(df):
+    """
+    Devuelve el tiempo de entrega, el coste de envío y el beneficio medios de cada método de envío
+    (`eficiencia_metodos_envio`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las columnas 'Order_Date', 'Ship_Date', 'Shipping_Cost', 'Profit' y 'Ship_Mode'.
+
+    Retorno:
+    pd.DataFrame: Columnas 'Ship_Mode', 'Avg_Delivery_Time', 'Avg_Shipping_Cost' y 'Avg_Profit'.
+    """
+
+    envio_stats = enrollar(obtener_cubo(df), "Ship_Mode", ['Delivery_Days', 'Shipping_Cost', 'Profit'])
+    return pd.DataFrame({
+        'Avg_Delivery_Time': envio_stats['Delivery_Days_mean'],
+        'Avg_Shipping_Cost': envio_stats['Shipping_Cost_mean'],
+        'Avg_Profit': envio_stats['Profit_mean']
+    }).reset_index()
+
+
+def evolucion(df, granularidad='M', medida='Sales', por=None, ventana=None):
+    """
+    Devuelve la serie temporal pre-agregada de una medida (`evolucion_ventas`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las columnas "Order_Date" y la medida.
+    granularidad (str, opcional): 'D' (día), 'W' (semana), 'M' (mes) o 'Q' (trimestre) (por defecto 'M').
+    medida (str, opcional): 'Sales', 'Profit', 'Quantity' o 'Shipping_Cost' (por defecto 'Sales').
+    por (str, opcional): Dimensión por la que separar la serie: 'Market', 'Segment' o 'Category' (por defecto ninguna).
+    ventana (int, opcional): Si se indica, devuelve la media móvil de ese número de periodos en lugar de la serie.
+
+    Retorno:
+    pd.Series o pd.DataFrame: Serie por periodo (una columna por grupo si se indica `por`).
+    """
+
+    serie = obtener_series(df).serie(granularidad, medida, por)
+    return media_movil(serie, ventana) if ventana else serie
+
+
+def tendencias(df, y='Profit', x=VARIABLES_PROFIT):
+    """
+    Devuelve las rectas de regresión de los gráficos de dispersión (pendiente, R², errores...).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las columnas `y` y `x`.
+    y (str, opcional): Variable dependiente (por defecto 'Profit').
+    x (list, opcional): Variables independientes (por defecto `VARIABLES_PROFIT`).
+
+    Retorno:
+    pd.DataFrame: Una fila por variable independiente (ver `sp_regresion.ajustar_regresiones`).
+    """
+
+    return obtener_regresiones(df, y=y, x=x)
+
+
+def correlaciones(df, metodo='pearson', por=None):
+    """
+    Devuelve la matriz de correlación de las variables numéricas (`correlaciones_heatmap`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las variables numéricas.
+    metodo (str, opcional): 'pearson' o 'spearman' (por defecto 'pearson').
+    por (str, opcional): Columna por la que calcular una matriz por grupo (por defecto ninguna).
+
+    Retorno:
+    pd.DataFrame: Matriz de correlación (con el grupo como primer nivel del índice si se indica `por`).
+    """
+
+    return obtener_correlaciones(df, metodo=metodo, por=por)
+
+
+def frecuencias(df, columnas=None, top_n=None):
+    """
+    Devuelve el recuento de valores de cada columna categórica (`subplot_col_cat`, `distribucion_prioridad_envio`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a analizar.
+    columnas (list, opcional): Columnas a contar (por defecto todas las categóricas).
+    top_n (int, opcional): Si se indica, devuelve solo los `top_n` valores más frecuentes.
+
+    Retorno:
+    dict: Nombre de columna -> pd.Series con los recuentos, de mayor a menor.
+    """
+
+    columnas = columnas_categoricas(df) if columnas is None else columnas
+    resultado = {}
+    for col in columnas:
+        recuentos = df[col].value_counts()
+        resultado[col] = recuentos if top_n is None else recuentos.nlargest(top_n)
+    return resultado
+
+
+def porcentaje_nulos(df):
+    """
+    Devuelve el porcentaje de valores nulos de cada columna numérica (`boxplot_con_nulos`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a analizar.
+
+    Retorno:
+    pd.Series: Porcentaje de nulos por columna numérica.
+    """
+
+    numericas = df.select_dtypes(include=['number'])
+    return numericas.isnull().mean() * 100
+
+
+# Instrumentación opcional (variable de entorno SP_INSTRUMENTACION)
+instrumentar_si_activado(__name__)
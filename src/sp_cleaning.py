@@ -1,8 +1,17 @@
+import json
+
 import pandas as pd
 import numpy as np
 
+from . import sp_cache
+from .sp_duplicados import CLAVE_PEDIDO, contar_duplicados
+from .sp_instrumentacion import instrumentar_si_activado
+from .sp_perfil import perfilar, mostrar_tabla
+from .sp_sketch import bosquejar
+from .sp_tipos import es_arrow, a_arrow
+
 
-def eda_preliminar(df):
+def eda_preliminar(df, clave_duplicados=CLAVE_PEDIDO):
     """
     Realiza un análisis exploratorio preliminar de un DataFrame.
 
@@ -10,55 +19,72 @@ def eda_preliminar(df):
     porcentaje de valores nulos por columna, número de filas duplicadas y 
     recuento de valores para las columnas categóricas.
 
+    Los nulos, duplicados y recuentos se toman del perfil del DataFrame (`perfilar`),
+    que se calcula una sola vez y queda en caché (`sp_cache`).
+
     Parámetros:
     df (pd.DataFrame): DataFrame a analizar.
+    clave_duplicados (list, opcional): Columnas que identifican una fila (por defecto `CLAVE_PEDIDO`).
+                                       Los duplicados se cuentan solo sobre la clave (`contar_duplicados`).
+                                       Si el DataFrame no tiene todas sus columnas (por ejemplo, antes de
+                                       renombrarlas) o se indica None, se comparan todas las columnas.
 
     Retorno:
     None
     """
 
-    display(df.sample(4))
+    perfil = perfilar(df)
+
+    mostrar_tabla(df.sample(4))
     
     print('-------------------------------------')
 
     print('INFO')
 
-    display (df.info()) 
+    df.info()
 
     print('-------------------------------------')
 
     print('NULOS')
 
-    display (round(df.isnull().sum()/df.shape[0] *100, 2))
+    mostrar_tabla(round(perfil.porcentaje_nulos, 2))
 
     print('-------------------------------------')
 
     print('DUPLICADOS')
 
-    display (df.duplicated().sum())    
+    if clave_duplicados is None or not set(clave_duplicados).issubset(df.columns):
+        mostrar_tabla(perfil.duplicados)
+    else:
+        mostrar_tabla(contar_duplicados(df, clave_duplicados))
 
     print('-------------------------------------')
 
     print('VALUE COUNTS')
 
-    for col in df.select_dtypes (include='O').columns:    
-        print (df[col].value_counts())                 
+    for col in perfil.columnas_categoricas:    
+        print (perfil.frecuencias[col])                 
         print('------------------------------------')
 
 
 
-def convertir_col(df):
+def convertir_col(df, compactar=False, arrow=False):
     """
     Convierte columnas específicas de un DataFrame a tipos de datos adecuados.
 
     - Convierte las columnas de fecha ("Order_Date" y "Ship_Date") a tipo datetime.
     - Convierte columnas económicas a valores numéricos.
+    - Opcionalmente, compacta el DataFrame en memoria con `compactar_df`.
+    - Opcionalmente, pasa las columnas de texto y numéricas a tipos de Arrow (`sp_tipos.a_arrow`).
 
     Parámetros:
     df (pd.DataFrame): DataFrame con las columnas a convertir.
+    compactar (bool, opcional): Si es True, convierte a categoría las columnas de texto de baja
+                                cardinalidad y reduce los tipos numéricos (por defecto False).
+    arrow (bool, opcional): Si es True, guarda el texto y los numéricos en memoria de Arrow (por defecto False).
 
     Retorno:
-    None 
+    None (dict con los bytes antes y después si compactar=True)
     """
 
     # Convertir fechas
@@ -73,6 +99,184 @@ def convertir_col(df):
     if cols_to_convert:
         df[cols_to_convert] = df[cols_to_convert].apply(pd.to_numeric, errors='coerce')
 
+    if arrow:
+        convertido = a_arrow(df)
+        for col in df.columns:
+            if convertido[col].dtype != df[col].dtype:
+                df[col] = convertido[col]
+
+    sp_cache.invalidar(df)
+
+    if compactar:
+        return compactar_df(df)
+
+
+def compactar_df(df, max_cardinalidad=0.5, reducir_float=False, verbose=True):
+    """
+    Reduce la memoria de un DataFrame cambiando el tipo de sus columnas.
+
+    - Convierte a categoría las columnas de texto cuya proporción de valores únicos no supera
+      `max_cardinalidad` (mercados, segmentos, categorías, países, IDs...).
+    - Reduce las columnas enteras al tipo más pequeño que admite sus valores (por ejemplo, "Year"
+      a int16 y "Month" a int8).
+    - Opcionalmente reduce las columnas decimales a float32 (puede perder precisión).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a compactar.
+    max_cardinalidad (float, opcional): Proporción máxima de valores únicos sobre el número de filas
+                                        para convertir una columna a categoría (por defecto 0.5).
+    reducir_float (bool, opcional): Si es True, reduce también las columnas decimales (por defecto False).
+    verbose (bool, opcional): Si es True, muestra los bytes antes y después (por defecto True).
+
+    Retorno:
+    dict: Bytes antes ('antes') y después ('despues') de compactar y el factor de reducción ('reduccion')
+    (las columnas se modifican directamente en el DataFrame original).
+    """
+
+    antes = int(df.memory_usage(deep=True).sum())
+    n_filas = max(df.shape[0], 1)
+
+    # Texto de baja cardinalidad a categoría
+    for col in df.select_dtypes(include=['object', 'string']).columns:
+        if df[col].nunique() / n_filas <= max_cardinalidad:
+            df[col] = df[col].astype('category')
+
+    # Reducir numéricos sin perder información
+    for col in df.select_dtypes(include=['integer']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+
+    if reducir_float:
+        for col in df.select_dtypes(include=['floating']).columns:
+            df[col] = pd.to_numeric(df[col], downcast='float')
+
+    sp_cache.invalidar(df)
+
+    despues = int(df.memory_usage(deep=True).sum())
+    informe = {'antes': antes, 'despues': despues, 'reduccion': round(antes / despues, 2) if despues else None}
+
+    if verbose:
+        print(f'Memoria antes: {antes / 1024**2:.2f} MB, después: {despues / 1024**2:.2f} MB '
+              f'(x{informe["reduccion"]} menos)')
+    return informe
+
+
+# Nombres de países de Superstore corregidos para que coincidan con los del Banco Mundial
+COUNTRY_CORRECTIONS = {
+    'Macedonia': 'North Macedonia',
+    'Venezuela': 'Venezuela, RB',
+    'South Korea': 'Korea, Rep.',
+    'Democratic Republic of the Congo': 'Congo, Dem. Rep.',
+    'Republic of the Congo': 'Congo, Rep.',
+    'Kyrgyzstan': 'Kyrgyz Republic',
+    'Swaziland' : 'Eswatini',
+    'Russia': 'Russian Federation',
+    'Hong Kong': 'Hong Kong SAR, China',
+    'Egypt': 'Egypt, Arab Rep.',
+    'Czech Republic': 'Czechia',
+    'Iran': 'Iran, Islamic Rep.',
+    'Turkey': 'Turkiye',
+    'Yemen': 'Yemen, Rep.',
+    'Myanmar (Burma)': 'Myanmar',
+    'Syria': 'Syrian Arab Republic',
+    'Slovakia': 'Slovak Republic',
+    'Vietnam': 'Viet Nam'
+}
+
+# Países sin coincidencia en el dataset de indicadores
+PAISES_A_ELIMINAR = ["Guadeloupe", "Taiwan", "Martinique"]
+
+# Columnas de indicadores macroeconómicos del Banco Mundial
+COLUMNAS_INDICADORES = ["Inflation(%)", "Exports_GDP(%)", "Imports_GDP(%)", "GDP_Growth(%)"]
+
+# Columnas del dataset unificado que no se usan en el análisis
+COLUMNAS_A_ELIMINAR = ["记录数", "Market", "Customer.Name", "Region", "Row.ID", "Time Code", "Country Code"]
+
+
+def renombrar_indicadores(df_ind):
+    """
+    Prepara el dataset de indicadores del Banco Mundial para unirlo con Superstore.
+
+    - Renombra las columnas de país, año e indicadores.
+    - Elimina las filas de notas al pie del fichero (sin año numérico).
+    - Convierte los indicadores a numéricos (el Banco Mundial marca los valores que faltan con '..').
+
+    Parámetros:
+    df_ind (pd.DataFrame): DataFrame leído de indicators.xlsx.
+
+    Retorno:
+    pd.DataFrame: DataFrame de indicadores con las columnas renombradas.
+    """
+
+    df_ind = df_ind.rename(columns={"Country Name": "Country", "Time": "Year",
+                           "Inflation, consumer prices (annual %) [FP.CPI.TOTL.ZG]": "Inflation(%)",
+                            "Exports of goods and services (% of GDP) [NE.EXP.GNFS.ZS]": "Exports_GDP(%)",
+                            "Imports of goods and services (% of GDP) [NE.IMP.GNFS.ZS]": "Imports_GDP(%)",
+                            "GDP per capita growth (annual %) [NY.GDP.PCAP.KD.ZG]": "GDP_Growth(%)"})
+
+    years = pd.to_numeric(df_ind["Year"], errors='coerce')
+    df_ind = df_ind[years.notna()].copy()
+    df_ind["Year"] = years[years.notna()].astype(int)
+
+    indicadores = [col for col in COLUMNAS_INDICADORES if col in df_ind.columns]
+    df_ind[indicadores] = df_ind[indicadores].apply(pd.to_numeric, errors='coerce')
+    return df_ind
+
+
+def unir_indicadores(df_sup, df_ind):
+    """
+    Une el dataset de Superstore con el de indicadores por país y año (left join).
+
+    - Corrige los nombres de países según `COUNTRY_CORRECTIONS`.
+    - Elimina los países sin coincidencia en el dataset de indicadores (`PAISES_A_ELIMINAR`).
+
+    Parámetros:
+    df_sup (pd.DataFrame): DataFrame de Superstore (o un bloque del mismo).
+    df_ind (pd.DataFrame): DataFrame de indicadores ya renombrado con `renombrar_indicadores`.
+
+    Retorno:
+    pd.DataFrame: DataFrame unificado.
+    """
+
+    df_sup = df_sup.assign(Country=df_sup['Country'].replace(COUNTRY_CORRECTIONS))
+    df = pd.merge(df_sup, df_ind, on=['Country', 'Year'], how='left')
+    df = df[~df["Country"].isin(PAISES_A_ELIMINAR)]
+    return df.assign(Year=df['Year'].astype(int))
+
+
+def limpiar_columnas(df):
+    """
+    Elimina las columnas innecesarias del dataset unificado y normaliza sus nombres.
+
+    - Elimina las columnas de `COLUMNAS_A_ELIMINAR`.
+    - Sustituye los puntos de los nombres por guiones bajos y renombra "Market2" y "weeknum".
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame unificado.
+
+    Retorno:
+    pd.DataFrame: DataFrame con las columnas limpias.
+    """
+
+    df = df.drop(columns=COLUMNAS_A_ELIMINAR, errors='ignore')
+    df.columns = df.columns.str.replace(".", "_", regex=False)
+    return df.rename(columns={'Market2': 'Market', 'weeknum': 'Weeknum'})
+
+
+def agregar_columnas_fecha(df):
+    """
+    Genera las columnas "Month" y "Quarter" a partir de "Order_Date".
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con la columna "Order_Date" ya convertida a datetime.
+
+    Retorno:
+    None (las columnas se añaden directamente en el DataFrame original).
+    """
+
+    df['Month']= df['Order_Date'].dt.month
+    df['Quarter']= df['Order_Date'].dt.quarter
+    sp_cache.invalidar(df)
+
 
 def calcular_nulos (df):
     """
@@ -86,12 +290,11 @@ def calcular_nulos (df):
            y la segunda con el porcentaje de valores nulos por columna.
     """
 
-    numero_nulos= df.isnull().sum()
-    porcentaje_nulos= (df.isnull().sum()/df.shape[0]) *100
-    return numero_nulos, porcentaje_nulos
+    perfil = perfilar(df)
+    return perfil.nulos, perfil.porcentaje_nulos
 
 
-def analisis_general_cat(df):
+def analisis_general_cat(df, aproximado=False):
     """
     Realiza un análisis general de las columnas categóricas de un DataFrame.
 
@@ -102,23 +305,28 @@ def analisis_general_cat(df):
 
     Parámetros:
     df (pd.DataFrame): DataFrame a analizar.
+    aproximado (bool, opcional): Si es True, usa bocetos de memoria acotada (`sp_sketch`): número de valores
+                                 únicos estimado y distribución de los valores más frecuentes (por defecto False).
 
     Retorno:
     None.
     """
 
-    col_cat=df.select_dtypes(include='O').columns 
+    resumen = bosquejar(df) if aproximado else perfilar(df)
+    col_cat = resumen.columnas_categoricas
 
     if len (col_cat) == 0:
         print ('No hay columnas categoricas')
 
     else:
         for col in col_cat:
+            # unique() cuenta también el nulo como valor
+            n_unicos = resumen.cardinalidad[col] + int(resumen.nulos[col] > 0)
             print(f'La distribución de la columna {col.upper()}')
-            print(f'Esta columna tiene {len(df[col].unique())} valores únicos')
-            display(df[col].value_counts(normalize=True))
+            print(f'Esta columna tiene {"aproximadamente " if aproximado else ""}{n_unicos} valores únicos')
+            mostrar_tabla(resumen.proporciones(col))
             print('--------------------\n Describe')
-            display(df[col].describe())
+            mostrar_tabla(resumen.describir_cat(col))
             print('--------------------')
 
 
@@ -126,7 +334,7 @@ def contar_outliers(df):
     """
     Cuenta los outliers en cada columna numérica de un DataFrame usando el método del rango intercuartílico (IQR).
 
-    - Calcula los cuartiles Q1 y Q3 de cada columna numérica.
+    - Calcula los cuartiles Q1 y Q3 de todas las columnas numéricas en una sola llamada (`RecortadorOutliers`).
     - Determina los límites inferior y superior para detectar outliers.
     - Cuenta y muestra el número y porcentaje de outliers por columna.
 
@@ -134,25 +342,22 @@ def contar_outliers(df):
     df (pd.DataFrame): DataFrame a analizar.
 
     Retorno:
-    None (los resultados se muestran y se almacenan en un diccionario).
+    dict: Número ('count') y porcentaje ('percentage') de outliers por columna.
     """
 
     numeric_cols = df.select_dtypes(include=['number']).columns
+    conteo = RecortadorOutliers().fit(df, numeric_cols).contar(df)
     outlier_counts = {}
 
-    for col in numeric_cols:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-
-        outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)].shape[0]
-        percentage = round(outliers / df.shape[0] * 100, 2)
+    for col, fila in conteo.iterrows():
+        outliers = int(fila['count'])
+        percentage = round(fila['percentage'], 2)
 
         outlier_counts[col] = {'count': outliers, 'percentage': percentage}
         print(f'Para la columna {col.upper()} tenemos {outliers} outliers, lo que representa un {percentage}% de los datos.')
 
+    return outlier_counts
+
 
 def columnas_con_nulos(df, umbral=10):
     """
@@ -172,16 +377,9 @@ def columnas_con_nulos(df, umbral=10):
            la segunda con las que tienen nulos pero están por debajo del umbral.
     """
 
-    columns_with_nulls= df.columns[df.isnull().any()]
-
-    null_columns_info= pd.DataFrame(
-        {'Column': columns_with_nulls,
-         'Datatype': [df[col].dtype for col in columns_with_nulls],
-         'NullCount': [df[col].isnull().sum() for col in columns_with_nulls],
-         'Null%': [((df[col].isnull().sum()/ df.shape[0])*100) for col in columns_with_nulls]}
-         )
+    null_columns_info= perfilar(df).info_nulos()
 
-    display(null_columns_info)
+    mostrar_tabla(null_columns_info)
     high_null_cols = null_columns_info[null_columns_info['Null%'] > umbral]['Column'].tolist()
     low_null_cols = null_columns_info[null_columns_info['Null%'] <= umbral]['Column'].tolist()
 
@@ -192,7 +390,7 @@ def ajustar_outliers(df, columnas_a_ajustar):
     """
     Ajusta los outliers de las columnas numéricas especificadas utilizando el método del rango intercuartílico (IQR).
 
-    - Calcula los cuartiles Q1 y Q3 de cada columna.
+    - Calcula los cuartiles Q1 y Q3 de todas las columnas en una sola llamada.
     - Determina los límites inferior y superior para detectar outliers.
     - Recorta los valores que están fuera de estos límites, reemplazándolos por el valor más cercano dentro del rango permitido.
 
@@ -201,15 +399,310 @@ def ajustar_outliers(df, columnas_a_ajustar):
     columnas_a_ajustar (list): Lista de nombres de columnas numéricas en las que se ajustarán los outliers.
 
     Retorno:
-    None (los valores se modifican directamente en el DataFrame original).
+    RecortadorOutliers: Recortador ajustado, reutilizable para recortar nuevos lotes con los mismos límites
+    (los valores se modifican directamente en el DataFrame original).
     """
-    
-    for col in columnas_a_ajustar:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
+
+    recortador = RecortadorOutliers().fit(df, columnas_a_ajustar)
+    recortador.transform(df, inplace=True)
+    return recortador
+
+
+class RecortadorOutliers:
+    """
+    Recortador de outliers por el método del rango intercuartílico (IQR) con ajuste y transformación separados.
+
+    - `fit` calcula los cuartiles de todas las columnas en una sola llamada vectorizada y guarda los límites.
+    - `transform` recorta un DataFrame (por ejemplo, un lote diario nuevo) con los límites ya calculados.
+    - `guardar` y `cargar` persisten los límites en un fichero JSON.
+
+    Parámetros:
+    factor (float, opcional): Múltiplo del IQR usado para los límites (por defecto 1.5).
+    """
+
+    def __init__(self, factor=1.5):
+        self.factor = factor
+        self.limites = None
+
+    def __repr__(self):
+        columnas = [] if self.limites is None else list(self.limites.index)
+        return f'RecortadorOutliers(factor={self.factor}, columnas={columnas})'
+
+    def fit(self, df, columnas):
+        """
+        Calcula los límites inferior y superior de cada columna.
+
+        Parámetros:
+        df (pd.DataFrame): DataFrame de referencia.
+        columnas (list): Columnas numéricas para las que se calculan los límites.
+
+        Retorno:
+        RecortadorOutliers: El propio recortador.
+        """
+
+        cuartiles = df[list(columnas)].quantile([0.25, 0.75])
+        Q1 = cuartiles.loc[0.25]
+        Q3 = cuartiles.loc[0.75]
         IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
 
-        df[col] = df[col].clip(lower=lower_bound, upper=upper_bound) 
+        self.limites = pd.DataFrame({'lower': Q1 - self.factor * IQR,
+                                     'upper': Q3 + self.factor * IQR})
+        return self
+
+    def _comprobar_ajuste(self):
+        if self.limites is None:
+            raise ValueError('El recortador no está ajustado. Usar fit() o cargar() antes.')
+
+    def contar(self, df):
+        """
+        Cuenta los valores fuera de los límites en cada columna.
+
+        Parámetros:
+        df (pd.DataFrame): DataFrame a analizar.
+
+        Retorno:
+        pd.DataFrame: Número ('count') y porcentaje ('percentage') de outliers por columna.
+        """
+
+        self._comprobar_ajuste()
+        cols = self.limites.index
+        fuera = df[cols].lt(self.limites['lower']) | df[cols].gt(self.limites['upper'])
+        conteo = fuera.sum()
+
+        return pd.DataFrame({'count': conteo,
+                             'percentage': conteo / df.shape[0] * 100 if df.shape[0] else conteo * 0.0})
+
+    def transform(self, df, inplace=False):
+        """
+        Recorta los valores fuera de los límites ajustados.
+
+        Parámetros:
+        df (pd.DataFrame): DataFrame a recortar.
+        inplace (bool, opcional): Si es True, modifica el DataFrame original (por defecto False).
+
+        Retorno:
+        pd.DataFrame: DataFrame recortado (None si inplace=True).
+        """
+
+        self._comprobar_ajuste()
+        cols = list(self.limites.index)
+        datos = df[cols]
+
+        # Los enteros de Arrow no admiten límites decimales: se recortan como decimales, igual que en NumPy
+        enteros = [col for col in cols if es_arrow(datos[col]) and pd.api.types.is_integer_dtype(datos[col])]
+        if enteros:
+            datos = datos.astype({col: 'double[pyarrow]' for col in enteros})
+
+        recortado = datos.clip(lower=self.limites['lower'], upper=self.limites['upper'], axis=1)
+
+        if inplace:
+            df[cols] = recortado
+            sp_cache.invalidar(df)
+            return None
+
+        df = df.copy()
+        df[cols] = recortado
+        return df
+
+    def fit_transform(self, df, columnas, inplace=False):
+        """
+        Ajusta los límites y recorta el mismo DataFrame.
+        """
+
+        return self.fit(df, columnas).transform(df, inplace=inplace)
+
+    def guardar(self, ruta):
+        """
+        Guarda los límites ajustados en un fichero JSON.
+
+        Parámetros:
+        ruta (str): Ruta del fichero JSON.
+        """
+
+        self._comprobar_ajuste()
+        datos = {'factor': self.factor,
+                 'limites': {col: {'lower': float(fila['lower']), 'upper': float(fila['upper'])}
+                             for col, fila in self.limites.iterrows()}}
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """
+        Crea un recortador a partir de los límites guardados con `guardar`.
+
+        Parámetros:
+        ruta (str): Ruta del fichero JSON.
+
+        Retorno:
+        RecortadorOutliers: Recortador listo para usar con `transform`.
+        """
+
+        with open(ruta, encoding='utf-8') as f:
+            datos = json.load(f)
+
+        recortador = cls(factor=datos['factor'])
+        recortador.limites = pd.DataFrame.from_dict(datos['limites'], orient='index')[['lower', 'upper']]
+        return recortador
+
+
+
+# Grupos en los que se buscan las medianas, del más específico al más general. Los indicadores son
+# anuales por país, así que si faltan para un país y año se usa el país en otros años y después su mercado
+GRUPOS_IMPUTACION = [['Country', 'Year'], ['Country'], ['Market', 'Year'], ['Market']]
+
+
+class ImputadorAgrupado:
+    """
+    Imputador de nulos por la mediana de cada grupo, con ajuste y transformación separados.
+
+    - `fit` calcula, con un groupby vectorizado por nivel, las medianas de cada grupo de `GRUPOS_IMPUTACION`
+      y la mediana global, y las guarda.
+    - `transform` rellena un DataFrame (por ejemplo, un lote mensual nuevo) buscando por índice la mediana de
+      su grupo: primero en el nivel más específico y, si no existe o es nula, en el siguiente, hasta la global.
+    - Cada `transform` deja en `informe` cuántos nulos había por columna y cuántos se rellenaron en cada nivel.
+    - `guardar` y `cargar` persisten las medianas en un fichero JSON.
+
+    Parámetros:
+    grupos (list, opcional): Niveles de agrupación, cada uno una lista de columnas (por defecto `GRUPOS_IMPUTACION`).
+                             Los niveles con columnas que no están en el DataFrame de `fit` se ignoran.
+    """
 
+    def __init__(self, grupos=GRUPOS_IMPUTACION):
+        self.grupos = [list(grupo) for grupo in grupos]
+        self.medianas = None
+        self.mediana_global = None
+        self.informe = None
+
+    def __repr__(self):
+        columnas = [] if self.mediana_global is None else list(self.mediana_global.index)
+        return f'ImputadorAgrupado(grupos={self.grupos}, columnas={columnas})'
+
+    def fit(self, df, columnas=COLUMNAS_INDICADORES):
+        """
+        Calcula las medianas de cada grupo y la mediana global de cada columna.
+
+        Parámetros:
+        df (pd.DataFrame): DataFrame de referencia (por ejemplo, el histórico).
+        columnas (list, opcional): Columnas a imputar (por defecto `COLUMNAS_INDICADORES`).
+
+        Retorno:
+        ImputadorAgrupado: El propio imputador.
+        """
+
+        columnas = [col for col in columnas if col in df.columns]
+        self.grupos = [grupo for grupo in self.grupos if all(col in df.columns for col in grupo)]
+        self.medianas = [df.groupby(grupo, observed=True)[columnas].median().dropna(how='all')
+                         for grupo in self.grupos]
+        self.mediana_global = df[columnas].median()
+        return self
+
+    def _comprobar_ajuste(self):
+        if self.mediana_global is None:
+            raise ValueError('El imputador no está ajustado. Usar fit() o cargar() antes.')
+
+    def transform(self, df, inplace=False, verbose=False):
+        """
+        Rellena los nulos con la mediana del grupo más específico disponible.
+
+        Parámetros:
+        df (pd.DataFrame): DataFrame a imputar, con las columnas de los grupos.
+        inplace (bool, opcional): Si es True, modifica el DataFrame original (por defecto False).
+        verbose (bool, opcional): Si es True, muestra el informe de nulos rellenados (por defecto False).
+
+        Retorno:
+        pd.DataFrame: DataFrame imputado (None si inplace=True).
+        """
+
+        self._comprobar_ajuste()
+        cols = list(self.mediana_global.index)
+        valores = df[cols].copy()
+        informe = pd.DataFrame({'nulos': valores.isnull().sum()})
+
+        for grupo, medianas in zip(self.grupos, self.medianas):
+            filas = valores.isnull().any(axis=1)
+            nombre = '+'.join(grupo)
+            if not filas.any():
+                informe[nombre] = 0
+                continue
+
+            # Búsqueda de la mediana de cada fila con nulos en la tabla del grupo
+            claves = df.loc[filas, grupo]
+            claves = pd.Index(claves[grupo[0]]) if len(grupo) == 1 else pd.MultiIndex.from_frame(claves)
+            encontradas = medianas.reindex(claves).set_axis(valores.index[filas])
+
+            antes = valores.isnull().sum()
+            valores.loc[filas] = valores.loc[filas].fillna(encontradas)
+            informe[nombre] = antes - valores.isnull().sum()
+
+        antes = valores.isnull().sum()
+        valores = valores.fillna(self.mediana_global)
+        informe['global'] = antes - valores.isnull().sum()
+        informe['restantes'] = valores.isnull().sum()
+        self.informe = informe.astype('int64')
+
+        if verbose:
+            print('Nulos rellenados por nivel de agrupación:')
+            mostrar_tabla(self.informe)
+
+        if inplace:
+            df[cols] = valores
+            sp_cache.invalidar(df)
+            return None
+
+        df = df.copy()
+        df[cols] = valores
+        return df
+
+    def fit_transform(self, df, columnas=COLUMNAS_INDICADORES, inplace=False, verbose=False):
+        """
+        Ajusta las medianas e imputa el mismo DataFrame.
+        """
+
+        return self.fit(df, columnas).transform(df, inplace=inplace, verbose=verbose)
+
+    def guardar(self, ruta):
+        """
+        Guarda las medianas ajustadas en un fichero JSON.
+
+        Parámetros:
+        ruta (str): Ruta del fichero JSON.
+        """
+
+        self._comprobar_ajuste()
+        medianas = []
+        for tabla in self.medianas:
+            tabla = tabla.reset_index().astype(object)
+            medianas.append(tabla.where(tabla.notna(), None).to_dict(orient='records'))
+
+        datos = {'grupos': self.grupos,
+                 'global': {col: float(valor) for col, valor in self.mediana_global.items()},
+                 'medianas': medianas}
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """
+        Crea un imputador a partir de las medianas guardadas con `guardar`.
+
+        Parámetros:
+        ruta (str): Ruta del fichero JSON.
+
+        Retorno:
+        ImputadorAgrupado: Imputador listo para usar con `transform`.
+        """
+
+        with open(ruta, encoding='utf-8') as f:
+            datos = json.load(f)
+
+        imputador = cls(grupos=datos['grupos'])
+        imputador.mediana_global = pd.Series(datos['global'], dtype='float64')
+        columnas = list(imputador.mediana_global.index)
+        imputador.medianas = [pd.DataFrame.from_records(filas, columns=grupo + columnas).set_index(grupo)
+                              .astype('float64') for grupo, filas in zip(imputador.grupos, datos['medianas'])]
+        return imputador
+
+
+# Instrumentación opcional (variable de entorno SP_INSTRUMENTACION)
+instrumentar_si_activado(__name__)
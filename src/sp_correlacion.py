@@ -0,0 +1,304 @@
+import pandas as pd
+import numpy as np
+
+from . import sp_cache
+
+
+# Columnas numéricas de calendario, sin sentido en una matriz de correlación (notebook 4)
+COLUMNAS_EXCLUIDAS = ['Year', 'Weeknum', 'Month', 'Quarter']
+
+METODOS = ('pearson', 'spearman')
+
+
+def columnas_correlacion(df, excluir=COLUMNAS_EXCLUIDAS):
+    """
+    Devuelve las columnas numéricas a correlacionar, sin las columnas de calendario.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a analizar.
+    excluir (list, opcional): Columnas a excluir (por defecto `COLUMNAS_EXCLUIDAS`).
+
+    Retorno:
+    list: Nombres de las columnas.
+    """
+
+    return [col for col in df.select_dtypes(include=['number']).columns if col not in excluir]
+
+
+def _momentos(X):
+    """
+    Calcula los momentos por pares de un bloque de valores (filas × variables, con NaN).
+
+    Para cada par de variables (i, j) se usan solo las filas en que ambas tienen valor, igual que
+    `DataFrame.corr`. Devuelve el número de filas del par, la media de la variable i en ellas, la
+    suma de productos de las desviaciones (co-momento) y la suma de cuadrados de las desviaciones de i.
+    """
+
+    N, k = X.shape
+    nulos = np.isnan(X)
+    cuenta = N - nulos.sum(axis=0)
+
+    # Centrar en la media del bloque reduce la cancelación numérica; los nulos pasan a valer 0
+    centro = np.where(cuenta > 0, np.nansum(X, axis=0) / np.maximum(cuenta, 1), 0.0)
+    X0 = X - centro
+    X0[nulos] = 0.0
+    cuadrados = X0 * X0
+
+    # Si j no tiene nulos, el par (i, j) usa todas las filas válidas de i: la suma de sus
+    # desviaciones es 0 por el centrado. Solo las columnas con nulos necesitan máscaras.
+    n = np.minimum.outer(cuenta, cuenta).astype(float)
+    suma = np.zeros((k, k))
+    suma_cuad = np.repeat(cuadrados.sum(axis=0)[:, None], k, axis=1)
+
+    con_nulos = np.flatnonzero(cuenta < N)
+    if len(con_nulos):
+        M = (~nulos[:, con_nulos]).astype(float)
+        n[:, con_nulos] = (~nulos).astype(float).T @ M
+        n[con_nulos, :] = n[:, con_nulos].T
+        suma[:, con_nulos] = X0.T @ M
+        suma_cuad[:, con_nulos] = cuadrados.T @ M
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.where(n > 0, suma / n, 0.0)
+    comomento = X0.T @ X0 - n * media * media.T
+    m2 = (suma_cuad - n * media ** 2).clip(min=0)
+
+    return n, media + centro[:, None], comomento, m2
+
+
+class AcumuladorCovarianza:
+    """
+    Acumulador fusionable de covarianzas por pares, opcionalmente por grupo.
+
+    Mantiene, para cada grupo y par de variables, el número de filas, las medias, el co-momento y
+    las sumas de cuadrados, que se combinan de forma exacta entre bloques (método de Chan et al.).
+    La memoria depende del número de grupos y de variables, no del número de filas.
+
+    Dos acumuladores calculados por separado (por ejemplo, en procesos distintos) se combinan
+    con `fusionar`.
+
+    Parámetros:
+    columnas (list, opcional): Variables a correlacionar (por defecto `columnas_correlacion` del primer bloque).
+    por (str o list, opcional): Columna o columnas que definen los grupos (por ejemplo, 'Market').
+    """
+
+    def __init__(self, columnas=None, por=None):
+        self.columnas = None if columnas is None else list(columnas)
+        self.por = [por] if isinstance(por, str) else (list(por) if por is not None else [])
+        self.grupos = {}
+
+    def __repr__(self):
+        return f'AcumuladorCovarianza(columnas={self.columnas}, por={self.por}, grupos={len(self.grupos)})'
+
+    def actualizar(self, bloque):
+        """
+        Añade un bloque de filas al acumulador, calculando todos los grupos en una sola pasada.
+
+        Parámetros:
+        bloque (pd.DataFrame): Bloque de datos a acumular.
+
+        Retorno:
+        AcumuladorCovarianza: El propio acumulador.
+        """
+
+        if self.columnas is None:
+            self.columnas = columnas_correlacion(bloque.drop(columns=self.por))
+
+        X = bloque[self.columnas].to_numpy(dtype=float, na_value=np.nan)
+        otro = AcumuladorCovarianza(self.columnas, self.por)
+
+        if not self.por:
+            otro.grupos[()] = _momentos(X)
+            return self.fusionar(otro)
+
+        if len(self.por) == 1:
+            codigos, claves = pd.factorize(bloque[self.por[0]])
+        else:
+            codigos, claves = pd.MultiIndex.from_frame(bloque[self.por]).factorize()
+        orden = np.argsort(codigos, kind='stable')
+        limites = np.searchsorted(codigos[orden], np.arange(len(claves) + 1))
+        for g, clave in enumerate(claves):
+            filas = orden[limites[g]:limites[g + 1]]
+            if len(filas):
+                otro.grupos[clave] = _momentos(X[filas])
+        return self.fusionar(otro)
+
+    def fusionar(self, otro):
+        """
+        Combina otro acumulador en este.
+
+        Parámetros:
+        otro (AcumuladorCovarianza): Acumulador a combinar.
+
+        Retorno:
+        AcumuladorCovarianza: El propio acumulador.
+        """
+
+        if self.columnas is None:
+            self.columnas = otro.columnas
+        elif otro.columnas is not None and otro.columnas != self.columnas:
+            raise ValueError('Los acumuladores tienen columnas distintas')
+
+        for clave, (nb, mb, cb, vb) in otro.grupos.items():
+            if clave not in self.grupos:
+                self.grupos[clave] = (nb.copy(), mb.copy(), cb.copy(), vb.copy())
+                continue
+
+            na, ma, ca, va = self.grupos[clave]
+            n = na + nb
+            with np.errstate(invalid='ignore', divide='ignore'):
+                peso = np.where(n > 0, nb / n, 0.0)
+            delta = np.where(nb > 0, mb - ma, 0.0)
+            self.grupos[clave] = (
+                n,
+                ma + delta * peso,
+                ca + cb + delta * delta.T * na * peso,
+                va + vb + delta ** 2 * na * peso,
+            )
+        return self
+
+    def _matrices(self, funcion):
+        if not self.grupos:
+            raise ValueError('El acumulador no contiene datos')
+
+        claves = sorted(self.grupos, key=str)
+        bloques = []
+        for clave in claves:
+            n, _, comomento, m2 = self.grupos[clave]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                matriz = funcion(n, comomento, m2)
+            bloques.append(pd.DataFrame(matriz, index=self.columnas, columns=self.columnas))
+
+        if not self.por:
+            return bloques[0]
+
+        resultado = pd.concat(bloques, keys=claves, names=self.por)
+        return resultado.rename_axis(self.por + ['variable'])
+
+    def covarianza(self):
+        """
+        Devuelve la matriz de covarianzas (ddof=1) por pares.
+
+        Retorno:
+        pd.DataFrame: Matriz variables × variables; con grupos, el índice es (grupo..., variable).
+        """
+
+        return self._matrices(lambda n, c, v: np.where(n > 1, c / (n - 1), np.nan))
+
+    def correlacion(self):
+        """
+        Devuelve la matriz de correlaciones de Pearson por pares.
+
+        Retorno:
+        pd.DataFrame: Matriz variables × variables; con grupos, el índice es (grupo..., variable).
+        """
+
+        return self._matrices(lambda n, c, v: np.where(n > 1, c / np.sqrt(v * v.T), np.nan).clip(-1, 1))
+
+    def n(self):
+        """
+        Devuelve el número de filas usadas en cada par de variables.
+
+        Retorno:
+        pd.DataFrame: Matriz variables × variables; con grupos, el índice es (grupo..., variable).
+        """
+
+        return self._matrices(lambda n, c, v: n.astype('int64'))
+
+
+def _correlacion_rangos(datos, columnas, por_cols):
+    """Correlación de Pearson de los rangos de `columnas`, calculados dentro de cada grupo."""
+
+    rangos = (datos.groupby(por_cols, observed=True)[columnas] if por_cols else datos[columnas]).rank()
+    datos_rangos = pd.concat([datos[por_cols], rangos], axis=1)
+    return AcumuladorCovarianza(columnas, por_cols).actualizar(datos_rangos).correlacion()
+
+
+def _asignar_par(matriz, parcial, a, b, por_cols):
+    """Copia la correlación del par (a, b) de `parcial` a `matriz` (en las dos posiciones simétricas)."""
+
+    if not por_cols:
+        matriz.loc[a, b] = matriz.loc[b, a] = parcial.loc[a, b]
+        return
+
+    for x, y in ((a, b), (b, a)):
+        filas = matriz.index.get_level_values('variable') == x
+        grupos = matriz.index[filas].droplevel('variable')
+        matriz.loc[filas, y] = parcial.xs(x, level='variable')[y].reindex(grupos).to_numpy()
+
+
+def _spearman(datos, columnas, por_cols):
+    """
+    Correlación de Spearman por pares, como `DataFrame.corr(method='spearman')`: cada par se calcula con
+    los rangos de las filas en que las dos variables tienen valor.
+
+    Los pares sin nulos usan los rangos de la columna completa. Los pares con nulos se agrupan por su
+    máscara de filas completas, y cada máscara distinta se vuelve a ordenar una sola vez (las columnas
+    de indicadores suelen compartir la misma máscara).
+    """
+
+    matriz = _correlacion_rangos(datos, columnas, por_cols)
+
+    validos = datos[columnas].notna().to_numpy()
+    con_nulos = [i for i in range(len(columnas)) if not validos[:, i].all()]
+    mascaras = {}
+    for i in con_nulos:
+        for j in range(len(columnas)):
+            if j == i or (j in con_nulos and j < i):
+                continue
+            mascara = validos[:, i] & validos[:, j]
+            mascaras.setdefault(np.packbits(mascara).tobytes(), (mascara, []))[1].append((i, j))
+
+    for mascara, pares in mascaras.values():
+        variables = [columnas[c] for c in sorted({c for par in pares for c in par})]
+        parcial = _correlacion_rangos(datos[mascara], variables, por_cols)
+        for i, j in pares:
+            _asignar_par(matriz, parcial, columnas[i], columnas[j], por_cols)
+    return matriz
+
+
+def matrices_correlacion(df, columnas=None, por=None, metodos=METODOS):
+    """
+    Calcula las matrices de correlación de Pearson y de Spearman, opcionalmente por grupo.
+
+    - Pearson se obtiene con un `AcumuladorCovarianza` en una sola pasada para todos los grupos.
+    - Spearman es la correlación de Pearson de los rangos, calculados dentro de cada grupo sobre las
+      filas en que las dos variables del par tienen valor (igual que `DataFrame.corr`), con el mismo
+      acumulador. Los rangos dependen de todas las filas: a diferencia de Pearson, no se puede
+      acumular por bloques ni fusionar.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a analizar.
+    columnas (list, opcional): Variables a correlacionar (por defecto `columnas_correlacion(df)`).
+    por (str o list, opcional): Columna o columnas que definen los grupos (por ejemplo, 'Market' o 'Segment').
+    metodos (tuple, opcional): Métodos a calcular, 'pearson' y/o 'spearman' (por defecto ambos).
+
+    Retorno:
+    dict: Matriz de correlación (pd.DataFrame) por método.
+    """
+
+    metodos = (metodos,) if isinstance(metodos, str) else tuple(metodos)
+    for metodo in metodos:
+        if metodo not in METODOS:
+            raise ValueError(f'Método no soportado: {metodo!r}. Usar uno de {METODOS}')
+
+    por_cols = [por] if isinstance(por, str) else (list(por) if por is not None else [])
+    columnas = columnas_correlacion(df.drop(columns=por_cols)) if columnas is None else list(columnas)
+
+    datos = df[por_cols + columnas]
+    resultado = {}
+    for metodo in metodos:
+        if metodo == 'spearman':
+            resultado[metodo] = _spearman(datos, columnas, por_cols)
+        else:
+            resultado[metodo] = AcumuladorCovarianza(columnas, por).actualizar(datos).correlacion()
+    return resultado
+
+
+def obtener_correlaciones(df, metodo='pearson', por=None):
+    """
+    Devuelve la matriz de correlación de `matrices_correlacion`, calculada una sola vez por DataFrame (`sp_cache`).
+    """
+
+    clave = ('correlacion', metodo, por if por is None or isinstance(por, str) else tuple(por))
+    return sp_cache.obtener(df, clave, lambda: matrices_correlacion(df, por=por, metodos=metodo)[metodo])
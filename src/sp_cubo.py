@@ -0,0 +1,152 @@
+from statistics import NormalDist
+
+import pandas as pd
+import numpy as np
+
+from . import sp_cache
+from .sp_derivadas import columnas_derivadas
+
+
+# Dimensiones y medidas del cubo de ventas
+DIMENSIONES = ['Market', 'Segment', 'Category', 'Sub_Category', 'Ship_Mode', 'Order_Priority', 'Year', 'Month']
+MEDIDAS = ['Sales', 'Profit', 'Quantity', 'Shipping_Cost', 'Discount', 'Delivery_Days']
+
+
+def _datos_cubo(df):
+    """Selecciona dimensiones y medidas, tomando de las columnas derivadas las que falten."""
+
+    derivadas = columnas_derivadas(df)
+    datos = {}
+
+    for dim in DIMENSIONES:
+        if dim in df.columns:
+            datos[dim] = df[dim]
+        elif dim == 'Year':
+            datos[dim] = derivadas['Order_Date'].dt.year
+        elif dim == 'Month':
+            datos[dim] = derivadas['Order_Date'].dt.month
+
+    for medida in MEDIDAS:
+        datos[medida] = derivadas[medida] if medida == 'Delivery_Days' else df[medida]
+
+    return pd.DataFrame(datos, index=df.index)
+
+
+def construir_cubo(df):
+    """
+    Construye el cubo de ventas pre-agregado con una única agregación sobre las filas del DataFrame.
+
+    - Agrupa por Market × Segment × Category × Sub_Category × Ship_Mode × Order_Priority × Year × Month.
+    - Para cada medida (Sales, Profit, Quantity, Shipping_Cost, Discount y días de entrega) guarda
+      la suma ('_sum'), el número de valores no nulos ('_count') y la suma de cuadrados ('_sumsq'),
+      con los que se obtienen de forma exacta totales, medias y desviaciones de cualquier agrupación.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las dimensiones y medidas del cubo.
+
+    Retorno:
+    pd.DataFrame: Cubo con una fila por combinación de dimensiones presente en los datos.
+    """
+
+    datos = _datos_cubo(df)
+    dims = [dim for dim in DIMENSIONES if dim in datos.columns]
+
+    cuadrados = datos[MEDIDAS].pow(2).add_suffix('_sumsq')
+    datos = pd.concat([datos, cuadrados], axis=1)
+
+    grupos = datos.groupby(dims, observed=True, dropna=False, sort=False)
+    cubo = pd.concat([
+        grupos[MEDIDAS].sum().add_suffix('_sum'),
+        grupos[MEDIDAS].count().add_suffix('_count'),
+        grupos[list(cuadrados.columns)].sum(),
+        grupos.size().rename('n_filas'),
+    ], axis=1)
+
+    return cubo.reset_index()
+
+
+def obtener_cubo(df):
+    """
+    Devuelve el cubo de ventas del DataFrame, construido una sola vez y memorizado (`sp_cache`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las dimensiones y medidas del cubo.
+
+    Retorno:
+    pd.DataFrame: Cubo de ventas (ver `construir_cubo`).
+    """
+
+    return sp_cache.obtener(df, 'cubo', lambda: construir_cubo(df))
+
+
+def enrollar(cubo, por, medidas=None):
+    """
+    Agrega el cubo a un nivel superior (roll-up) y calcula totales, medias y desviaciones.
+
+    Parámetros:
+    cubo (pd.DataFrame): Cubo de ventas (ver `construir_cubo`).
+    por (str o list): Dimensión o dimensiones por las que agrupar.
+    medidas (list, opcional): Medidas a devolver (por defecto todas).
+
+    Retorno:
+    pd.DataFrame: Una fila por grupo con, para cada medida, las columnas '_sum', '_count',
+                  '_mean' y '_std', además de 'n_filas'.
+    """
+
+    medidas = MEDIDAS if medidas is None else list(medidas)
+    columnas = [f'{m}_{sufijo}' for m in medidas for sufijo in ('sum', 'count', 'sumsq')] + ['n_filas']
+
+    agregado = cubo.groupby(por, observed=True)[columnas].sum()
+
+    resultado = {}
+    for m in medidas:
+        suma, n, sumsq = agregado[f'{m}_sum'], agregado[f'{m}_count'], agregado[f'{m}_sumsq']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = suma / n
+            varianza = ((sumsq - suma * media) / (n - 1)).clip(lower=0)
+        resultado[f'{m}_sum'] = suma
+        resultado[f'{m}_count'] = n
+        resultado[f'{m}_mean'] = media.where(n > 0)
+        resultado[f'{m}_std'] = np.sqrt(varianza).where(n > 1)
+    resultado['n_filas'] = agregado['n_filas']
+
+    return pd.DataFrame(resultado)
+
+
+def semiamplitud_error(agregado, medida, errorbar=('ci', 95)):
+    """
+    Calcula de forma analítica la semiamplitud de las barras de error de una media agregada.
+
+    Sustituye al bootstrap de seaborn: el error se obtiene de la desviación y del número de valores
+    de cada grupo, ya presentes en el roll-up del cubo (`enrollar`).
+
+    Parámetros:
+    agregado (pd.DataFrame): Resultado de `enrollar` que incluye la medida.
+    medida (str): Medida para la que se calcula el error (por ejemplo, 'Sales').
+    errorbar (str, tuple o None, opcional): Tipo de barra de error, con la misma notación que seaborn:
+        - ('ci', nivel) o 'ci': intervalo de confianza de la media (aproximación normal, 95% por defecto).
+        - ('se', k) o 'se': k errores estándar de la media.
+        - ('sd', k) o 'sd': k desviaciones típicas.
+        - None: sin barras de error.
+
+    Retorno:
+    pd.Series: Semiamplitud de la barra de error por grupo (None si errorbar=None).
+    """
+
+    if errorbar is None:
+        return None
+
+    tipo, parametro = (errorbar, None) if isinstance(errorbar, str) else errorbar
+    std = agregado[f'{medida}_std']
+    n = agregado[f'{medida}_count']
+
+    if tipo == 'sd':
+        return std * (1 if parametro is None else parametro)
+    if tipo == 'se':
+        return std / np.sqrt(n) * (1 if parametro is None else parametro)
+    if tipo == 'ci':
+        nivel = 95 if parametro is None else parametro
+        z = NormalDist().inv_cdf(0.5 + nivel / 200)
+        return z * std / np.sqrt(n)
+
+    raise ValueError(f"Tipo de barra de error no soportado: {tipo!r}. Usar 'ci', 'se', 'sd' o None")
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from . import sp_cache
+from .sp_tipos import a_numpy
+
+
+def _fecha(serie):
+    """Convierte una columna a datetime (de NumPy, también si es de Arrow) solo si no lo es ya."""
+
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return a_numpy(serie)
+    return pd.to_datetime(serie, errors='coerce')
+
+
+def columnas_derivadas(df):
+    """
+    Devuelve las columnas derivadas de las fechas de pedido y envío, calculadas una sola vez por DataFrame.
+
+    - "Order_Date" y "Ship_Date": fechas en formato datetime (solo se parsean si no lo están ya).
+    - "Delivery_Days": días transcurridos entre el pedido y el envío.
+    - "Order_Month" y "Order_Quarter": periodo mensual y trimestral del pedido.
+
+    El resultado se memoriza asociado al DataFrame (`sp_cache`), así que todas las funciones de
+    análisis que lo piden comparten el mismo cálculo. El DataFrame original no se modifica.
+    El resultado es compartido y debe tratarse como de solo lectura.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las columnas "Order_Date" y "Ship_Date".
+
+    Retorno:
+    pd.DataFrame: DataFrame con las columnas derivadas y el mismo índice que `df`.
+    """
+
+    return sp_cache.obtener(df, 'derivadas', lambda: _calcular_derivadas(df))
+
+
+def _calcular_derivadas(df):
+    order_date = _fecha(df['Order_Date'])
+    ship_date = _fecha(df['Ship_Date'])
+
+    return pd.DataFrame({
+        'Order_Date': order_date,
+        'Ship_Date': ship_date,
+        'Delivery_Days': (ship_date - order_date).dt.days,
+        'Order_Month': order_date.dt.to_period('M'),
+        'Order_Quarter': order_date.dt.to_period('Q'),
+    }, index=df.index)
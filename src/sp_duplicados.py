@@ -0,0 +1,192 @@
+import pandas as pd
+import numpy as np
+
+from .sp_perfil import mostrar_tabla
+
+
+# Clave de una línea de pedido: un mismo producto no se repite en un pedido y fecha de envío
+CLAVE_PEDIDO = ['Order_ID', 'Product_ID', 'Ship_Date']
+
+
+def hash_filas(df, clave=None):
+    """
+    Calcula un hash de 64 bits por fila a partir de las columnas de la clave, de forma vectorizada.
+
+    - Las columnas de texto o categoría dan el mismo hash para los mismos valores, sea cual sea su tipo.
+    - Las fechas se normalizan a nanosegundos, para que el hash no dependa de la resolución.
+    - El índice no forma parte del hash.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame o bloque de datos.
+    clave (list, opcional): Columnas que identifican una fila (por defecto, todas las columnas).
+
+    Retorno:
+    np.ndarray: Hash (uint64) de cada fila.
+    """
+
+    datos = df if clave is None else df[list(clave)]
+    fechas = {col: datos[col].astype('datetime64[ns]')
+              for col in datos.columns if pd.api.types.is_datetime64_dtype(datos[col])}
+    if fechas:
+        datos = datos.assign(**fechas)
+    return pd.util.hash_pandas_object(datos, index=False).to_numpy()
+
+
+def contar_duplicados(df, clave=None):
+    """
+    Cuenta las filas repetidas según la clave (las que `df.duplicated(subset=clave)` marcaría).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a analizar.
+    clave (list, opcional): Columnas que identifican una fila (por defecto, todas las columnas).
+
+    Retorno:
+    int: Número de filas duplicadas.
+    """
+
+    # Dentro de un mismo DataFrame no hace falta el hash: `duplicated` factoriza las columnas de la clave,
+    # que es exacto y bastante más rápido que hashear el texto
+    return int(df.duplicated(subset=None if clave is None else list(clave)).sum())
+
+
+class DetectorDuplicados:
+    """
+    Detector de filas duplicadas entre bloques o cargas sucesivas (por ejemplo, un lote diario).
+
+    - Cada fila se reduce a un hash de 64 bits de su clave (`hash_filas`), en una operación vectorizada.
+    - Los hashes ya vistos se guardan en un array ordenado (8 bytes por clave distinta), de modo que
+      comprobar un bloque nuevo es una búsqueda binaria por fila, sin comparar columnas.
+    - Una fila es duplicada si su clave ya apareció en un bloque anterior o antes en el mismo bloque
+      (igual que `df.duplicated(keep='first')`).
+    - Dos detectores calculados por separado se combinan con `fusionar`, y el conjunto de hashes vistos
+      se puede guardar y cargar entre sesiones (`guardar` y `cargar`).
+
+    Parámetros:
+    clave (list, opcional): Columnas que identifican una fila (por defecto `CLAVE_PEDIDO`;
+                            None para usar todas las columnas).
+    """
+
+    def __init__(self, clave=CLAVE_PEDIDO):
+        self.clave = None if clave is None else list(clave)
+        self.vistos = np.empty(0, dtype=np.uint64)
+        self.n_filas = 0
+        self.duplicados = 0
+
+    def __repr__(self):
+        return (f'DetectorDuplicados(clave={self.clave}, vistos={len(self.vistos)}, '
+                f'duplicados={self.duplicados})')
+
+    def _nuevos(self, hashes):
+        """Devuelve qué hashes no están en el conjunto de vistos."""
+
+        if not len(self.vistos):
+            return np.ones(len(hashes), dtype=bool)
+        posiciones = np.searchsorted(self.vistos, hashes).clip(max=len(self.vistos) - 1)
+        return self.vistos[posiciones] != hashes
+
+    def marcar(self, bloque, registrar=True):
+        """
+        Marca las filas del bloque cuya clave ya se ha visto.
+
+        Parámetros:
+        bloque (pd.DataFrame): Bloque de datos.
+        registrar (bool, opcional): Si es True, añade las claves del bloque a las vistas y actualiza
+                                    los recuentos (por defecto True).
+
+        Retorno:
+        pd.Series: True en las filas duplicadas, con el índice del bloque.
+        """
+
+        hashes = hash_filas(bloque, self.clave)
+        unicos, primeras = np.unique(hashes, return_index=True)
+        unicos_nuevos = self._nuevos(unicos)
+        nuevas = np.zeros(len(hashes), dtype=bool)
+        nuevas[primeras] = unicos_nuevos
+
+        if registrar:
+            # Los hashes nuevos ya están ordenados (np.unique): se intercalan en los vistos sin reordenarlos
+            anadir = unicos[unicos_nuevos]
+            self.vistos = np.insert(self.vistos, np.searchsorted(self.vistos, anadir), anadir)
+            self.n_filas += len(hashes)
+            self.duplicados += int((~nuevas).sum())
+
+        return pd.Series(~nuevas, index=bloque.index, name='duplicado')
+
+    def actualizar(self, bloque):
+        """
+        Añade un bloque al detector (ver `marcar`).
+
+        Retorno:
+        DetectorDuplicados: El propio detector.
+        """
+
+        self.marcar(bloque)
+        return self
+
+    def deduplicar(self, bloque, verbose=False):
+        """
+        Devuelve el bloque sin las filas cuya clave ya se ha visto y registra sus claves.
+
+        Parámetros:
+        bloque (pd.DataFrame): Bloque de datos.
+        verbose (bool, opcional): Si es True, muestra las filas duplicadas eliminadas (por defecto False).
+
+        Retorno:
+        pd.DataFrame: Bloque sin duplicados.
+        """
+
+        duplicadas = self.marcar(bloque)
+        if verbose and duplicadas.any():
+            print(f'Filas duplicadas eliminadas: {int(duplicadas.sum())}')
+            mostrar_tabla(bloque[duplicadas])
+        return bloque[~duplicadas]
+
+    def fusionar(self, otro):
+        """
+        Combina otro detector en este.
+
+        Las claves vistas por los dos cuentan como duplicadas una vez más, igual que si los bloques
+        del otro detector se hubieran procesado después de los de este.
+
+        Parámetros:
+        otro (DetectorDuplicados): Detector con la misma clave.
+
+        Retorno:
+        DetectorDuplicados: El propio detector.
+        """
+
+        if otro.clave != self.clave:
+            raise ValueError('Los detectores tienen claves distintas')
+
+        comunes = np.intersect1d(self.vistos, otro.vistos, assume_unique=True)
+        self.vistos = np.union1d(self.vistos, otro.vistos)
+        self.n_filas += otro.n_filas
+        self.duplicados += otro.duplicados + len(comunes)
+        return self
+
+    def guardar(self, ruta):
+        """
+        Guarda los hashes vistos en un fichero .npy, para continuar en la siguiente carga.
+
+        Parámetros:
+        ruta (str): Ruta del fichero.
+        """
+
+        np.save(ruta, self.vistos)
+
+    @classmethod
+    def cargar(cls, ruta, clave=CLAVE_PEDIDO):
+        """
+        Crea un detector con los hashes vistos guardados con `guardar`.
+
+        Parámetros:
+        ruta (str): Ruta del fichero.
+        clave (list, opcional): Columnas de la clave con la que se calcularon (por defecto `CLAVE_PEDIDO`).
+
+        Retorno:
+        DetectorDuplicados: Detector con los hashes cargados.
+        """
+
+        detector = cls(clave)
+        detector.vistos = np.load(ruta)
+        return detector
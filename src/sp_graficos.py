@@ -0,0 +1,109 @@
+import importlib
+
+import numpy as np
+
+from .sp_calculos import binear_2d
+from .sp_regresion import banda_confianza
+from .sp_tipos import a_numpy
+
+
+class _ModuloDiferido:
+    """Módulo que se importa la primera vez que se accede a uno de sus atributos."""
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def __repr__(self):
+        return f"<módulo diferido '{self._nombre}'{'' if self._modulo is None else ' (cargado)'}>"
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre)
+        return getattr(self._modulo, atributo)
+
+
+# matplotlib y seaborn se cargan al dibujar el primer gráfico, no al importar los módulos de `src`
+plt = _ModuloDiferido('matplotlib.pyplot')
+sns = _ModuloDiferido('seaborn')
+
+
+def dibujar_densidad(ax, x, y, bins=80, cmap='viridis', muestra=None, hue=None, palette=None, barra_color=True):
+    """
+    Dibuja la densidad de un diagrama de dispersión como una rejilla 2-D de recuentos.
+
+    El coste de dibujo y el tamaño del gráfico dependen solo del número de intervalos, no del número de filas.
+    Opcionalmente superpone una muestra de puntos (por ejemplo, una muestra estratificada).
+
+    Parámetros:
+    ax (matplotlib.axes.Axes): Eje donde dibujar.
+    x (pd.Series): Valores del eje x.
+    y (pd.Series): Valores del eje y.
+    bins (int, opcional): Número de intervalos por eje (por defecto 80).
+    cmap (str, opcional): Mapa de colores de la densidad (por defecto 'viridis').
+    muestra (pd.DataFrame, opcional): Filas a superponer como puntos, con las columnas `x.name` e `y.name`.
+    hue (str, opcional): Columna de `muestra` que define el color de los puntos.
+    palette (str, opcional): Paleta de colores de los puntos.
+    barra_color (bool, opcional): Si es True, añade la barra de color con el número de filas (por defecto True).
+    """
+
+    from matplotlib.colors import LogNorm
+
+    recuentos, bordes_x, bordes_y = binear_2d(x, y, bins)
+    recuentos = np.ma.masked_equal(recuentos, 0)
+
+    if recuentos.count():
+        malla = ax.pcolormesh(bordes_x, bordes_y, recuentos.T, cmap=cmap, norm=LogNorm(), rasterized=True)
+        if barra_color:
+            plt.colorbar(malla, ax=ax, label='Número de filas')
+
+    if muestra is not None and len(muestra):
+        sns.scatterplot(data=a_numpy(muestra), x=x.name, y=y.name, hue=hue, palette=palette, s=10, alpha=0.6,
+                        edgecolor=None, ax=ax)
+
+    ax.set_xlabel(x.name)
+    ax.set_ylabel(y.name)
+
+
+def dibujar_recta(ax, ajuste, color='red', linestyle='-', nivel=95, banda=True, etiqueta=True):
+    """
+    Dibuja una recta de regresión ya ajustada y su banda de confianza analítica.
+
+    Parámetros:
+    ax (matplotlib.axes.Axes): Eje donde dibujar.
+    ajuste (pd.Series): Fila del resultado de `sp_regresion.ajustar_regresiones`.
+    color (str, opcional): Color de la recta (por defecto 'red').
+    linestyle (str, opcional): Estilo de la recta (por defecto continua).
+    nivel (float, opcional): Nivel de confianza de la banda en porcentaje (por defecto 95).
+    banda (bool, opcional): Si es True, dibuja la banda de confianza de la media (por defecto True).
+    etiqueta (bool, opcional): Si es True, muestra la pendiente y el R² en el gráfico (por defecto True).
+    """
+
+    xs = np.linspace(ajuste['x_min'], ajuste['x_max'], 100)
+    prediccion, inferior, superior = banda_confianza(ajuste, xs, nivel)
+
+    ax.plot(xs, prediccion, color=color, linestyle=linestyle)
+    if banda:
+        ax.fill_between(xs, inferior, superior, color=color, alpha=0.15, linewidth=0)
+    if etiqueta:
+        ax.text(0.02, 0.98, f"pendiente={ajuste['pendiente']:.3g}, R²={ajuste['r2']:.3f}",
+                transform=ax.transAxes, va='top', fontsize=9, color=color,
+                bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'))
+
+
+def finalizar(fig, mostrar=True):
+    """
+    Muestra la figura o la devuelve para que se guarde o se procese fuera (por ejemplo, en modo headless).
+
+    Parámetros:
+    fig (matplotlib.figure.Figure): Figura generada.
+    mostrar (bool, opcional): Si es True, la muestra con `plt.show()` (por defecto True).
+
+    Retorno:
+    matplotlib.figure.Figure: La figura si mostrar=False; None en caso contrario.
+    """
+
+    if mostrar:
+        plt.show()
+        return None
+    return fig
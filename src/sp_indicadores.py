@@ -0,0 +1,214 @@
+import difflib
+import json
+import os
+
+import pandas as pd
+import numpy as np
+
+from .sp_almacen import DIRECTORIO_RAW, DIRECTORIO_CACHE, guardar_etapa, cargar_etapa, huella_fichero
+from .sp_cleaning import COUNTRY_CORRECTIONS, COLUMNAS_INDICADORES, renombrar_indicadores
+
+
+# Fichero de indicadores del Banco Mundial (data/data_raw)
+RUTA_INDICADORES = os.path.join(DIRECTORIO_RAW, 'indicators.xlsx')
+
+# Tabla de alias de países mantenida a mano: nombre en Superstore -> nombre en el Banco Mundial.
+# Amplía (o sustituye) las correcciones de `COUNTRY_CORRECTIONS`.
+RUTA_ALIAS = os.path.join(DIRECTORIO_RAW, 'alias_paises.json')
+
+# Caché de la tabla de indicadores (data/data_processed/cache/indicadores), separada de las salidas
+# de `sp_pipeline`, que se guardan en `DIRECTORIO_CACHE` y que `Pipeline.limpiar_cache` gestiona
+DIRECTORIO_CACHE_INDICADORES = os.path.join(DIRECTORIO_CACHE, 'indicadores')
+
+# Tablas ya cargadas en este proceso, por huella del fichero de origen
+_TABLAS = {}
+
+
+def cargar_alias(ruta=RUTA_ALIAS):
+    """
+    Devuelve la tabla de alias de países: `COUNTRY_CORRECTIONS` más los alias guardados en `ruta`.
+
+    Parámetros:
+    ruta (str, opcional): Fichero JSON de alias (por defecto `RUTA_ALIAS`).
+
+    Retorno:
+    dict: Nombre en Superstore -> nombre en el Banco Mundial.
+    """
+
+    alias = dict(COUNTRY_CORRECTIONS)
+    if os.path.exists(ruta):
+        with open(ruta, encoding='utf-8') as f:
+            alias.update(json.load(f))
+    return alias
+
+
+def agregar_alias(nuevos, ruta=RUTA_ALIAS):
+    """
+    Añade alias a la tabla persistente de países.
+
+    Parámetros:
+    nuevos (dict): Nombre en Superstore -> nombre en el Banco Mundial.
+    ruta (str, opcional): Fichero JSON de alias (por defecto `RUTA_ALIAS`).
+
+    Retorno:
+    dict: Alias guardados en el fichero tras la actualización.
+    """
+
+    guardados = {}
+    if os.path.exists(ruta):
+        with open(ruta, encoding='utf-8') as f:
+            guardados = json.load(f)
+    guardados.update(nuevos)
+
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(guardados.items())), f, ensure_ascii=False, indent=2)
+    return guardados
+
+
+class TablaIndicadores:
+    """
+    Indicadores del Banco Mundial indexados por (código de país, año) en una matriz densa.
+
+    - Cada país tiene un identificador entero (posición de su código ISO en `codigos`) y cada año
+      una posición desde `anio_min`; la fila de la matriz es `id_pais * n_anios + (año - anio_min)`.
+    - `unir` traduce los nombres de país de un DataFrame a identificadores (solo se comparan los
+      nombres distintos, no las filas) y obtiene los indicadores con una indexación de arrays.
+
+    Parámetros:
+    datos (pd.DataFrame): Indicadores renombrados con `renombrar_indicadores`
+                          ('Country', 'Country Code', 'Year' e indicadores).
+    """
+
+    def __init__(self, datos):
+        datos = datos.dropna(subset=['Country Code', 'Year'])
+        self.columnas = [col for col in COLUMNAS_INDICADORES if col in datos.columns]
+
+        codigos, self.codigos = pd.factorize(datos['Country Code'], sort=True)
+        anios = datos['Year'].astype(int).to_numpy()
+        self.anio_min = int(anios.min())
+        self.n_anios = int(anios.max()) - self.anio_min + 1
+
+        self.matriz = np.full((len(self.codigos) * self.n_anios, len(self.columnas)), np.nan)
+        self.matriz[codigos * self.n_anios + (anios - self.anio_min)] = datos[self.columnas].to_numpy(dtype=float)
+
+        nombres = datos.drop_duplicates('Country Code')
+        self.nombres = dict(zip(nombres['Country'], pd.Index(self.codigos).get_indexer(nombres['Country Code'])))
+
+    def __repr__(self):
+        return (f'TablaIndicadores(paises={len(self.codigos)}, '
+                f'anios={self.anio_min}-{self.anio_min + self.n_anios - 1}, columnas={self.columnas})')
+
+    def ids_pais(self, paises, alias=None):
+        """
+        Traduce nombres de país a identificadores enteros, normalizándolos con la tabla de alias.
+
+        Parámetros:
+        paises (array): Nombres de país (sin repetir).
+        alias (dict, opcional): Tabla de alias (por defecto `cargar_alias()`).
+
+        Retorno:
+        np.ndarray: Identificador de cada país (-1 si no tiene coincidencia).
+        """
+
+        alias = cargar_alias() if alias is None else alias
+        return np.array([self.nombres.get(alias.get(p, p), -1) for p in paises], dtype=np.int64)
+
+    def unir(self, df, alias=None, eliminar_sin_coincidencia=True, verbose=True):
+        """
+        Añade los indicadores a cada fila según su país y año (equivalente a un left join).
+
+        - Normaliza los nombres de país con la tabla de alias y los sustituye en la columna "Country".
+        - Informa de las claves sin coincidencia en lugar de dejar nulos silenciosos.
+
+        Parámetros:
+        df (pd.DataFrame): DataFrame con las columnas "Country" y "Year".
+        alias (dict, opcional): Tabla de alias (por defecto `cargar_alias()`).
+        eliminar_sin_coincidencia (bool, opcional): Si es True, elimina las filas de países que no
+                                                    están en los indicadores (por defecto True).
+        verbose (bool, opcional): Si es True, muestra las claves sin coincidencia (por defecto True).
+
+        Retorno:
+        tuple: DataFrame unificado y DataFrame de claves sin coincidencia ('Country', 'Year',
+               'n_filas', 'motivo' y, para países desconocidos, 'sugerencia').
+        """
+
+        alias = cargar_alias() if alias is None else alias
+
+        # Solo se traducen los nombres distintos; las filas se resuelven con sus códigos enteros
+        paises = df['Country']
+        if isinstance(paises.dtype, pd.CategoricalDtype):
+            codigos, unicos = paises.cat.codes.to_numpy(), paises.cat.categories
+        else:
+            codigos, unicos = pd.factorize(paises)
+        ids = np.append(self.ids_pais(unicos, alias), -1)[codigos]
+
+        anios = df['Year'].to_numpy(dtype=np.int64) - self.anio_min
+        anio_valido = (anios >= 0) & (anios < self.n_anios)
+        filas = np.where((ids >= 0) & anio_valido, ids * self.n_anios + anios, -1)
+
+        valores = np.append(self.matriz, np.full((1, len(self.columnas)), np.nan), axis=0)[filas]
+        sin_pais = ids < 0
+        sin_anio = ~sin_pais & ~anio_valido
+
+        sin_coincidencia = self._sin_coincidencia(df, sin_pais, sin_anio)
+        if verbose and len(sin_coincidencia):
+            print('Claves sin coincidencia en los indicadores:')
+            print(sin_coincidencia.to_string(index=False))
+
+        nombres = np.append(np.array([alias.get(p, p) for p in unicos], dtype=object), np.nan)[codigos]
+        tipo = 'category' if isinstance(paises.dtype, pd.CategoricalDtype) else paises.dtype
+        resultado = df.assign(Country=pd.Series(nombres, index=df.index).astype(tipo),
+                              Year=df['Year'].astype(int),
+                              **dict(zip(self.columnas, valores.T)))
+        if eliminar_sin_coincidencia:
+            resultado = resultado[~sin_pais]
+        return resultado, sin_coincidencia
+
+    def _sin_coincidencia(self, df, sin_pais, sin_anio):
+        partes = []
+        for mascara, motivo in ((sin_pais, 'país'), (sin_anio, 'año')):
+            if mascara.any():
+                claves = df.loc[mascara, ['Country', 'Year']].value_counts().rename('n_filas').reset_index()
+                claves['motivo'] = motivo
+                partes.append(claves)
+
+        if not partes:
+            return pd.DataFrame(columns=['Country', 'Year', 'n_filas', 'motivo', 'sugerencia'])
+
+        claves = pd.concat(partes, ignore_index=True)
+        sugerencias = {pais: next(iter(difflib.get_close_matches(pais, list(self.nombres), n=1)), None)
+                       for pais in claves.loc[claves['motivo'] == 'país', 'Country'].unique()}
+        claves['sugerencia'] = claves['Country'].map(sugerencias)
+        return claves
+
+
+def cargar_indicadores(ruta=RUTA_INDICADORES, directorio_cache=None):
+    """
+    Carga los indicadores del Banco Mundial como una `TablaIndicadores`, leyendo el Excel una sola vez.
+
+    - La primera vez lee indicators.xlsx, lo renombra y lo guarda en formato binario (parquet) en la
+      caché, con la huella del contenido del Excel en el nombre. Las siguientes veces carga el parquet.
+    - Dentro del mismo proceso, la tabla se reutiliza sin volver a leer el disco.
+
+    Parámetros:
+    ruta (str, opcional): Ruta de indicators.xlsx (por defecto `RUTA_INDICADORES`).
+    directorio_cache (str, opcional): Directorio de la caché (por defecto `DIRECTORIO_CACHE_INDICADORES`).
+
+    Retorno:
+    TablaIndicadores: Indicadores indexados por (código de país, año).
+    """
+
+    huella = huella_fichero(ruta)[:16]
+    if huella in _TABLAS:
+        return _TABLAS[huella]
+
+    nombre = f'indicadores_{huella}'
+    directorio_cache = directorio_cache or DIRECTORIO_CACHE_INDICADORES
+    try:
+        datos = cargar_etapa(nombre, directorio=directorio_cache, formato='parquet')
+    except FileNotFoundError:
+        datos = renombrar_indicadores(pd.read_excel(ruta))
+        guardar_etapa(datos, nombre, directorio=directorio_cache, reducir=False)
+
+    _TABLAS[huella] = TablaIndicadores(datos)
+    return _TABLAS[huella]
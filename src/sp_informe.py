@@ -0,0 +1,174 @@
+import argparse
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+from . import sp_analisis_general as ag
+from . import sp_visualizations as vis
+from .sp_almacen import cargar_etapa
+from .sp_cubo import obtener_cubo
+from .sp_mmap import DIRECTORIO_MMAP, cargar as cargar_mmap
+from .sp_regresion import obtener_regresiones
+
+
+# Gráficos del informe final, en el orden del notebook 5: nombre -> (función, argumentos)
+INFORME = {
+    'analisis_descriptivo': (ag.analisis_descriptivo, {}),
+    'mercados_rentabilidad': (vis.mercados_rentabilidad, {}),
+    'categorias_mas_vendidas': (vis.categorias_mas_vendidas, {}),
+    'comparativa_mercado_segmento': (vis.comparativa_mercado_segmento, {}),
+    'impacto_descuento': (ag.impacto_descuento, {}),
+    'evolucion_ventas': (ag.evolucion_ventas, {}),
+    'relacion_pib_ventas': (ag.relacion_pib_ventas, {}),
+    'impacto_inflacion': (ag.impacto_inflacion, {}),
+    'correlaciones_heatmap': (ag.correlaciones_heatmap, {}),
+    'impacto_variables_beneficio': (vis.impacto_variables_beneficio, {}),
+    'tiempo_envio': (vis.tiempo_envio, {}),
+    'distribucion_prioridad_envio': (ag.distribucion_prioridad_envio, {}),
+    'coste_envio_mercado': (vis.coste_envio_mercado, {}),
+    'eficiencia_metodos_envio': (ag.eficiencia_metodos_envio, {}),
+}
+
+# Columnas que usan los gráficos del informe y la clave de duplicados (`CLAVE_PEDIDO`), en el orden de
+# 'conjunto_datos_final': el notebook 5 y los procesos del pool cargan solo estas columnas
+COLUMNAS_INFORME = [
+    'Category', 'Discount', 'Order_Date', 'Order_ID', 'Order_Priority', 'Product_ID', 'Profit', 'Quantity',
+    'Sales', 'Segment', 'Ship_Date', 'Ship_Mode', 'Shipping_Cost', 'Sub_Category', 'Year', 'Market',
+    'Inflation(%)', 'Exports_GDP(%)', 'Imports_GDP(%)', 'GDP_Growth(%)', 'Month',
+]
+
+# Dataset compartido por los procesos del pool
+_DATOS = None
+
+
+def _cargar(etapa, directorio_mmap):
+    """Carga el dataset del almacén mapeado en memoria si se indica; si no, la etapa del pipeline."""
+
+    if directorio_mmap is None:
+        return cargar_etapa(etapa, columnas=COLUMNAS_INFORME)
+    return cargar_mmap(directorio_mmap, columnas=COLUMNAS_INFORME)
+
+
+def _inicializar(etapa, directorio_mmap=None):
+    """Inicializa un proceso del pool: backend sin pantalla y, si hace falta, carga del dataset."""
+
+    global _DATOS
+    matplotlib.use('Agg')
+    if _DATOS is None:
+        _DATOS = _cargar(etapa, directorio_mmap)
+
+
+def _renderizar(nombre, directorio_salida, formatos, dpi, opciones):
+    """Genera un gráfico del informe y lo guarda en cada formato."""
+
+    import matplotlib.pyplot as plt
+
+    funcion, kwargs = INFORME[nombre]
+    inicio = time.perf_counter()
+
+    fig = funcion(_DATOS, mostrar=False, **{**kwargs, **opciones.get(nombre, {})})
+    rutas = []
+    if fig is not None:
+        for formato in formatos:
+            ruta = os.path.join(directorio_salida, f'{nombre}.{formato}')
+            fig.savefig(ruta, format=formato, dpi=dpi, bbox_inches='tight')
+            rutas.append(ruta)
+        plt.close(fig)
+
+    return nombre, rutas, time.perf_counter() - inicio
+
+
+def renderizar_informe(df=None, etapa='conjunto_datos_final', directorio_salida='informe',
+                       formatos=('png',), procesos=None, graficos=None, dpi=100, opciones=None,
+                       directorio_mmap=None):
+    """
+    Genera sin pantalla (headless) todos los gráficos del informe final y los guarda en disco.
+
+    - Reparte los gráficos entre un pool de procesos. Cuando el sistema lo permite (fork), los procesos
+      comparten el dataset ya cargado y el cubo y las regresiones precalculados, sin volver a leerlos.
+      En otro caso, cada proceso carga la etapa indicada una sola vez al arrancar.
+    - Con `directorio_mmap`, el dataset se carga del almacén mapeado en memoria (`sp_mmap.exportar`):
+      todos los procesos comparten una única copia física de los datos, también sin fork.
+    - Cada función de gráfico devuelve su figura (`mostrar=False`), que se guarda en cada formato.
+
+    Parámetros:
+    df (pd.DataFrame, opcional): Dataset final. Si no se indica, se carga la etapa `etapa`.
+    etapa (str, opcional): Etapa del almacén a cargar (por defecto 'conjunto_datos_final').
+    directorio_salida (str, opcional): Directorio donde guardar los gráficos (por defecto 'informe').
+    formatos (tuple, opcional): Formatos de salida, por ejemplo ('png', 'svg') (por defecto ('png',)).
+    procesos (int, opcional): Número de procesos (por defecto, número de núcleos). Con 1 se genera en el proceso actual.
+    graficos (list, opcional): Nombres de `INFORME` a generar (por defecto todos).
+    dpi (int, opcional): Resolución de los PNG (por defecto 100).
+    opciones (dict, opcional): Argumentos adicionales por gráfico, por ejemplo
+                               {'impacto_inflacion': {'modo': 'densidad'}}.
+    directorio_mmap (str, opcional): Directorio del almacén de `sp_mmap` del que cargar el dataset
+                                     en lugar de la etapa (por defecto no se usa).
+
+    Retorno:
+    dict: Para cada gráfico, las rutas generadas y el tiempo empleado en segundos.
+    """
+
+    global _DATOS
+
+    graficos = list(INFORME) if graficos is None else list(graficos)
+    opciones = opciones or {}
+    os.makedirs(directorio_salida, exist_ok=True)
+
+    if df is None:
+        df = _cargar(etapa, directorio_mmap)
+
+    # Precalcular los agregados compartidos antes de repartir el trabajo
+    obtener_cubo(df)
+    obtener_regresiones(df)
+
+    resultados = {}
+    anterior = _DATOS
+    _DATOS = df
+    try:
+        if procesos == 1:
+            for nombre in graficos:
+                nombre, rutas, segundos = _renderizar(nombre, directorio_salida, formatos, dpi, opciones)
+                resultados[nombre] = {'rutas': rutas, 'segundos': segundos}
+            return resultados
+
+        metodos = mp.get_all_start_methods()
+        contexto = mp.get_context('fork' if 'fork' in metodos else 'spawn')
+
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto,
+                                 initializer=_inicializar, initargs=(etapa, directorio_mmap)) as pool:
+            futuros = [pool.submit(_renderizar, nombre, directorio_salida, formatos, dpi, opciones)
+                       for nombre in graficos]
+            for futuro in futuros:
+                nombre, rutas, segundos = futuro.result()
+                resultados[nombre] = {'rutas': rutas, 'segundos': segundos}
+    finally:
+        _DATOS = anterior
+
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera los gráficos del informe final sin pantalla.')
+    parser.add_argument('--etapa', default='conjunto_datos_final', help='Etapa del almacén a cargar')
+    parser.add_argument('--salida', default='informe', help='Directorio de salida')
+    parser.add_argument('--formatos', nargs='+', default=['png'], help='Formatos de salida (png, svg, pdf...)')
+    parser.add_argument('--procesos', type=int, default=None, help='Número de procesos')
+    parser.add_argument('--dpi', type=int, default=100, help='Resolución de los PNG')
+    parser.add_argument('--mmap', nargs='?', const=DIRECTORIO_MMAP, default=None,
+                        help='Cargar el dataset del almacén mapeado en memoria (por defecto, el de sp_mmap)')
+    args = parser.parse_args()
+
+    matplotlib.use('Agg')
+    resultados = renderizar_informe(etapa=args.etapa, directorio_salida=args.salida,
+                                    formatos=tuple(args.formatos), procesos=args.procesos, dpi=args.dpi,
+                                    directorio_mmap=args.mmap)
+
+    for nombre, info in resultados.items():
+        print(f'{nombre:30s} {info["segundos"]:6.2f} s  {", ".join(info["rutas"])}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+import atexit
+import functools
+import importlib
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+
+# Variables de entorno que activan la instrumentación al importar los módulos:
+# SP_INSTRUMENTACION=1 la activa, SP_INSTRUMENTACION_LOG=<ruta> guarda cada llamada en un JSON lines
+# y SP_INSTRUMENTACION_MEMORIA=0 desactiva la medición de memoria (tracemalloc)
+VARIABLE_ENTORNO = 'SP_INSTRUMENTACION'
+VARIABLE_LOG = 'SP_INSTRUMENTACION_LOG'
+VARIABLE_MEMORIA = 'SP_INSTRUMENTACION_MEMORIA'
+
+# Módulos cuyas funciones públicas se instrumentan por defecto
+MODULOS = ('sp_cleaning', 'sp_calculos', 'sp_analisis_general', 'sp_visualizations')
+
+# Columnas del resumen por función
+COLUMNAS_RESUMEN = ['llamadas', 'tiempo_s', 'tiempo_propio_s', 'porcentaje', 'cpu_s', 'memoria_pico_mb',
+                    'filas_entrada']
+
+# Instrumentación activada por variable de entorno (una por proceso)
+_GLOBAL = None
+
+
+def _activado(valor):
+    """Interpreta el valor de una variable de entorno como booleano."""
+
+    return valor is not None and valor.strip().lower() not in ('', '0', 'false', 'no')
+
+
+def _filas(valor):
+    """Número de filas de un DataFrame o Series (None para otros objetos)."""
+
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(valor.shape[0])
+    return None
+
+
+def _filas_entrada(args, kwargs):
+    """Filas del primer DataFrame o Series de los argumentos."""
+
+    for valor in (*args, *kwargs.values()):
+        filas = _filas(valor)
+        if filas is not None:
+            return filas
+    return None
+
+
+def _funciones_publicas(modulo):
+    """Funciones públicas definidas en el módulo (no las importadas de otros)."""
+
+    return {nombre: valor for nombre, valor in vars(modulo).items()
+            if not nombre.startswith('_') and inspect.isfunction(valor) and valor.__module__ == modulo.__name__}
+
+
+def _modulos_paquete():
+    """Módulos ya importados del paquete `src`."""
+
+    prefijo = __name__.rpartition('.')[0] + '.'
+    return [modulo for nombre, modulo in list(sys.modules.items())
+            if modulo is not None and (nombre.startswith(prefijo) or nombre == '__main__')]
+
+
+class Instrumentacion:
+    """
+    Instrumentación opcional de las funciones públicas de los módulos de `src`.
+
+    Mientras está activa, cada llamada a una función pública de los módulos indicados registra:
+    - El tiempo de reloj y el tiempo de CPU del proceso.
+    - El tiempo propio: el de reloj sin el de las funciones instrumentadas a las que llama.
+    - La memoria máxima reservada durante la llamada (tracemalloc), sin contar la que ya estaba reservada.
+    - Las filas del primer DataFrame de entrada y del DataFrame devuelto.
+
+    Las funciones se sustituyen en su módulo y en los módulos del paquete que las importaron por nombre
+    (por ejemplo, `sp_pipeline`) o que las guardan en un registro (por ejemplo, `INFORME`), y se
+    restauran al desactivarla. Se usa como gestor de contexto (`with instrumentar(): ...`); cada
+    activación es una ejecución distinta en el log.
+
+    Parámetros:
+    modulos (tuple, opcional): Nombres de los módulos de `src` a instrumentar (por defecto `MODULOS`).
+    memoria (bool, opcional): Si es True, mide la memoria con tracemalloc, que ralentiza la ejecución
+                              (por defecto True).
+    ruta_log (str, opcional): Fichero JSON lines donde añadir cada llamada; necesario para conservar las
+                              llamadas de los procesos hijos (por defecto solo se guardan en memoria).
+    ejecucion (str, opcional): Identificador de la ejecución (por defecto, fecha, hora y PID).
+    """
+
+    def __init__(self, modulos=MODULOS, memoria=True, ruta_log=None, ejecucion=None):
+        self.modulos = tuple(modulos)
+        self.memoria = memoria
+        self.ruta_log = ruta_log
+        self.ejecucion = ejecucion
+        self.registros = []
+        self.activa = False
+        self._pila = threading.local()
+        self._inicio_tracemalloc = False
+
+    def __repr__(self):
+        return (f'Instrumentacion(modulos={self.modulos}, ejecucion={self.ejecucion!r}, '
+                f'llamadas={len(self.registros)}, activa={self.activa})')
+
+    def __enter__(self):
+        return self.activar()
+
+    def __exit__(self, *exc):
+        self.desactivar()
+        return False
+
+    def _envolver(self, funcion):
+        """Devuelve la función envuelta con la medición de tiempo, memoria y filas."""
+
+        nombre = f"{funcion.__module__.rpartition('.')[2]}.{funcion.__name__}"
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            pila = self._pila.__dict__.setdefault('llamadas', [])
+            medir_memoria = self.memoria and tracemalloc.is_tracing()
+
+            # tracemalloc solo tiene un máximo global: se reinicia en cada llamada y el de la
+            # llamada interna se propaga a la externa al terminar
+            if medir_memoria:
+                actual, pico = tracemalloc.get_traced_memory()
+                if pila:
+                    pila[-1]['pico'] = max(pila[-1]['pico'], pico)
+                tracemalloc.reset_peak()
+            else:
+                actual = 0
+            marco = {'memoria_inicio': actual, 'pico': actual, 'hijos': 0.0}
+            pila.append(marco)
+
+            registro = {'ejecucion': self.ejecucion, 'funcion': nombre, 'nivel': len(pila) - 1,
+                        'inicio': time.strftime('%Y-%m-%dT%H:%M:%S'), 'pid': os.getpid(),
+                        'filas_entrada': _filas_entrada(args, kwargs), 'filas_salida': None, 'error': None}
+            inicio, inicio_cpu = time.perf_counter(), time.process_time()
+            try:
+                resultado = funcion(*args, **kwargs)
+                registro['filas_salida'] = _filas(resultado)
+                return resultado
+            except Exception as e:
+                registro['error'] = f'{type(e).__name__}: {e}'
+                raise
+            finally:
+                tiempo = time.perf_counter() - inicio
+                registro['cpu_s'] = time.process_time() - inicio_cpu
+                registro['tiempo_s'] = tiempo
+                registro['tiempo_propio_s'] = tiempo - marco['hijos']
+                pila.pop()
+                if medir_memoria:
+                    marco['pico'] = max(marco['pico'], tracemalloc.get_traced_memory()[1])
+                    registro['memoria_pico_mb'] = (marco['pico'] - marco['memoria_inicio']) / 1024 ** 2
+                    if pila:
+                        pila[-1]['pico'] = max(pila[-1]['pico'], marco['pico'])
+                else:
+                    registro['memoria_pico_mb'] = None
+                if pila:
+                    pila[-1]['hijos'] += tiempo
+                self._registrar(registro)
+
+        envoltura._instrumentacion = self
+        return envoltura
+
+    def _registrar(self, registro):
+        """Guarda el registro de una llamada en memoria y, si hay ruta, en el log."""
+
+        self.registros.append(registro)
+        if self.ruta_log is not None:
+            with open(self.ruta_log, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    def instrumentar_modulo(self, modulo):
+        """
+        Envuelve las funciones públicas de un módulo y sustituye las referencias a ellas en el paquete.
+
+        Parámetros:
+        modulo (module): Módulo a instrumentar.
+        """
+
+        envolturas = {}
+        for nombre, funcion in _funciones_publicas(modulo).items():
+            if getattr(funcion, '_instrumentacion', None) is None:
+                envolturas[funcion] = self._envolver(funcion)
+        if not envolturas:
+            return
+
+        for otro in _modulos_paquete() + [modulo]:
+            espacio = vars(otro)
+            for nombre, valor in list(espacio.items()):
+                if inspect.isfunction(valor) and valor in envolturas:
+                    espacio[nombre] = envolturas[valor]
+                elif isinstance(valor, dict):
+                    for clave, entrada in list(valor.items()):
+                        if isinstance(entrada, tuple) and entrada and inspect.isfunction(entrada[0]) \
+                                and entrada[0] in envolturas:
+                            valor[clave] = (envolturas[entrada[0]],) + entrada[1:]
+
+    def activar(self):
+        """
+        Activa la instrumentación e inicia una ejecución nueva.
+
+        Retorno:
+        Instrumentacion: La propia instrumentación.
+        """
+
+        if self.activa:
+            return self
+        if self.ejecucion is None:
+            self.ejecucion = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._inicio_tracemalloc = True
+
+        paquete = __name__.rpartition('.')[0]
+        for nombre in self.modulos:
+            self.instrumentar_modulo(importlib.import_module(f'{paquete}.{nombre}' if paquete else nombre))
+        self.activa = True
+        return self
+
+    def desactivar(self):
+        """
+        Restaura las funciones originales en todos los módulos del paquete.
+        """
+
+        for modulo in _modulos_paquete():
+            espacio = vars(modulo)
+            for nombre, valor in list(espacio.items()):
+                if getattr(valor, '_instrumentacion', None) is self:
+                    espacio[nombre] = valor.__wrapped__
+                elif isinstance(valor, dict):
+                    for clave, entrada in list(valor.items()):
+                        if isinstance(entrada, tuple) and entrada \
+                                and getattr(entrada[0], '_instrumentacion', None) is self:
+                            valor[clave] = (entrada[0].__wrapped__,) + entrada[1:]
+
+        if self._inicio_tracemalloc:
+            tracemalloc.stop()
+            self._inicio_tracemalloc = False
+        self.activa = False
+
+    def tabla(self):
+        """
+        Devuelve las llamadas registradas, una por fila.
+
+        Retorno:
+        pd.DataFrame: Registro de llamadas.
+        """
+
+        return pd.DataFrame(self.registros)
+
+    def resumen(self):
+        """
+        Devuelve el resumen por función de las llamadas registradas (ver `resumir`).
+
+        Retorno:
+        pd.DataFrame: Resumen ordenado por tiempo propio.
+        """
+
+        return resumir(self.tabla())
+
+
+def resumir(registros):
+    """
+    Resume un registro de llamadas por ejecución y función.
+
+    - Suma los tiempos de reloj, propios y de CPU, y calcula el porcentaje del tiempo propio de la ejecución.
+    - Toma el máximo de la memoria pico y de las filas de entrada.
+
+    Parámetros:
+    registros (pd.DataFrame): Llamadas registradas (`Instrumentacion.tabla` o `leer_log`).
+
+    Retorno:
+    pd.DataFrame: Resumen con índice (ejecucion, funcion), ordenado por tiempo propio dentro de cada ejecución.
+    """
+
+    if registros.empty:
+        return pd.DataFrame(columns=COLUMNAS_RESUMEN)
+
+    resumen = registros.groupby(['ejecucion', 'funcion']).agg(
+        llamadas=('funcion', 'size'),
+        tiempo_s=('tiempo_s', 'sum'),
+        tiempo_propio_s=('tiempo_propio_s', 'sum'),
+        cpu_s=('cpu_s', 'sum'),
+        memoria_pico_mb=('memoria_pico_mb', 'max'),
+        filas_entrada=('filas_entrada', 'max'),
+    )
+    total = resumen.groupby(level='ejecucion')['tiempo_propio_s'].transform('sum')
+    resumen['porcentaje'] = (resumen['tiempo_propio_s'] / total * 100).round(1)
+    resumen = resumen.sort_values(['ejecucion', 'tiempo_propio_s'], ascending=[True, False])
+    return resumen[COLUMNAS_RESUMEN]
+
+
+def leer_log(ruta):
+    """
+    Lee un log JSON lines escrito por la instrumentación.
+
+    Parámetros:
+    ruta (str): Ruta del fichero.
+
+    Retorno:
+    pd.DataFrame: Registro de llamadas.
+    """
+
+    return pd.read_json(ruta, lines=True, dtype={'ejecucion': str})
+
+
+def instrumentar(modulos=MODULOS, memoria=True, ruta_log=None, ejecucion=None):
+    """
+    Crea una instrumentación para usar como gestor de contexto.
+
+    Ejemplo:
+        with instrumentar() as inst:
+            renderizar_informe(df)
+        inst.resumen()
+
+    Parámetros:
+    modulos (tuple, opcional): Nombres de los módulos de `src` a instrumentar (por defecto `MODULOS`).
+    memoria (bool, opcional): Si es True, mide la memoria con tracemalloc (por defecto True).
+    ruta_log (str, opcional): Fichero JSON lines donde añadir cada llamada (por defecto no se guarda).
+    ejecucion (str, opcional): Identificador de la ejecución (por defecto, fecha, hora y PID).
+
+    Retorno:
+    Instrumentacion: Instrumentación sin activar; se activa al entrar en el bloque `with`.
+    """
+
+    return Instrumentacion(modulos, memoria=memoria, ruta_log=ruta_log, ejecucion=ejecucion)
+
+
+def _mostrar_resumen_global():
+    """Muestra por stderr el resumen de la instrumentación activada por entorno al terminar el proceso."""
+
+    if _GLOBAL is not None and _GLOBAL.registros and _GLOBAL.ruta_log is None:
+        with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.max_rows', 200):
+            print(_GLOBAL.resumen().round(4), file=sys.stderr)
+
+
+def instrumentar_si_activado(nombre_modulo):
+    """
+    Instrumenta un módulo al importarlo si la variable de entorno `SP_INSTRUMENTACION` está activada.
+
+    Todas las llamadas del proceso forman una única ejecución. Al terminar, el resumen se muestra por
+    stderr, salvo que se guarde en el log de `SP_INSTRUMENTACION_LOG`.
+
+    Parámetros:
+    nombre_modulo (str): Nombre del módulo (`__name__`).
+    """
+
+    global _GLOBAL
+
+    if not _activado(os.environ.get(VARIABLE_ENTORNO)):
+        return
+    if _GLOBAL is None:
+        _GLOBAL = Instrumentacion(memoria=_activado(os.environ.get(VARIABLE_MEMORIA, '1')),
+                                  ruta_log=os.environ.get(VARIABLE_LOG) or None)
+        _GLOBAL.ejecucion = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        if _GLOBAL.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _GLOBAL.activa = True
+        atexit.register(_mostrar_resumen_global)
+    _GLOBAL.instrumentar_modulo(sys.modules[nombre_modulo])
@@ -0,0 +1,128 @@
+import argparse
+import json
+import os
+import shutil
+
+import pandas as pd
+import numpy as np
+
+from .sp_almacen import DIRECTORIO_PROCESADO, cargar_etapa
+from .sp_tipos import a_numpy
+
+
+# Directorio del almacén de columnas mapeadas en memoria (data/data_processed/mmap)
+DIRECTORIO_MMAP = os.path.join(DIRECTORIO_PROCESADO, 'mmap')
+
+# Fichero con el esquema del almacén: nombre, tipo y fichero de cada columna y categorías del texto
+FICHERO_METADATOS = 'metadatos.json'
+
+
+def _codigos(serie):
+    """Códigos enteros (el tipo más pequeño posible, -1 para los nulos) y categorías de una columna de texto."""
+
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype('category')
+    categorias = serie.cat.categories
+    tipo = np.min_scalar_type(-len(categorias) - 1)
+    return serie.cat.codes.to_numpy().astype(tipo), [str(c) for c in categorias]
+
+
+def exportar(df, directorio=DIRECTORIO_MMAP):
+    """
+    Exporta un DataFrame a un almacén columnar de ficheros .npy que se pueden mapear en memoria.
+
+    - Cada columna numérica se guarda como un array de NumPy (los nulos de los enteros pasan a float64 con NaN).
+    - Las fechas se guardan como datetime64[ns].
+    - Las columnas de texto o categoría se guardan como códigos enteros; las categorías van en `metadatos.json`.
+    - El esquema se escribe al final, de modo que un almacén a medio escribir no se puede cargar.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a exportar (por ejemplo, la etapa 'conjunto_datos_final').
+    directorio (str, opcional): Directorio del almacén (por defecto `DIRECTORIO_MMAP`); se sustituye si existe.
+
+    Retorno:
+    str: Ruta del fichero de metadatos.
+    """
+
+    if os.path.isdir(directorio):
+        shutil.rmtree(directorio)
+    os.makedirs(directorio)
+
+    columnas = []
+    for i, col in enumerate(df.columns):
+        serie = a_numpy(df[col])
+        fichero = f'columna_{i:03d}.npy'
+        info = {'nombre': col, 'fichero': fichero}
+
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            valores = serie.to_numpy(dtype='datetime64[ns]')
+            info['tipo'] = 'fecha'
+        elif pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+            valores = serie.to_numpy()
+            info['tipo'] = 'numerico'
+        else:
+            valores, info['categorias'] = _codigos(serie)
+            info['tipo'] = 'categoria'
+
+        np.save(os.path.join(directorio, fichero), np.ascontiguousarray(valores))
+        info['dtype'] = str(valores.dtype)
+        columnas.append(info)
+
+    ruta = os.path.join(directorio, FICHERO_METADATOS)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({'n_filas': int(df.shape[0]), 'columnas': columnas}, f, indent=2, ensure_ascii=False)
+    return ruta
+
+
+def cargar(directorio=DIRECTORIO_MMAP, columnas=None):
+    """
+    Carga el almacén exportado con `exportar` mapeando sus ficheros en memoria en modo solo lectura.
+
+    - Los arrays no se leen ni se copian: el sistema operativo carga las páginas al acceder a ellas y
+      todos los procesos que cargan el mismo almacén comparten una única copia física en la caché de páginas.
+    - Las columnas de texto se reconstruyen como categorías sobre los códigos mapeados.
+    - El DataFrame es de solo lectura: modificar sus columnas in place lanza un error.
+
+    Parámetros:
+    directorio (str, opcional): Directorio del almacén (por defecto `DIRECTORIO_MMAP`).
+    columnas (list, opcional): Columnas a cargar (por defecto todas).
+
+    Retorno:
+    pd.DataFrame: DataFrame respaldado por los ficheros mapeados en memoria.
+    """
+
+    ruta = os.path.join(directorio, FICHERO_METADATOS)
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f'No existe el almacén mapeado en memoria en {directorio}')
+
+    with open(ruta, encoding='utf-8') as f:
+        metadatos = json.load(f)
+
+    datos = {}
+    for info in metadatos['columnas']:
+        if columnas is not None and info['nombre'] not in columnas:
+            continue
+        valores = np.load(os.path.join(directorio, info['fichero']), mmap_mode='r')
+        if info['tipo'] == 'categoria':
+            tipo = pd.CategoricalDtype(info['categorias'])
+            valores = pd.Categorical.from_codes(valores, dtype=tipo, validate=False)
+        datos[info['nombre']] = valores
+
+    # copy=False conserva cada array mapeado como bloque propio, sin consolidarlos en una copia
+    orden = [c['nombre'] for c in metadatos['columnas'] if c['nombre'] in datos]
+    return pd.DataFrame({col: datos[col] for col in orden}, copy=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exporta una etapa al almacén de columnas mapeadas en memoria.')
+    parser.add_argument('--etapa', default='conjunto_datos_final', help='Etapa del almacén a exportar')
+    parser.add_argument('--directorio', default=DIRECTORIO_MMAP, help='Directorio del almacén')
+    args = parser.parse_args()
+
+    ruta = exportar(cargar_etapa(args.etapa), args.directorio)
+    tamano = sum(os.path.getsize(os.path.join(args.directorio, f)) for f in os.listdir(args.directorio))
+    print(f'Almacén exportado en {os.path.dirname(ruta)} ({tamano / 1024 ** 2:.1f} MB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+from . import sp_cache
+from .sp_cubo import DIMENSIONES, construir_cubo, enrollar
+from .sp_derivadas import columnas_derivadas
+
+
+# Filas a partir de las cuales se usa el pool de procesos. Arrancar el pool, repetir en cada proceso las
+# columnas derivadas y devolver los parciales cuesta unos 0,25 s fijos, mientras que el cubo en serie tarda
+# unos 0,75 s por millón de filas: por debajo de ~1M de filas el pool es más lento que el cálculo en serie
+# (unas 4 veces con 200.000 filas) y solo compensa con varios núcleos libres y millones de filas.
+MIN_FILAS_PARALELO = 1_000_000
+
+# Dataset compartido con los procesos del pool (fork): cada proceso recibe solo las posiciones de sus filas
+_DATOS = None
+
+
+def _clave_particion(df, particion):
+    if particion in df.columns:
+        return df[particion]
+    if particion == 'Year':
+        return columnas_derivadas(df)['Order_Date'].dt.year
+    raise KeyError(f'No existe la columna de partición {particion!r}')
+
+
+def particionar(df, particion='Market', n_particiones=None):
+    """
+    Reparte las filas del DataFrame en particiones por los valores de una columna, equilibrando su tamaño.
+
+    Todas las filas de un mismo valor (por ejemplo, un mercado o un año) van a la misma partición.
+    Los valores se asignan de mayor a menor número de filas a la partición con menos filas.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a repartir.
+    particion (str, opcional): Columna por la que repartir, por ejemplo 'Market' o 'Year' (por defecto 'Market').
+    n_particiones (int, opcional): Número de particiones (por defecto, número de núcleos).
+
+    Retorno:
+    list: Posiciones (np.ndarray) de las filas de cada partición no vacía.
+    """
+
+    n_particiones = n_particiones or os.cpu_count() or 1
+    codigos, valores = pd.factorize(_clave_particion(df, particion), use_na_sentinel=False)
+    tamanos = np.bincount(codigos, minlength=len(valores))
+
+    asignacion = np.empty(len(valores), dtype=np.int64)
+    carga = np.zeros(n_particiones, dtype=np.int64)
+    for valor in np.argsort(-tamanos, kind='stable'):
+        destino = int(np.argmin(carga))
+        asignacion[valor] = destino
+        carga[destino] += tamanos[valor]
+
+    particion_fila = asignacion[codigos]
+    orden = np.argsort(particion_fila, kind='stable')
+    limites = np.searchsorted(particion_fila[orden], np.arange(n_particiones + 1))
+    return [orden[limites[i]:limites[i + 1]] for i in range(n_particiones) if limites[i + 1] > limites[i]]
+
+
+def _parte(datos):
+    """Devuelve la parte del dataset de un proceso: las filas indicadas del dataset compartido, o el propio bloque."""
+
+    return _DATOS.iloc[datos] if isinstance(datos, np.ndarray) else datos
+
+
+def _cubo_parcial(datos):
+    return construir_cubo(_parte(datos))
+
+
+def _agregado_parcial(datos, por, medidas):
+    bloque = _parte(datos)
+    valores = bloque[medidas]
+    grupos = pd.concat([valores, (valores ** 2).add_suffix('_sumsq')], axis=1).groupby(
+        [bloque[col] for col in por], observed=True, dropna=False, sort=False)
+
+    return pd.concat([
+        grupos[medidas].sum().add_suffix('_sum'),
+        grupos[medidas].count().add_suffix('_count'),
+        grupos[[f'{m}_sumsq' for m in medidas]].sum(),
+        grupos.size().rename('n_filas'),
+    ], axis=1).reset_index()
+
+
+def _ejecutar(df, funcion, particion, procesos, min_filas, *args):
+    """
+    Aplica `funcion` a cada partición en un pool de procesos y devuelve los resultados parciales.
+
+    Con menos de `min_filas` filas, un solo proceso o una sola partición, la aplica en serie a todo el DataFrame.
+    """
+
+    global _DATOS
+
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1 or len(df) < min_filas:
+        return [funcion(df, *args)]
+    filas = particionar(df, particion, procesos)
+    if len(filas) == 1:
+        return [funcion(df, *args)]
+
+    # Con fork, los procesos heredan el DataFrame y solo reciben posiciones de filas;
+    # en otro caso, cada uno recibe su bloque serializado
+    fork = 'fork' in mp.get_all_start_methods()
+    contexto = mp.get_context('fork' if fork else 'spawn')
+    tareas = filas if fork else [df.iloc[f] for f in filas]
+
+    anterior = _DATOS
+    _DATOS = df
+    try:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(tareas)), mp_context=contexto) as pool:
+            return list(pool.map(funcion, tareas, *([arg] * len(tareas) for arg in args)))
+    finally:
+        _DATOS = anterior
+
+
+def fusionar_cubos(partes):
+    """
+    Combina cubos parciales (de particiones disjuntas de filas) en un único cubo exacto.
+
+    Las columnas '_sum', '_count', '_sumsq' y 'n_filas' son sumas, así que se suman por celda.
+
+    Parámetros:
+    partes (list): Cubos parciales (ver `sp_cubo.construir_cubo`).
+
+    Retorno:
+    pd.DataFrame: Cubo combinado.
+    """
+
+    cubo = pd.concat(partes, ignore_index=True)
+    dims = [dim for dim in DIMENSIONES if dim in cubo.columns]
+    return cubo.groupby(dims, observed=True, dropna=False, sort=False).sum().reset_index()
+
+
+def construir_cubo_paralelo(df, particion='Market', procesos=None, min_filas=MIN_FILAS_PARALELO):
+    """
+    Construye el cubo de ventas repartiendo las filas por mercado o por año en un pool de procesos.
+
+    Cada proceso construye el cubo de su partición (sumas, recuentos y sumas de cuadrados) y los cubos
+    parciales se combinan de forma exacta con `fusionar_cubos`; las medias y desviaciones se obtienen
+    después, al enrollar. Con menos de `min_filas` filas se construye en serie (`sp_cubo.construir_cubo`),
+    porque el coste fijo del pool supera lo que se ahorra (ver `MIN_FILAS_PARALELO`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las dimensiones y medidas del cubo.
+    particion (str, opcional): 'Market' o 'Year' (por defecto 'Market').
+    procesos (int, opcional): Número de procesos (por defecto, número de núcleos).
+    min_filas (int, opcional): Filas mínimas para usar el pool (por defecto `MIN_FILAS_PARALELO`).
+
+    Retorno:
+    pd.DataFrame: Cubo de ventas, igual al de `sp_cubo.construir_cubo`.
+    """
+
+    return fusionar_cubos(_ejecutar(df, _cubo_parcial, particion, procesos, min_filas))
+
+
+def obtener_cubo_paralelo(df, particion='Market', procesos=None, min_filas=MIN_FILAS_PARALELO):
+    """
+    Construye el cubo en paralelo y lo memoriza como el cubo del DataFrame (`sp_cache`).
+
+    Las funciones de gráficos que leen `sp_cubo.obtener_cubo` (mercados_rentabilidad, tiempo_envio,
+    eficiencia_metodos_envio, categorias_mas_vendidas...) usan a partir de entonces este cubo.
+    """
+
+    return sp_cache.obtener(df, 'cubo', lambda: construir_cubo_paralelo(df, particion, procesos, min_filas))
+
+
+def agregar_paralelo(df, por, medidas, particion='Market', procesos=None, min_filas=MIN_FILAS_PARALELO):
+    """
+    Agrega columnas del DataFrame por grupo en un pool de procesos, con medias y desviaciones exactas.
+
+    Cada proceso calcula sumas, recuentos y sumas de cuadrados de su partición; los parciales se
+    combinan sumándolos y las medias y desviaciones se derivan al final (`sp_cubo.enrollar`).
+    Con menos de `min_filas` filas se agrega en serie.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a agregar.
+    por (str o list): Columna o columnas de agrupación.
+    medidas (list): Columnas numéricas a agregar.
+    particion (str, opcional): Columna por la que repartir las filas, 'Market' o 'Year' (por defecto 'Market').
+    procesos (int, opcional): Número de procesos (por defecto, número de núcleos).
+    min_filas (int, opcional): Filas mínimas para usar el pool (por defecto `MIN_FILAS_PARALELO`).
+
+    Retorno:
+    pd.DataFrame: Una fila por grupo con '_sum', '_count', '_mean' y '_std' de cada medida y 'n_filas'.
+    """
+
+    por = [por] if isinstance(por, str) else list(por)
+    medidas = list(medidas)
+    parciales = _ejecutar(df, _agregado_parcial, particion, procesos, min_filas, por, medidas)
+    return enrollar(pd.concat(parciales, ignore_index=True), por, medidas)
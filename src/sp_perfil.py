@@ -0,0 +1,206 @@
+import builtins
+import weakref
+
+import pandas as pd
+
+from . import sp_cache
+
+
+class PerfilDatos:
+    """
+    Informe estructurado con el perfil de un DataFrame.
+
+    Atributos:
+    n_filas (int): Número de filas del DataFrame.
+    dtypes (pd.Series): Tipo de dato de cada columna.
+    nulos (pd.Series): Número de valores nulos por columna.
+    porcentaje_nulos (pd.Series): Porcentaje de valores nulos por columna.
+    cardinalidad (pd.Series): Número de valores únicos (sin contar nulos) por columna.
+    frecuencias (dict): Recuento de valores (pd.Series) de cada columna categórica, de mayor a menor
+                        (en el perfil por bloques de `sp_streaming`, solo los valores más frecuentes).
+    duplicados (int): Número de filas duplicadas. En el perfil de `perfilar` se cuentan la primera vez
+                      que se consultan, para no comparar todas las columnas si no se usan.
+    resumen_numerico (pd.DataFrame): Estadísticos descriptivos de las columnas numéricas.
+    top_k (int): Número de valores a devolver por defecto en `top`.
+    """
+
+    def __init__(self, n_filas, dtypes, nulos, cardinalidad, frecuencias, duplicados,
+                 resumen_numerico, top_k=10):
+        self.n_filas = n_filas
+        self.dtypes = dtypes
+        self.nulos = nulos
+        self.porcentaje_nulos = (nulos / n_filas * 100) if n_filas else nulos.astype(float)
+        self.cardinalidad = cardinalidad
+        self.frecuencias = frecuencias
+        self._duplicados = duplicados
+        self.resumen_numerico = resumen_numerico
+        self.top_k = top_k
+
+    def __repr__(self):
+        return (f'PerfilDatos(n_filas={self.n_filas}, columnas={len(self.dtypes)}, '
+                f'duplicados={self.duplicados})')
+
+    @property
+    def duplicados(self):
+        """Número de filas duplicadas (None si no se han contado)."""
+        if callable(self._duplicados):
+            self._duplicados = self._duplicados()
+        return self._duplicados
+
+    @property
+    def columnas_categoricas(self):
+        """Lista de columnas categóricas incluidas en el perfil."""
+        return list(self.frecuencias)
+
+    def top(self, col, k=None):
+        """
+        Devuelve los `k` valores más frecuentes de una columna categórica.
+
+        Parámetros:
+        col (str): Nombre de la columna.
+        k (int, opcional): Número de valores a devolver (por defecto `top_k`).
+
+        Retorno:
+        pd.Series: Recuento de los valores más frecuentes.
+        """
+
+        return self.frecuencias[col].head(self.top_k if k is None else k)
+
+    def proporciones(self, col):
+        """
+        Devuelve la distribución en tanto por uno de los valores de una columna categórica.
+
+        Equivale a `df[col].value_counts(normalize=True)`.
+        """
+
+        vc = self.frecuencias[col]
+        total = self.n_filas - self.nulos[col]
+        return (vc / total if total else vc.astype(float)).rename('proportion')
+
+    def describir_cat(self, col):
+        """
+        Devuelve los estadísticos descriptivos de una columna categórica.
+
+        Equivale a `df[col].describe()` (count, unique, top y freq).
+        """
+
+        vc = self.frecuencias[col]
+        datos = {'count': self.n_filas - self.nulos[col], 'unique': self.cardinalidad[col]}
+        if len(vc):
+            datos['top'] = vc.index[0]
+            datos['freq'] = vc.iloc[0]
+        return pd.Series(datos, name=col, dtype=object)
+
+    def info_nulos(self):
+        """
+        Devuelve un DataFrame con las columnas que tienen nulos: nombre, tipo de dato,
+        número de nulos y porcentaje de nulos.
+        """
+
+        con_nulos = self.nulos[self.nulos > 0].index
+        return pd.DataFrame(
+            {'Column': con_nulos,
+             'Datatype': self.dtypes[con_nulos].values,
+             'NullCount': self.nulos[con_nulos].values,
+             'Null%': self.porcentaje_nulos[con_nulos].values}
+             )
+
+
+def mostrar_tabla(objeto):
+    """
+    Muestra un DataFrame o Series con `display` en IPython/Jupyter y con `print` fuera de él
+    (por ejemplo, en un script o un proceso por lotes).
+
+    Parámetros:
+    objeto (object): Objeto a mostrar.
+    """
+
+    mostrar = getattr(builtins, 'display', None)
+    if mostrar is None:
+        print(objeto)
+    else:
+        mostrar(objeto)
+
+
+def columnas_categoricas(df):
+    """
+    Devuelve las columnas categóricas (texto o categoría) de un DataFrame.
+    """
+
+    return df.select_dtypes(include=['object', 'category', 'string']).columns
+
+
+def recuento_valores(serie):
+    """
+    Devuelve el recuento de valores de una columna, sin las categorías que no aparecen en los datos.
+    """
+
+    vc = serie.value_counts()
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        vc = vc[vc > 0]
+    return vc
+
+
+def perfilar(df, top_k=10, usar_cache=True):
+    """
+    Calcula el perfil completo de un DataFrame, con un único cálculo de cada estadístico.
+
+    - Cuenta los nulos de todas las columnas con una única llamada a `isnull()`.
+    - Calcula un único `value_counts()` por columna categórica, del que se obtienen
+      la cardinalidad, el top-k, las proporciones y el describe.
+    - Cuenta las filas duplicadas y calcula el resumen de las columnas numéricas una vez.
+
+    El perfil se guarda en caché asociado al DataFrame, de modo que las siguientes llamadas
+    sobre el mismo DataFrame (sin cambios de estructura) no vuelven a recorrer los datos.
+    Si el DataFrame se modifica sin cambiar su estructura, usar `sp_cache.invalidar(df)`.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a analizar.
+    top_k (int, opcional): Número de valores más frecuentes a devolver por defecto (por defecto 10).
+    usar_cache (bool, opcional): Si es False, recalcula el perfil aunque esté en caché.
+
+    Retorno:
+    PerfilDatos: Informe con el perfil del DataFrame.
+    """
+
+    if not usar_cache:
+        return _calcular_perfil(df, top_k)
+
+    perfil = sp_cache.obtener(df, 'perfil', lambda: _calcular_perfil(df, top_k))
+    perfil.top_k = top_k
+    return perfil
+
+
+def _calcular_perfil(df, top_k):
+    nulos = df.isnull().sum()
+
+    frecuencias = {}
+    cardinalidad = {}
+    col_cat = set(columnas_categoricas(df))
+    for col in df.columns:
+        if col in col_cat:
+            frecuencias[col] = recuento_valores(df[col])
+            cardinalidad[col] = len(frecuencias[col])
+        else:
+            cardinalidad[col] = df[col].nunique()
+
+    numericas = df.select_dtypes(include=['number'])
+    resumen_numerico = numericas.describe() if numericas.shape[1] else pd.DataFrame()
+
+    # Referencia débil: el perfil queda en la caché del DataFrame y no debe mantenerlo vivo
+    ref = weakref.ref(df)
+
+    def contar_duplicados():
+        datos = ref()
+        return None if datos is None else int(datos.duplicated().sum())
+
+    return PerfilDatos(
+        n_filas=df.shape[0],
+        dtypes=df.dtypes,
+        nulos=nulos,
+        cardinalidad=pd.Series(cardinalidad, dtype='int64'),
+        frecuencias=frecuencias,
+        duplicados=contar_duplicados,
+        resumen_numerico=resumen_numerico,
+        top_k=top_k,
+    )
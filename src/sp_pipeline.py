@@ -0,0 +1,358 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+from .sp_almacen import DIRECTORIO_RAW, DIRECTORIO_CACHE, guardar_etapa, cargar_etapa, huella_fichero
+from .sp_cleaning import (COLUMNAS_INDICADORES, renombrar_indicadores, limpiar_columnas, convertir_col,
+                          agregar_columnas_fecha, RecortadorOutliers)
+from .sp_cubo import construir_cubo
+from .sp_indicadores import RUTA_ALIAS, RUTA_INDICADORES, TablaIndicadores, cargar_alias
+
+
+# Fichero de ventas de origen (data/data_raw)
+RUTA_SUPERSTORE = os.path.join(DIRECTORIO_RAW, 'superstore.csv')
+
+# Columnas cuyos outliers se recortan; los de los datos macroeconómicos se mantienen (notebook 4)
+COLUMNAS_OUTLIERS = ["Profit", "Quantity", "Sales", "Shipping_Cost", "Discount"]
+
+# Columnas con nulos que se imputan con la mediana (notebook 4)
+COLUMNAS_IMPUTAR = COLUMNAS_INDICADORES
+
+
+class Etapa:
+    """
+    Etapa del pipeline: una función de sus entradas y parámetros que produce un DataFrame.
+
+    Parámetros:
+    nombre (str): Nombre de la etapa.
+    funcion (callable): Función que recibe las salidas de las dependencias (en orden) y los parámetros.
+    dependencias (tuple, opcional): Nombres de las etapas de las que depende.
+    parametros (dict, opcional): Argumentos con nombre de la función.
+    ficheros (tuple, opcional): Parámetros que son rutas de fichero; su contenido forma parte de la huella.
+    publicar (tuple, opcional): Nombres con los que se guarda la salida en `DIRECTORIO_PROCESADO`
+                                para cargarla desde los notebooks con `cargar_etapa`.
+    version (int, opcional): Versión de la etapa; incrementarla fuerza el recálculo cuando cambia algo
+                             que no es código del paquete (por ejemplo, una versión de pandas). Los
+                             cambios en los módulos de `src` que usa la etapa ya cambian su huella.
+    """
+
+    def __init__(self, nombre, funcion, dependencias=(), parametros=None, ficheros=(), publicar=(), version=1):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.dependencias = tuple(dependencias)
+        self.parametros = dict(parametros or {})
+        self.ficheros = tuple(ficheros)
+        self.publicar = tuple(publicar)
+        self.version = version
+
+    def __repr__(self):
+        return f'Etapa({self.nombre!r}, dependencias={list(self.dependencias)})'
+
+
+def _modulos_usados(funcion):
+    """
+    Devuelve los módulos del paquete de los que depende una función: los de las funciones, clases y
+    módulos que nombra (incluido el suyo si usa otras funciones de él, como `construir_cubo`) y, de
+    forma transitiva, los que esos módulos importan.
+    """
+
+    paquete = __name__.rpartition('.')[0]
+
+    def modulos_de(espacio, nombres):
+        for nombre in nombres:
+            objeto = espacio.get(nombre)
+            modulo = objeto.__name__ if inspect.ismodule(objeto) else getattr(objeto, '__module__', None)
+            if isinstance(modulo, str) and modulo.startswith(paquete + '.'):
+                yield modulo
+
+    pendientes = list(modulos_de(funcion.__globals__, funcion.__code__.co_names))
+    usados = set()
+    while pendientes:
+        modulo = pendientes.pop()
+        if modulo in usados:
+            continue
+        usados.add(modulo)
+        espacio = vars(sys.modules[modulo])
+        pendientes.extend(modulos_de(espacio, list(espacio)))
+    return sorted(usados)
+
+
+def _leer_superstore(ruta):
+    return pd.read_csv(ruta)
+
+
+def _leer_indicadores(ruta):
+    return renombrar_indicadores(pd.read_excel(ruta))
+
+
+def _unir(superstore, indicadores, ruta_alias):
+    return TablaIndicadores(indicadores).unir(superstore, alias=cargar_alias(ruta_alias))[0]
+
+
+def _limpiar(df):
+    df = limpiar_columnas(df)
+    convertir_col(df)
+    agregar_columnas_fecha(df)
+    return df
+
+
+def _recortar_outliers(df, columnas, factor):
+    return RecortadorOutliers(factor).fit_transform(df, columnas)
+
+
+def _imputar_mediana(df, columnas):
+    columnas = [col for col in columnas if col in df.columns]
+    return df.fillna(df[columnas].median())
+
+
+def etapas_por_defecto(ruta_superstore=RUTA_SUPERSTORE, ruta_indicadores=RUTA_INDICADORES, ruta_alias=RUTA_ALIAS):
+    """
+    Declara las etapas de los notebooks 1 a 4 y el cubo de ventas como un grafo (DAG).
+
+    superstore ─┐
+                ├─ transformacion ─ limpieza ─ outliers ─ conjunto_datos_final ─ cubo
+    indicadores ┘
+
+    Parámetros:
+    ruta_superstore (str, opcional): Ruta de superstore.csv (por defecto `RUTA_SUPERSTORE`).
+    ruta_indicadores (str, opcional): Ruta de indicators.xlsx (por defecto `RUTA_INDICADORES`).
+    ruta_alias (str, opcional): Tabla de alias de países del cruce (por defecto `RUTA_ALIAS`).
+
+    Retorno:
+    dict: Etapas indexadas por nombre.
+    """
+
+    etapas = [
+        Etapa('superstore', _leer_superstore, parametros={'ruta': ruta_superstore}, ficheros=('ruta',)),
+        Etapa('indicadores', _leer_indicadores, parametros={'ruta': ruta_indicadores}, ficheros=('ruta',)),
+        Etapa('transformacion', _unir, dependencias=('superstore', 'indicadores'),
+              parametros={'ruta_alias': ruta_alias}, ficheros=('ruta_alias',), publicar=('transformacion',)),
+        Etapa('limpieza', _limpiar, dependencias=('transformacion',), publicar=('limpieza', 'nulos_cat')),
+        Etapa('outliers', _recortar_outliers, dependencias=('limpieza',),
+              parametros={'columnas': COLUMNAS_OUTLIERS, 'factor': 1.5}),
+        Etapa('conjunto_datos_final', _imputar_mediana, dependencias=('outliers',),
+              parametros={'columnas': COLUMNAS_IMPUTAR}, publicar=('conjunto_datos_final',)),
+        Etapa('cubo', construir_cubo, dependencias=('conjunto_datos_final',)),
+    ]
+    return {etapa.nombre: etapa for etapa in etapas}
+
+
+class Pipeline:
+    """
+    Pipeline de etapas con caché por contenido.
+
+    - La huella de cada etapa es el hash de su código, del código de los módulos del paquete que usa,
+      su versión, sus parámetros, el contenido de sus ficheros de origen y las huellas de sus
+      dependencias. Si cambia cualquiera de ellos, cambia la huella de la etapa y la de todas las
+      que dependen de ella, y solo esas se recalculan.
+    - La salida de cada etapa se guarda en `directorio_cache` con su huella en el nombre del fichero.
+      Una etapa cuya salida ya está en caché se carga sin cargar ni calcular sus dependencias.
+
+    Parámetros:
+    etapas (dict, opcional): Etapas indexadas por nombre (por defecto `etapas_por_defecto()`).
+    directorio_cache (str, opcional): Directorio de la caché (por defecto `DIRECTORIO_CACHE`).
+    """
+
+    def __init__(self, etapas=None, directorio_cache=None):
+        self.etapas = etapas_por_defecto() if etapas is None else dict(etapas)
+        self.directorio_cache = directorio_cache or DIRECTORIO_CACHE
+        self._comprobar_grafo()
+
+    def __repr__(self):
+        return f'Pipeline(etapas={list(self.etapas)})'
+
+    def _comprobar_grafo(self):
+        for etapa in self.etapas.values():
+            for dep in etapa.dependencias:
+                if dep not in self.etapas:
+                    raise ValueError(f'La etapa {etapa.nombre!r} depende de {dep!r}, que no existe')
+        self.orden()
+
+    def orden(self, objetivos=None):
+        """
+        Devuelve las etapas necesarias para los objetivos en orden topológico.
+
+        Parámetros:
+        objetivos (list, opcional): Etapas a obtener (por defecto todas).
+
+        Retorno:
+        list: Nombres de las etapas, cada una después de sus dependencias.
+        """
+
+        objetivos = list(self.etapas) if objetivos is None else list(objetivos)
+        orden, visitando = [], set()
+
+        def visitar(nombre):
+            if nombre in orden:
+                return
+            if nombre in visitando:
+                raise ValueError(f'El grafo de etapas tiene un ciclo en {nombre!r}')
+            visitando.add(nombre)
+            for dep in self.etapas[nombre].dependencias:
+                visitar(dep)
+            visitando.discard(nombre)
+            orden.append(nombre)
+
+        for nombre in objetivos:
+            if nombre not in self.etapas:
+                raise KeyError(f'No existe la etapa {nombre!r}')
+            visitar(nombre)
+        return orden
+
+    def huellas(self, objetivos=None):
+        """
+        Calcula la huella de cada etapa sin ejecutar ninguna.
+
+        Parámetros:
+        objetivos (list, opcional): Etapas a considerar (por defecto todas).
+
+        Retorno:
+        dict: Huella (str) por nombre de etapa.
+        """
+
+        huellas = {}
+        for nombre in self.orden(objetivos):
+            etapa = self.etapas[nombre]
+            # Un fichero opcional que no existe (por ejemplo, la tabla de alias) cuenta como vacío
+            parametros = {k: ((huella_fichero(v) if os.path.exists(v) else None) if k in etapa.ficheros else v)
+                          for k, v in etapa.parametros.items()}
+            contenido = json.dumps({
+                'nombre': nombre,
+                'codigo': inspect.getsource(etapa.funcion),
+                # Código de las funciones auxiliares y constantes de `src` que usa (sp_cleaning, sp_indicadores...)
+                'modulos': {modulo: hashlib.sha256(inspect.getsource(sys.modules[modulo]).encode()).hexdigest()
+                            for modulo in _modulos_usados(etapa.funcion)},
+                'version': etapa.version,
+                'parametros': parametros,
+                'dependencias': [huellas[dep] for dep in etapa.dependencias],
+            }, sort_keys=True, default=str)
+            huellas[nombre] = hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:16]
+        return huellas
+
+    def _nombre_cache(self, nombre, huella):
+        return f'{nombre}_{huella}'
+
+    def en_cache(self, nombre, huella):
+        return os.path.exists(os.path.join(self.directorio_cache, f'{self._nombre_cache(nombre, huella)}.parquet'))
+
+    def pendientes(self, objetivos=None):
+        """
+        Indica qué etapas habría que recalcular para obtener los objetivos.
+
+        Parámetros:
+        objetivos (list, opcional): Etapas a obtener (por defecto todas).
+
+        Retorno:
+        list: Nombres de las etapas sin salida en caché, en orden topológico.
+        """
+
+        huellas = self.huellas(objetivos)
+        return [nombre for nombre, huella in huellas.items() if not self.en_cache(nombre, huella)]
+
+    def ejecutar(self, objetivos=None, forzar=(), publicar=True, verbose=True):
+        """
+        Obtiene las salidas de las etapas objetivo, recalculando solo las que han cambiado.
+
+        Parámetros:
+        objetivos (list, opcional): Etapas a obtener (por defecto todas).
+        forzar (tuple, opcional): Etapas a recalcular aunque estén en caché.
+        publicar (bool, opcional): Si es True, guarda las salidas recalculadas con sus nombres de
+                                   publicación en `DIRECTORIO_PROCESADO` (por defecto True).
+        verbose (bool, opcional): Si es True, muestra para cada etapa si se cargó o se calculó (por defecto True).
+
+        Retorno:
+        dict: DataFrame de salida por nombre de etapa objetivo.
+        """
+
+        objetivos = list(self.etapas) if objetivos is None else list(objetivos)
+        huellas = self.huellas(objetivos)
+        forzar = set(forzar)
+        salidas = {}
+
+        def obtener(nombre):
+            if nombre in salidas:
+                return salidas[nombre]
+
+            etapa = self.etapas[nombre]
+            huella = huellas[nombre]
+            nombre_cache = self._nombre_cache(nombre, huella)
+            inicio = time.perf_counter()
+
+            if nombre not in forzar and self.en_cache(nombre, huella):
+                salida = cargar_etapa(nombre_cache, directorio=self.directorio_cache, formato='parquet')
+                estado = 'caché'
+            else:
+                entradas = [obtener(dep) for dep in etapa.dependencias]
+                # Índice consecutivo, igual que al cargar la salida de la caché
+                salida = etapa.funcion(*entradas, **etapa.parametros).reset_index(drop=True)
+                guardar_etapa(salida, nombre_cache, directorio=self.directorio_cache, reducir=False)
+                if publicar:
+                    for destino in etapa.publicar:
+                        guardar_etapa(salida, destino)
+                estado = 'calculada'
+
+            if verbose:
+                print(f'{nombre:22s} {huella}  {estado:9s} {time.perf_counter() - inicio:6.2f} s')
+            salidas[nombre] = salida
+            return salida
+
+        for nombre in objetivos:
+            obtener(nombre)
+        return {nombre: salidas[nombre] for nombre in objetivos}
+
+    def limpiar_cache(self):
+        """
+        Elimina de la caché las salidas que no corresponden a las huellas actuales.
+
+        Solo se consideran los ficheros escritos por el pipeline para sus etapas ('<etapa>_<huella>.parquet');
+        el resto de ficheros del directorio no se tocan.
+
+        Retorno:
+        list: Ficheros eliminados.
+        """
+
+        if not os.path.isdir(self.directorio_cache):
+            return []
+
+        vigentes = {f'{self._nombre_cache(nombre, huella)}.parquet' for nombre, huella in self.huellas().items()}
+        propios = re.compile(rf'({"|".join(map(re.escape, self.etapas))})_[0-9a-f]{{16}}\.parquet')
+        eliminados = []
+        for fichero in os.listdir(self.directorio_cache):
+            if propios.fullmatch(fichero) and fichero not in vigentes:
+                os.remove(os.path.join(self.directorio_cache, fichero))
+                eliminados.append(fichero)
+        return eliminados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ejecuta el pipeline de datos recalculando solo las etapas que han cambiado.')
+    parser.add_argument('objetivos', nargs='*', help='Etapas a obtener (por defecto todas)')
+    parser.add_argument('--forzar', nargs='+', default=[], help='Etapas a recalcular aunque estén en caché')
+    parser.add_argument('--pendientes', action='store_true', help='Solo muestra las etapas que habría que recalcular')
+    parser.add_argument('--sin-publicar', action='store_true', help='No guarda las salidas en data_processed')
+    parser.add_argument('--limpiar-cache', action='store_true', help='Elimina las salidas obsoletas de la caché')
+    args = parser.parse_args()
+
+    pipeline = Pipeline()
+    objetivos = args.objetivos or None
+
+    if args.pendientes:
+        print('\n'.join(pipeline.pendientes(objetivos)) or 'Todas las etapas están en caché')
+        return
+
+    pipeline.ejecutar(objetivos, forzar=args.forzar, publicar=not args.sin_publicar)
+
+    if args.limpiar_cache:
+        for fichero in pipeline.limpiar_cache():
+            print(f'Eliminado {fichero}')
+
+
+if __name__ == '__main__':
+    main()
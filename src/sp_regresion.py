@@ -0,0 +1,147 @@
+from statistics import NormalDist
+
+import pandas as pd
+import numpy as np
+
+from . import sp_cache
+
+
+# Variables explicativas del beneficio que se ajustan juntas en un solo cálculo
+VARIABLES_PROFIT = ['Discount', 'Inflation(%)', 'GDP_Growth(%)', 'Shipping_Cost', 'Sales']
+
+
+def _z(nivel):
+    return NormalDist().inv_cdf(0.5 + nivel / 200)
+
+
+def ajustar_regresiones(df, y='Profit', x=VARIABLES_PROFIT, por=None, nivel=95):
+    """
+    Ajusta por mínimos cuadrados una regresión lineal simple de `y` frente a cada variable de `x`,
+    en un único cálculo vectorizado y, opcionalmente, por grupo.
+
+    - Acumula n, sumas, sumas de cuadrados y de productos cruzados de todas las variables con una sola
+      agregación (un groupby si se indica `por`), descartando en cada par las filas con nulos.
+    - Obtiene en forma cerrada pendiente, intercepto, R², error estándar de la pendiente e intervalo
+      de confianza (aproximación normal, adecuada para el tamaño de los datos), sin bootstrap.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con las columnas a analizar.
+    y (str, opcional): Variable dependiente (por defecto 'Profit').
+    x (list, opcional): Variables explicativas (por defecto `VARIABLES_PROFIT`).
+    por (str o list, opcional): Columna o columnas por las que ajustar cada grupo por separado
+                                (por ejemplo, 'Market', 'Segment' o 'Category').
+    nivel (float, opcional): Nivel de confianza en porcentaje (por defecto 95).
+
+    Retorno:
+    pd.DataFrame: Una fila por grupo y variable con 'n', 'pendiente', 'intercepto', 'r2',
+                  'error_pendiente', 'ic_inf', 'ic_sup' y los estadísticos necesarios para dibujar
+                  la recta y su banda de confianza ('media_x', 'sxx', 'error_residual', 'x_min', 'x_max').
+    """
+
+    x = [x] if isinstance(x, str) else list(x)
+    por = [por] if isinstance(por, str) else (list(por) if por is not None else [])
+
+    # Centrar en la media global reduce la cancelación numérica en las sumas
+    Y = df[y].astype(float)
+    Y0 = Y - Y.mean()
+
+    columnas = {}
+    for var in x:
+        X = df[var].astype(float)
+        validos = X.notna() & Y.notna()
+        X0 = (X - X.mean()).where(validos, 0.0)
+        y0 = Y0.where(validos, 0.0)
+        columnas[(var, 'n')] = validos.astype(float)
+        columnas[(var, 'sx')] = X0
+        columnas[(var, 'sy')] = y0
+        columnas[(var, 'sxx')] = X0 * X0
+        columnas[(var, 'sxy')] = X0 * y0
+        columnas[(var, 'syy')] = y0 * y0
+        columnas[(var, 'x_min')] = X.where(validos)
+        columnas[(var, 'x_max')] = X.where(validos)
+
+    datos = pd.DataFrame(columnas, index=df.index)
+    claves = [df[col] for col in por] if por else np.zeros(len(df), dtype=int)
+    grupos = datos.groupby(claves, observed=True)
+
+    col_sumas = [c for c in datos.columns if c[1] not in ('x_min', 'x_max')]
+    sumas = grupos[col_sumas].sum()
+    minimos = grupos[[c for c in datos.columns if c[1] == 'x_min']].min()
+    maximos = grupos[[c for c in datos.columns if c[1] == 'x_max']].max()
+
+    # Pasar a formato largo: una fila por grupo y variable
+    sumas = sumas.stack(level=0, future_stack=True)
+    sumas['x_min'] = minimos.stack(level=0, future_stack=True)['x_min']
+    sumas['x_max'] = maximos.stack(level=0, future_stack=True)['x_max']
+
+    n = sumas['n']
+    variables = sumas.index.get_level_values(-1)
+    desplaz_x = df[x].astype(float).mean().reindex(variables).to_numpy()
+    desplaz_y = Y.mean()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media_x0 = sumas['sx'] / n
+        media_y0 = sumas['sy'] / n
+        Sxx = sumas['sxx'] - n * media_x0 ** 2
+        Sxy = sumas['sxy'] - n * media_x0 * media_y0
+        Syy = sumas['syy'] - n * media_y0 ** 2
+
+        pendiente = Sxy / Sxx
+        media_x = media_x0 + desplaz_x
+        media_y = media_y0 + desplaz_y
+        intercepto = media_y - pendiente * media_x
+        r2 = Sxy ** 2 / (Sxx * Syy)
+        sse = (Syy - pendiente * Sxy).clip(lower=0)
+        error_residual = np.sqrt(sse / (n - 2))
+        error_pendiente = error_residual / np.sqrt(Sxx)
+
+    z = _z(nivel)
+    resultado = pd.DataFrame({
+        'n': n.astype('int64'),
+        'pendiente': pendiente,
+        'intercepto': intercepto,
+        'r2': r2,
+        'error_pendiente': error_pendiente,
+        'ic_inf': pendiente - z * error_pendiente,
+        'ic_sup': pendiente + z * error_pendiente,
+        'media_x': media_x,
+        'sxx': Sxx,
+        'error_residual': error_residual,
+        'x_min': sumas['x_min'],
+        'x_max': sumas['x_max'],
+    })
+
+    resultado.index = resultado.index.set_names(por + ['variable'] if por else [None, 'variable'])
+    if not por:
+        resultado = resultado.droplevel(0)
+    return resultado
+
+
+def obtener_regresiones(df, y='Profit', x=VARIABLES_PROFIT, por=None, nivel=95):
+    """
+    Devuelve las regresiones de `ajustar_regresiones`, calculadas una sola vez por DataFrame (`sp_cache`).
+    """
+
+    x = [x] if isinstance(x, str) else list(x)
+    clave = ('regresion', y, tuple(x), por if por is None or isinstance(por, str) else tuple(por), nivel)
+    return sp_cache.obtener(df, clave, lambda: ajustar_regresiones(df, y, x, por, nivel))
+
+
+def banda_confianza(ajuste, xs, nivel=95):
+    """
+    Calcula la recta ajustada y la banda de confianza de la media en los puntos `xs`.
+
+    Parámetros:
+    ajuste (pd.Series): Fila del resultado de `ajustar_regresiones`.
+    xs (array): Valores de x en los que evaluar la recta.
+    nivel (float, opcional): Nivel de confianza en porcentaje (por defecto 95).
+
+    Retorno:
+    tuple: Arrays con la predicción, el límite inferior y el límite superior.
+    """
+
+    xs = np.asarray(xs, dtype=float)
+    prediccion = ajuste['intercepto'] + ajuste['pendiente'] * xs
+    error = ajuste['error_residual'] * np.sqrt(1 / ajuste['n'] + (xs - ajuste['media_x']) ** 2 / ajuste['sxx'])
+    z = _z(nivel)
+    return prediccion, prediccion - z * error, prediccion + z * error
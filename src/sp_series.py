@@ -0,0 +1,206 @@
+import pandas as pd
+import numpy as np
+
+from . import sp_cache
+from .sp_derivadas import columnas_derivadas
+
+
+# Medidas, dimensiones y granularidades del almacén de series temporales
+MEDIDAS_SERIES = ['Sales', 'Profit', 'Quantity', 'Shipping_Cost']
+DIMENSIONES_SERIES = ['Market', 'Segment', 'Category']
+GRANULARIDADES = {'D': 'Día', 'W': 'Semana', 'M': 'Mes', 'Q': 'Trimestre'}
+
+
+def _agregar_diario(df):
+    """Agrega las filas del DataFrame por dimensiones y día del pedido en una sola pasada."""
+
+    fecha = columnas_derivadas(df)['Order_Date'].dt.floor('D')
+    dims = [dim for dim in DIMENSIONES_SERIES if dim in df.columns]
+
+    datos = df[dims + MEDIDAS_SERIES].assign(Fecha=fecha, n_filas=1)
+    diario = datos.groupby(dims + ['Fecha'], observed=True, sort=False)[MEDIDAS_SERIES + ['n_filas']].sum()
+    return diario.reset_index()
+
+
+class AlmacenSeries:
+    """
+    Almacén de series temporales pre-agregadas de ventas.
+
+    - Guarda los totales diarios de Sales, Profit, Quantity y Shipping_Cost (y el número de filas)
+      por Market × Segment × Category, calculados con una única agregación sobre los pedidos.
+    - Las series semanales, mensuales y trimestrales se obtienen de los totales diarios (unas pocas
+      miles de filas), sin volver a recorrer los pedidos, y se memorizan hasta el siguiente `anexar`.
+    - Los pedidos nuevos (por ejemplo, un mes más) se añaden de forma incremental con `anexar`.
+
+    Parámetros:
+    diario (pd.DataFrame, opcional): Totales diarios ya calculados (por ejemplo, cargados con `cargar`).
+    """
+
+    def __init__(self, diario=None):
+        self.diario = diario
+        self._series = {}
+
+    def __repr__(self):
+        if self.diario is None:
+            return 'AlmacenSeries(vacío)'
+        return (f'AlmacenSeries(filas={len(self.diario)}, '
+                f'desde={self.diario["Fecha"].min():%Y-%m-%d}, hasta={self.diario["Fecha"].max():%Y-%m-%d})')
+
+    @classmethod
+    def desde_df(cls, df):
+        """
+        Construye el almacén a partir de un DataFrame de pedidos.
+
+        Parámetros:
+        df (pd.DataFrame): DataFrame con "Order_Date", las dimensiones y las medidas.
+
+        Retorno:
+        AlmacenSeries: Almacén con los totales diarios.
+        """
+
+        return cls(_agregar_diario(df))
+
+    def anexar(self, df):
+        """
+        Añade pedidos nuevos al almacén sin recalcular la historia.
+
+        Los días que ya existían (por ejemplo, un mes cargado en dos lotes) se suman.
+
+        Parámetros:
+        df (pd.DataFrame): Pedidos nuevos, con las mismas columnas que los originales.
+
+        Retorno:
+        AlmacenSeries: El propio almacén.
+        """
+
+        nuevo = _agregar_diario(df)
+        if self.diario is None:
+            self.diario = nuevo
+        else:
+            dims = [col for col in self.diario.columns if col in DIMENSIONES_SERIES] + ['Fecha']
+            solapados = nuevo['Fecha'].min() <= self.diario['Fecha'].max()
+            combinado = pd.concat([self.diario, nuevo], ignore_index=True)
+            if solapados:
+                combinado = combinado.groupby(dims, observed=True, sort=False).sum().reset_index()
+            self.diario = combinado
+
+        self._series.clear()
+        return self
+
+    def serie(self, granularidad='M', medida='Sales', por=None):
+        """
+        Devuelve la serie de una medida a la granularidad indicada, opcionalmente por grupo.
+
+        Parámetros:
+        granularidad (str, opcional): 'D' (día), 'W' (semana), 'M' (mes) o 'Q' (trimestre) (por defecto 'M').
+        medida (str o list, opcional): Medida o medidas, de `MEDIDAS_SERIES` o 'n_filas' (por defecto 'Sales').
+        por (str o list, opcional): Dimensión o dimensiones por las que separar la serie.
+
+        Retorno:
+        pd.Series o pd.DataFrame: Totales por periodo (índice PeriodIndex continuo, con 0 en los periodos
+                                  sin pedidos). Con `por`, una columna por grupo.
+        """
+
+        if granularidad not in GRANULARIDADES:
+            raise ValueError(f'Granularidad no soportada: {granularidad!r}. Usar una de {list(GRANULARIDADES)}')
+        if self.diario is None:
+            raise ValueError('El almacén no contiene datos')
+
+        por = [por] if isinstance(por, str) else (list(por) if por is not None else [])
+        clave = (granularidad, tuple(por))
+        if clave not in self._series:
+            self._series[clave] = self._enrollar(granularidad, por)
+        totales = self._series[clave]
+
+        if not por:
+            return totales[medida]
+        if isinstance(medida, str):
+            return totales[medida].unstack(por, fill_value=0)
+        return totales[list(medida)].unstack(por, fill_value=0)
+
+    def _enrollar(self, granularidad, por):
+        periodo = self.diario['Fecha'].dt.to_period(granularidad).rename('Periodo')
+        columnas = MEDIDAS_SERIES + ['n_filas']
+        totales = self.diario.groupby(por + [periodo], observed=True)[columnas].sum()
+
+        # Periodos continuos: los periodos sin pedidos valen 0
+        periodos = pd.period_range(periodo.min(), periodo.max(), freq=granularidad, name='Periodo')
+        if not por:
+            return totales.reindex(periodos, fill_value=0)
+        totales = totales.reorder_levels(['Periodo'] + por)
+        completo = pd.MultiIndex.from_product([periodos] + [totales.index.unique(nivel) for nivel in por])
+        return totales.reindex(completo, fill_value=0).sort_index()
+
+    def guardar(self, ruta):
+        """
+        Guarda los totales diarios en un fichero parquet.
+
+        Parámetros:
+        ruta (str): Ruta del fichero.
+        """
+
+        self.diario.to_parquet(ruta, index=False)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """
+        Carga un almacén guardado con `guardar`.
+
+        Parámetros:
+        ruta (str): Ruta del fichero.
+
+        Retorno:
+        AlmacenSeries: Almacén con los totales diarios.
+        """
+
+        return cls(pd.read_parquet(ruta))
+
+
+def media_movil(serie, ventana, min_periodos=1):
+    """
+    Calcula la media móvil de una o varias series a la vez (una por columna).
+
+    Parámetros:
+    serie (pd.Series o pd.DataFrame): Serie o series por periodo (por ejemplo, de `AlmacenSeries.serie`).
+    ventana (int): Número de periodos de la ventana.
+    min_periodos (int, opcional): Periodos mínimos para dar un valor (por defecto 1).
+
+    Retorno:
+    pd.Series o pd.DataFrame: Media móvil con el mismo índice.
+    """
+
+    return serie.rolling(ventana, min_periods=min_periodos).mean()
+
+
+def variacion_interanual(serie):
+    """
+    Calcula la variación porcentual respecto al mismo periodo del año anterior, para todas las columnas a la vez.
+
+    Parámetros:
+    serie (pd.Series o pd.DataFrame): Serie o series con índice PeriodIndex.
+
+    Retorno:
+    pd.Series o pd.DataFrame: Variación en porcentaje (NaN si no hay periodo anterior o vale 0).
+    """
+
+    indice = serie.index
+    anterior = (indice.to_timestamp() - pd.DateOffset(years=1)).to_period(indice.freq)
+    previo = serie.reindex(anterior)
+    previo.index = indice
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (serie - previo) / previo.where(previo != 0) * 100
+
+
+def obtener_series(df):
+    """
+    Devuelve el almacén de series temporales del DataFrame, construido una sola vez y memorizado (`sp_cache`).
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame con "Order_Date", las dimensiones y las medidas.
+
+    Retorno:
+    AlmacenSeries: Almacén de series (ver `AlmacenSeries`).
+    """
+
+    return sp_cache.obtener(df, 'series', lambda: AlmacenSeries.desde_df(df))
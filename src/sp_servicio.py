@@ -0,0 +1,339 @@
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+import numpy as np
+
+from .sp_almacen import cargar_etapa
+from .sp_mmap import cargar as cargar_mmap
+from .sp_series import AlmacenSeries, DIMENSIONES_SERIES, GRANULARIDADES, MEDIDAS_SERIES
+
+
+# Agregaciones de una medida: suma de los totales o media por fila (suma / número de filas)
+AGREGACIONES = ('suma', 'media')
+
+# Parámetros de una consulta que no son filtros de dimensión
+PARAMETROS = ('medida', 'desde', 'hasta', 'por', 'granularidad', 'agregacion')
+
+
+def _lista(valor):
+    """Normaliza un filtro (None, texto separado por comas o lista) a una tupla ordenada."""
+
+    if valor is None:
+        return ()
+    if isinstance(valor, str):
+        valor = valor.split(',')
+    return tuple(sorted({str(v).strip() for v in valor if str(v).strip()}))
+
+
+def _json(valor):
+    """Convierte los valores de pandas y NumPy a tipos que admite `json`."""
+
+    if isinstance(valor, (pd.Period, pd.Timestamp)):
+        return str(valor)
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and not np.isfinite(valor):
+        return None
+    return valor
+
+
+class ServicioConsultas:
+    """
+    Servicio de consultas de agregados sobre los totales diarios del almacén de series (`AlmacenSeries`).
+
+    - Cada consulta filtra por Market, Segment y Category y por rango de fechas, y agrega una medida,
+      opcionalmente por una dimensión y por periodo. Trabaja sobre los totales diarios por
+      Market × Segment × Category (unas decenas de miles de filas), sin recorrer los pedidos.
+    - Los resultados se guardan en una caché LRU; `recargar` sustituye los datos y vacía la caché.
+    - Es seguro usarlo desde varios hilos (por ejemplo, los del servidor HTTP de `crear_servidor`).
+
+    Parámetros:
+    almacen (AlmacenSeries): Almacén de series con los totales diarios.
+    cargar (callable, opcional): Función sin argumentos que devuelve el DataFrame de pedidos, usada por
+                                 `recargar()` sin argumentos (por ejemplo, `lambda: cargar_etapa(...)`).
+    tamano_cache (int, opcional): Número máximo de resultados en la caché (por defecto 1024).
+    """
+
+    def __init__(self, almacen, cargar=None, tamano_cache=1024):
+        self.cargar = cargar
+        self.tamano_cache = tamano_cache
+        self._cache = OrderedDict()
+        self._cerrojo = threading.Lock()
+        self.version = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._preparar(almacen)
+
+    def __repr__(self):
+        return (f'ServicioConsultas(filas={len(self._diario)}, version={self.version}, '
+                f'cache={len(self._cache)}/{self.tamano_cache})')
+
+    @classmethod
+    def desde_df(cls, df, cargar=None, tamano_cache=1024):
+        """
+        Crea el servicio a partir de un DataFrame de pedidos.
+
+        Parámetros:
+        df (pd.DataFrame): DataFrame con "Order_Date", las dimensiones y las medidas.
+        cargar (callable, opcional): Función que vuelve a cargar los pedidos (ver la clase).
+        tamano_cache (int, opcional): Número máximo de resultados en la caché (por defecto 1024).
+
+        Retorno:
+        ServicioConsultas: Servicio listo para consultar.
+        """
+
+        return cls(AlmacenSeries.desde_df(df), cargar=cargar, tamano_cache=tamano_cache)
+
+    def _preparar(self, almacen):
+        """Ordena los totales diarios por fecha para filtrar los rangos con una búsqueda binaria."""
+
+        diario = almacen.diario.sort_values('Fecha', kind='stable').reset_index(drop=True)
+        self.dimensiones = [dim for dim in DIMENSIONES_SERIES if dim in diario.columns]
+        diario[self.dimensiones] = diario[self.dimensiones].astype('category')
+        self._fechas = diario['Fecha'].to_numpy()
+        self._diario = diario
+
+    def recargar(self, datos=None):
+        """
+        Sustituye los datos del servicio y vacía la caché.
+
+        Parámetros:
+        datos (AlmacenSeries o pd.DataFrame, opcional): Almacén o pedidos nuevos. Por defecto se
+                                                        vuelven a cargar con la función `cargar`.
+
+        Retorno:
+        ServicioConsultas: El propio servicio.
+        """
+
+        if datos is None:
+            if self.cargar is None:
+                raise ValueError('El servicio no tiene una función de carga. Indicar los datos a recargar.')
+            datos = self.cargar()
+        almacen = datos if isinstance(datos, AlmacenSeries) else AlmacenSeries.desde_df(datos)
+
+        with self._cerrojo:
+            self._preparar(almacen)
+            self._cache.clear()
+            self.version += 1
+        return self
+
+    def estado(self):
+        """
+        Devuelve el estado del servicio y de su caché.
+
+        Retorno:
+        dict: Versión de los datos, filas diarias, rango de fechas y aciertos y fallos de la caché.
+        """
+
+        return {'version': self.version, 'filas_diarias': len(self._diario),
+                'desde': str(pd.Timestamp(self._fechas[0]).date()) if len(self._fechas) else None,
+                'hasta': str(pd.Timestamp(self._fechas[-1]).date()) if len(self._fechas) else None,
+                'cache': len(self._cache), 'tamano_cache': self.tamano_cache,
+                'aciertos': self.aciertos, 'fallos': self.fallos}
+
+    def consultar(self, medida='Sales', desde=None, hasta=None, por=None, granularidad=None,
+                  agregacion='suma', **filtros):
+        """
+        Agrega una medida sobre los pedidos que cumplen los filtros.
+
+        Cada llamada devuelve un diccionario nuevo: modificarlo no altera la caché.
+
+        Parámetros:
+        medida (str, opcional): Medida de `MEDIDAS_SERIES` o 'n_filas' (por defecto 'Sales').
+        desde (str, opcional): Primera fecha de pedido incluida, por ejemplo '2013-01-01'.
+        hasta (str, opcional): Última fecha de pedido incluida.
+        por (str, opcional): Dimensión por la que separar el resultado: 'Market', 'Segment' o 'Category'.
+        granularidad (str, opcional): 'D', 'W', 'M' o 'Q' para separar el resultado por periodo.
+        agregacion (str, opcional): 'suma' o 'media' por fila (por defecto 'suma').
+        **filtros: Valores de Market, Segment o Category (lista o texto separado por comas).
+
+        Retorno:
+        dict: Resultado serializable a JSON: el valor total ('valor' y 'n_filas') o, con `por` o
+              `granularidad`, las filas del resultado ('filas').
+        """
+
+        return json.loads(self.consultar_json(medida, desde, hasta, por, granularidad, agregacion, **filtros))
+
+    def consultar_json(self, medida='Sales', desde=None, hasta=None, por=None, granularidad=None,
+                       agregacion='suma', **filtros):
+        """
+        Igual que `consultar`, pero devuelve el resultado serializado en JSON, tal como se guarda en la caché.
+
+        Retorno:
+        str: Resultado en JSON.
+        """
+
+        desconocidos = set(filtros) - set(DIMENSIONES_SERIES)
+        if desconocidos:
+            raise ValueError(f'Filtros no soportados: {sorted(desconocidos)}. Usar {DIMENSIONES_SERIES}')
+        if medida not in MEDIDAS_SERIES + ['n_filas']:
+            raise ValueError(f'Medida no soportada: {medida!r}. Usar una de {MEDIDAS_SERIES + ["n_filas"]}')
+        if agregacion not in AGREGACIONES:
+            raise ValueError(f'Agregación no soportada: {agregacion!r}. Usar una de {AGREGACIONES}')
+        if granularidad is not None and granularidad not in GRANULARIDADES:
+            raise ValueError(f'Granularidad no soportada: {granularidad!r}. Usar una de {list(GRANULARIDADES)}')
+        if por is not None and por not in DIMENSIONES_SERIES:
+            raise ValueError(f'Dimensión no soportada: {por!r}. Usar una de {DIMENSIONES_SERIES}')
+
+        filtros = tuple((dim, _lista(filtros.get(dim))) for dim in DIMENSIONES_SERIES if _lista(filtros.get(dim)))
+        clave = (medida, desde, hasta, por, granularidad, agregacion, filtros)
+
+        with self._cerrojo:
+            version = self.version
+            if clave in self._cache:
+                self._cache.move_to_end(clave)
+                self.aciertos += 1
+                return self._cache[clave]
+            self.fallos += 1
+            diario, fechas = self._diario, self._fechas
+
+        # La caché guarda el JSON (inmutable), no el diccionario que reciben los llamantes
+        resultado = json.dumps(self._calcular(diario, fechas, medida, desde, hasta, por, granularidad,
+                                              agregacion, filtros), ensure_ascii=False)
+
+        with self._cerrojo:
+            # Si los datos se recargaron durante el cálculo, el resultado no se guarda
+            if version == self.version:
+                self._cache[clave] = resultado
+                if len(self._cache) > self.tamano_cache:
+                    self._cache.popitem(last=False)
+        return resultado
+
+    def _calcular(self, diario, fechas, medida, desde, hasta, por, granularidad, agregacion, filtros):
+        """Filtra los totales diarios y agrega la medida."""
+
+        inicio = 0 if desde is None else np.searchsorted(fechas, np.datetime64(pd.Timestamp(desde)), 'left')
+        fin = len(fechas) if hasta is None else np.searchsorted(fechas, np.datetime64(pd.Timestamp(hasta)), 'right')
+        datos = diario.iloc[inicio:fin]
+
+        if filtros:
+            mascara = np.ones(len(datos), dtype=bool)
+            for dim, valores in filtros:
+                mascara &= datos[dim].isin(valores).to_numpy()
+            datos = datos[mascara]
+
+        columnas = [medida] if medida == 'n_filas' else [medida, 'n_filas']
+        grupos = ([por] if por else []) + ([datos['Fecha'].dt.to_period(granularidad).rename('Periodo')]
+                                           if granularidad else [])
+
+        if not grupos:
+            totales = datos[columnas].sum()
+            valor = totales[medida] / totales['n_filas'] if agregacion == 'media' else totales[medida]
+            return {'medida': medida, 'agregacion': agregacion,
+                    'valor': _json(valor) if totales['n_filas'] else None, 'n_filas': int(totales['n_filas'])}
+
+        totales = datos.groupby(grupos, observed=True)[columnas].sum()
+        valores = totales[medida] / totales['n_filas'] if agregacion == 'media' else totales[medida]
+        tabla = pd.DataFrame({medida: valores, 'n_filas': totales['n_filas']}).reset_index()
+        return {'medida': medida, 'agregacion': agregacion, 'columnas': list(tabla.columns),
+                'filas': [[_json(v) for v in fila] for fila in tabla.itertuples(index=False)]}
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    """Manejador HTTP del servicio: GET /consulta, GET /estado y POST /recargar."""
+
+    servicio = None
+    verbose = False
+
+    def _responder(self, codigo, cuerpo, cabeceras=None):
+        texto = cuerpo if isinstance(cuerpo, str) else json.dumps(cuerpo, ensure_ascii=False)
+        datos = texto.encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/estado':
+            return self._responder(200, self.servicio.estado())
+        if url.path != '/consulta':
+            return self._responder(404, {'error': f'Ruta no encontrada: {url.path}'})
+
+        parametros = {nombre: valores[-1] for nombre, valores in parse_qs(url.query).items()}
+        inicio = time.perf_counter()
+        try:
+            resultado = self.servicio.consultar_json(**parametros)
+        except (ValueError, TypeError) as e:
+            return self._responder(400, {'error': str(e)})
+        self._responder(200, resultado, {'X-Milisegundos': f'{(time.perf_counter() - inicio) * 1000:.3f}'})
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/recargar':
+            return self._responder(404, {'error': f'Ruta no encontrada: {self.path}'})
+        try:
+            self.servicio.recargar()
+        except ValueError as e:
+            return self._responder(400, {'error': str(e)})
+        self._responder(200, self.servicio.estado())
+
+    def log_message(self, formato, *args):
+        if self.verbose:
+            super().log_message(formato, *args)
+
+
+class _Servidor(ThreadingHTTPServer):
+    """Servidor con un hilo por petición y una cola de conexiones amplia para muchos clientes simultáneos."""
+
+    request_queue_size = 128
+
+
+def crear_servidor(servicio, host='127.0.0.1', puerto=8050, verbose=False):
+    """
+    Crea el servidor HTTP del servicio de consultas, con un hilo por petición.
+
+    Rutas:
+    - GET /consulta?medida=Profit&Market=EU,LATAM&desde=2013-01-01&por=Segment&granularidad=Q
+      (el tiempo de la consulta en el servidor va en la cabecera X-Milisegundos)
+    - GET /estado: versión de los datos y aciertos de la caché.
+    - POST /recargar: vuelve a cargar los datos con la función `cargar` del servicio y vacía la caché.
+
+    Parámetros:
+    servicio (ServicioConsultas): Servicio que responde las consultas.
+    host (str, opcional): Dirección en la que escuchar (por defecto solo local, '127.0.0.1').
+    puerto (int, opcional): Puerto (por defecto 8050; 0 para uno libre).
+    verbose (bool, opcional): Si es True, registra cada petición por stderr (por defecto False).
+
+    Retorno:
+    ThreadingHTTPServer: Servidor sin arrancar; usar `serve_forever()` y `shutdown()`.
+    """
+
+    manejador = type('Manejador', (_Manejador,), {'servicio': servicio, 'verbose': verbose})
+    return _Servidor((host, puerto), manejador)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servicio HTTP local de consultas de agregados de ventas.')
+    parser.add_argument('--etapa', default='conjunto_datos_final', help='Etapa del almacén a cargar')
+    parser.add_argument('--mmap', default=None, help='Cargar los pedidos del almacén mapeado en memoria (sp_mmap)')
+    parser.add_argument('--host', default='127.0.0.1', help='Dirección en la que escuchar')
+    parser.add_argument('--puerto', type=int, default=8050, help='Puerto')
+    parser.add_argument('--cache', type=int, default=1024, help='Número máximo de resultados en caché')
+    parser.add_argument('--verbose', action='store_true', help='Registrar cada petición')
+    args = parser.parse_args()
+
+    def cargar():
+        return cargar_etapa(args.etapa) if args.mmap is None else cargar_mmap(args.mmap)
+
+    servicio = ServicioConsultas.desde_df(cargar(), cargar=cargar, tamano_cache=args.cache)
+    servidor = crear_servidor(servicio, args.host, args.puerto, args.verbose)
+    print(f'Servicio de consultas en http://{args.host}:{servidor.server_address[1]} ({servicio})')
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == '__main__':
+    main()
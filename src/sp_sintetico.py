@@ -0,0 +1,392 @@
+import argparse
+import os
+
+import pandas as pd
+import numpy as np
+
+from .sp_cleaning import limpiar_columnas, agregar_columnas_fecha
+from .sp_indicadores import RUTA_INDICADORES, cargar_indicadores
+
+
+# Tamaños de referencia (filas de superstore.csv). 51.290 filas de origen dan las 51.243 del dataset
+# final, una vez eliminados los países sin indicadores
+TAMANOS = {'51k': 51_290, '1M': 1_000_000, '10M': 10_000_000, '50M': 50_000_000}
+
+# Distribuciones del dataset original (notebooks 3 y 4)
+MERCADOS = {
+    # mercado: (peso, prefijo de pedido, regiones, {país: peso dentro del mercado})
+    'APAC': (0.2144, 'IN', ['Oceania', 'Southeast Asia', 'North Asia', 'Central Asia'], {
+        'Australia': 5.5, 'China': 3.6, 'India': 3.0, 'Indonesia': 2.7, 'Philippines': 1.6,
+        'New Zealand': 1.0, 'Vietnam': 0.9, 'Pakistan': 0.9, 'Japan': 0.8, 'Thailand': 0.6,
+        'Bangladesh': 0.6, 'South Korea': 0.5, 'Malaysia': 0.4, 'Singapore': 0.3, 'Myanmar (Burma)': 0.2,
+        'Cambodia': 0.1, 'Nepal': 0.1, 'Sri Lanka': 0.1, 'Hong Kong': 0.1, 'Taiwan': 0.05}),
+    'North America': (0.2025, 'US', ['East', 'West', 'Central', 'South'], {
+        'United States': 19.5, 'Canada': 0.75}),
+    'LATAM': (0.2002, 'MX', ['Caribbean', 'Central', 'South'], {
+        'Mexico': 5.2, 'Brazil': 3.2, 'Dominican Republic': 1.4, 'Honduras': 1.4, 'Guatemala': 1.4,
+        'El Salvador': 1.1, 'Nicaragua': 1.1, 'Colombia': 1.1, 'Cuba': 1.0, 'Argentina': 0.9,
+        'Venezuela': 0.7, 'Chile': 0.6, 'Peru': 0.6, 'Ecuador': 0.3, 'Panama': 0.2, 'Jamaica': 0.1,
+        'Haiti': 0.1, 'Martinique': 0.02, 'Guadeloupe': 0.02}),
+    'EU': (0.1951, 'ES', ['North', 'South', 'Central'], {
+        'France': 5.5, 'Germany': 4.0, 'United Kingdom': 3.6, 'Italy': 2.1, 'Spain': 1.9,
+        'Netherlands': 1.1, 'Austria': 0.5, 'Sweden': 0.5, 'Belgium': 0.4, 'Ireland': 0.3,
+        'Portugal': 0.3, 'Switzerland': 0.3, 'Denmark': 0.3, 'Norway': 0.2, 'Finland': 0.2}),
+    'EMEA': (0.0981, 'ID', ['EMEA'], {
+        'Turkey': 2.4, 'Iran': 1.3, 'Egypt': 1.0, 'Russia': 0.6, 'Ukraine': 0.6, 'Iraq': 0.4,
+        'Poland': 0.4, 'Saudi Arabia': 0.3, 'Israel': 0.3, 'Syria': 0.2, 'Czech Republic': 0.2,
+        'Hungary': 0.2, 'Romania': 0.2, 'Kazakhstan': 0.1, 'Lebanon': 0.1, 'Jordan': 0.1}),
+    'Africa': (0.0895, 'AG', ['Africa'], {
+        'Nigeria': 1.9, 'Morocco': 0.6, 'South Africa': 0.5, 'Democratic Republic of the Congo': 0.4,
+        'Algeria': 0.3, 'Ghana': 0.2, 'Kenya': 0.2, 'Angola': 0.2, 'Tunisia': 0.2, 'Cameroon': 0.1,
+        'Senegal': 0.1, 'Ethiopia': 0.1, 'Zambia': 0.1, 'Swaziland': 0.02}),
+}
+
+SUBCATEGORIAS = {
+    # subcategoría: (categoría, código, peso, precio unitario mediano, margen)
+    'Binders': ('Office Supplies', 'BI', 0.1200, 9, 0.30),
+    'Storage': ('Office Supplies', 'ST', 0.0987, 40, 0.15),
+    'Art': ('Office Supplies', 'AR', 0.0953, 10, 0.25),
+    'Paper': ('Office Supplies', 'PA', 0.0690, 12, 0.35),
+    'Chairs': ('Furniture', 'CH', 0.0669, 110, 0.15),
+    'Phones': ('Technology', 'PH', 0.0655, 100, 0.20),
+    'Furnishings': ('Furniture', 'FU', 0.0618, 25, 0.20),
+    'Accessories': ('Technology', 'AC', 0.0600, 45, 0.25),
+    'Labels': ('Office Supplies', 'LA', 0.0508, 5, 0.35),
+    'Envelopes': ('Office Supplies', 'EN', 0.0474, 12, 0.35),
+    'Supplies': ('Office Supplies', 'SU', 0.0472, 15, 0.10),
+    'Fasteners': ('Office Supplies', 'FA', 0.0471, 5, 0.25),
+    'Bookcases': ('Furniture', 'BO', 0.0470, 140, 0.15),
+    'Copiers': ('Technology', 'CO', 0.0434, 160, 0.30),
+    'Appliances': ('Office Supplies', 'AP', 0.0342, 75, 0.20),
+    'Machines': ('Technology', 'MA', 0.0290, 120, 0.15),
+    'Tables': ('Furniture', 'TA', 0.0167, 170, 0.05),
+}
+PREFIJOS_CATEGORIA = {'Office Supplies': 'OFF', 'Furniture': 'FUR', 'Technology': 'TEC'}
+
+SEGMENTOS = {'Consumer': 0.5169, 'Corporate': 0.3009, 'Home Office': 0.1822}
+PRIORIDADES = {'Medium': 0.5740, 'High': 0.3021, 'Critical': 0.0766, 'Low': 0.0473}
+MODOS_ENVIO = {'Standard Class': 0.6002, 'Second Class': 0.2011, 'First Class': 0.1461, 'Same Day': 0.0526}
+DESCUENTOS = {0.0: 0.52, 0.1: 0.08, 0.15: 0.02, 0.2: 0.18, 0.3: 0.03, 0.4: 0.05,
+              0.5: 0.04, 0.6: 0.02, 0.7: 0.04, 0.8: 0.02}
+ANIOS = {2011: 0.1754, 2012: 0.2137, 2013: 0.2690, 2014: 0.3419}
+MESES = [0.045, 0.040, 0.070, 0.065, 0.075, 0.095, 0.060, 0.095, 0.110, 0.085, 0.120, 0.140]
+
+# Días entre pedido y envío (mínimo, máximo) y recargo del coste de envío por modo y prioridad
+DIAS_ENVIO = {'Standard Class': (4, 7), 'Second Class': (2, 5), 'First Class': (1, 3), 'Same Day': (0, 0)}
+RECARGO_MODO = {'Standard Class': 0.9, 'Second Class': 1.1, 'First Class': 1.3, 'Same Day': 1.5}
+RECARGO_PRIORIDAD = {'Medium': 1.0, 'High': 1.25, 'Critical': 1.6, 'Low': 0.8}
+
+# Tamaño del catálogo (igual que en el dataset original)
+N_PRODUCTOS = 10_291
+N_NOMBRES = 3_788
+N_CLIENTES = 4_873
+N_ESTADOS = 1_091
+N_CIUDADES = 3_633
+
+
+def _pesos(valores):
+    pesos = np.asarray(list(valores), dtype=float)
+    return pesos / pesos.sum()
+
+
+def _reparto(total, pesos):
+    """Reparte `total` elementos en proporción a los pesos, con al menos uno por grupo."""
+
+    n = np.maximum(1, np.floor(total * pesos)).astype(np.int64)
+    n[np.argsort(-(total * pesos - n))[:max(total - n.sum(), 0)]] += 1
+    return n
+
+
+class Catalogo:
+    """
+    Catálogo fijo de productos, clientes y ubicaciones del generador sintético.
+
+    Depende solo de la semilla, no del número de filas: todos los tamaños de un mismo dataset
+    sintético comparten los mismos productos, clientes y ciudades.
+
+    Parámetros:
+    semilla (int, opcional): Semilla del generador (por defecto 0).
+    """
+
+    def __init__(self, semilla=0):
+        rng = np.random.default_rng((semilla, 0))
+        self._productos(rng)
+        self._clientes(rng)
+        self._ubicaciones(rng)
+
+    def _productos(self, rng):
+        subs = list(SUBCATEGORIAS)
+        pesos = _pesos(v[2] for v in SUBCATEGORIAS.values())
+        n_sub = _reparto(N_PRODUCTOS, pesos)
+        n_nombres = _reparto(N_NOMBRES, pesos)
+
+        sub = np.repeat(np.arange(len(subs)), n_sub)
+        posicion = np.concatenate([np.arange(n) for n in n_sub])
+        nombre = posicion % np.repeat(n_nombres, n_sub)
+
+        info = [SUBCATEGORIAS[s] for s in subs]
+        categoria = np.array([c for c, *_ in info], dtype=object)[sub]
+        codigo = np.array([f'{PREFIJOS_CATEGORIA[c]}-{k}' for c, k, *_ in info], dtype=object)[sub]
+        numero = 10_000_000 + rng.permutation(N_PRODUCTOS)
+
+        self.producto_id = pd.Series(codigo).str.cat(numero.astype(str), sep='-').to_numpy(dtype=object)
+        self.producto_nombre = (pd.Series(np.array(subs, dtype=object)[sub])
+                                .str.cat(pd.Series(nombre + 1).astype(str).str.zfill(4), sep=' ')
+                                .to_numpy(dtype=object))
+        self.producto_sub = np.array(subs, dtype=object)[sub]
+        self.producto_categoria = categoria
+
+        precio = np.array([v[3] for v in info])[sub]
+        self.producto_precio = precio * np.exp(rng.normal(0.35, 0.75, N_PRODUCTOS))
+        self.producto_margen = np.array([v[4] for v in info])[sub]
+        # Popularidad: la mayoría de productos se venden unas pocas veces, algunos muchas más
+        self.producto_peso = _pesos(rng.gamma(2.0, 1.0, N_PRODUCTOS) * pesos[sub] / n_sub[sub])
+
+    def _clientes(self, rng):
+        letras = np.array(list('ABCDEFGHIJKLMNOPRSTVW'), dtype=object)
+        iniciales = letras[rng.integers(0, len(letras), N_CLIENTES)] + letras[rng.integers(0, len(letras), N_CLIENTES)]
+        numero = rng.choice(np.arange(10_000, 22_000), N_CLIENTES, replace=False) * 10 + rng.integers(0, 9, N_CLIENTES)
+
+        self.cliente_id = pd.Series(iniciales).str.cat(numero.astype(str), sep='-').to_numpy(dtype=object)
+        self.cliente_nombre = np.array([f'Cliente {i + 1}' for i in range(N_CLIENTES)], dtype=object)
+        self.cliente_segmento = rng.choice(np.array(list(SEGMENTOS), dtype=object), N_CLIENTES,
+                                           p=_pesos(SEGMENTOS.values()))
+        self.cliente_peso = _pesos(rng.gamma(8.0, 1.0, N_CLIENTES))
+
+    def _ubicaciones(self, rng):
+        paises, mercados, prefijos, regiones, pesos = [], [], [], [], []
+        for mercado, (peso, prefijo, lista_regiones, paises_mercado) in MERCADOS.items():
+            total = sum(paises_mercado.values())
+            for pais, peso_pais in paises_mercado.items():
+                paises.append(pais)
+                mercados.append(mercado)
+                prefijos.append(prefijo)
+                regiones.append(lista_regiones[rng.integers(len(lista_regiones))])
+                pesos.append(peso * peso_pais / total)
+        pesos = _pesos(pesos)
+
+        # Estados y ciudades por país, en proporción a la raíz de sus ventas
+        n_estados = _reparto(N_ESTADOS, _pesos(np.sqrt(pesos)))
+        n_ciudades = np.maximum(_reparto(N_CIUDADES, _pesos(np.sqrt(pesos))), n_estados)
+
+        pais = np.repeat(np.arange(len(paises)), n_ciudades)
+        posicion = np.concatenate([np.arange(n) for n in n_ciudades])
+        estado = posicion % np.repeat(n_estados, n_ciudades)
+
+        nombres_pais = np.array(paises, dtype=object)
+        self.ciudad = (pd.Series(nombres_pais[pais]).str.cat(pd.Series(posicion + 1).astype(str), sep=' - Ciudad ')
+                       .to_numpy(dtype=object))
+        self.ciudad_estado = (pd.Series(nombres_pais[pais]).str.cat(pd.Series(estado + 1).astype(str), sep=' - Estado ')
+                              .to_numpy(dtype=object))
+        self.ciudad_pais = nombres_pais[pais]
+        self.ciudad_mercado = np.array(mercados, dtype=object)[pais]
+        self.ciudad_prefijo = np.array(prefijos, dtype=object)[pais]
+        self.ciudad_region = np.array(regiones, dtype=object)[pais]
+        # Mercado antiguo de Superstore (columna "Market" de origen): EE. UU. y Canadá por separado
+        self.ciudad_mercado_origen = np.where(self.ciudad_pais == 'United States', 'US',
+                                              np.where(self.ciudad_pais == 'Canada', 'Canada', self.ciudad_mercado))
+        # Dentro de cada país, unas ciudades concentran más pedidos que otras
+        relevancia = rng.gamma(1.5, 1.0, len(pais))
+        self.ciudad_peso = _pesos(pesos[pais] * relevancia / np.bincount(pais, weights=relevancia)[pais])
+
+
+def _semana(fechas):
+    """Número de semana del año con semanas de domingo a sábado y el 1 de enero en la semana 1 (de 1 a 53)."""
+
+    inicio_anio = fechas.dt.to_period('Y').dt.start_time
+    return ((fechas.dt.dayofyear - 1 + (inicio_anio.dt.dayofweek + 1) % 7) // 7 + 1).to_numpy(dtype=np.int64)
+
+
+def _elegir(rng, opciones, n):
+    """Elige `n` posiciones de las opciones (dict valor -> peso) según sus pesos."""
+
+    return rng.choice(len(opciones), n, p=_pesos(opciones.values()))
+
+
+def _generar_bloque(catalogo, rng, n_filas, primer_pedido, primera_fila):
+    """Genera `n_filas` líneas de pedido con el esquema de superstore.csv."""
+
+    # Pedidos: cliente, ciudad, fecha, prioridad y modo de envío, con una o varias líneas
+    lineas = np.minimum(rng.geometric(0.488, n_filas), 14)
+    n_pedidos = int(np.searchsorted(np.cumsum(lineas), n_filas)) + 1
+    lineas = lineas[:n_pedidos]
+    lineas[-1] -= lineas.sum() - n_filas
+
+    cliente = rng.choice(N_CLIENTES, n_pedidos, p=catalogo.cliente_peso)
+    ciudad = rng.choice(len(catalogo.ciudad), n_pedidos, p=catalogo.ciudad_peso)
+    anio = rng.choice(np.array(list(ANIOS)), n_pedidos, p=_pesos(ANIOS.values()))
+    mes = rng.choice(np.arange(1, 13), n_pedidos, p=_pesos(MESES))
+    inicio_mes = pd.to_datetime(pd.DataFrame({'year': anio, 'month': mes, 'day': 1}))
+    fecha = inicio_mes + pd.to_timedelta(np.floor(rng.random(n_pedidos) * inicio_mes.dt.days_in_month), unit='D')
+
+    prioridad = _elegir(rng, PRIORIDADES, n_pedidos)
+    modo = _elegir(rng, MODOS_ENVIO, n_pedidos)
+    dias = np.array([DIAS_ENVIO[m] for m in MODOS_ENVIO])[modo]
+    envio = fecha + pd.to_timedelta(rng.integers(dias[:, 0], dias[:, 1] + 1), unit='D')
+
+    numero = primer_pedido + np.arange(n_pedidos)
+    pedido_id = (pd.Series(catalogo.ciudad_prefijo[ciudad]).str.cat(pd.Series(anio).astype(str), sep='-')
+                 .str.cat(pd.Series(numero).astype(str), sep='-').to_numpy(dtype=object))
+
+    # Líneas: producto, cantidad, descuento e importes
+    p = np.repeat(np.arange(n_pedidos), lineas)
+    producto = rng.choice(N_PRODUCTOS, n_filas, p=catalogo.producto_peso)
+    cantidad = np.minimum(1 + rng.negative_binomial(2.26, 0.477, n_filas), 14)
+    descuento = rng.choice(np.array(list(DESCUENTOS)), n_filas, p=_pesos(DESCUENTOS.values()))
+
+    ventas = np.round(catalogo.producto_precio[producto] * cantidad * (1 - descuento)).astype(np.int64)
+    margen = catalogo.producto_margen[producto] + rng.normal(0, 0.08, n_filas) - 1.0 * descuento
+    beneficio = np.round(ventas * margen, 3)
+    recargo_modo = np.array([RECARGO_MODO[m] for m in MODOS_ENVIO])
+    recargo_prioridad = np.array([RECARGO_PRIORIDAD[k] for k in PRIORIDADES])
+    tasa = (0.1 * recargo_modo[modo[p]] * recargo_prioridad[prioridad[p]]
+            * np.exp(rng.normal(-0.25, 0.5, n_filas)))
+    coste_envio = np.round(np.maximum(ventas * tasa, 0.002), 3)
+
+    fecha_linea = fecha.to_numpy()[p]
+    return pd.DataFrame({
+        'Category': catalogo.producto_categoria[producto],
+        'City': catalogo.ciudad[ciudad][p],
+        'Country': catalogo.ciudad_pais[ciudad][p],
+        'Customer.ID': catalogo.cliente_id[cliente][p],
+        'Customer.Name': catalogo.cliente_nombre[cliente][p],
+        'Discount': descuento,
+        'Market': catalogo.ciudad_mercado_origen[ciudad][p],
+        '记录数': 1,
+        'Order.Date': fecha_linea,
+        'Order.ID': pedido_id[p],
+        'Order.Priority': np.array(list(PRIORIDADES), dtype=object)[prioridad[p]],
+        'Product.ID': catalogo.producto_id[producto],
+        'Product.Name': catalogo.producto_nombre[producto],
+        'Profit': beneficio,
+        'Quantity': cantidad,
+        'Region': catalogo.ciudad_region[ciudad][p],
+        'Row.ID': primera_fila + np.arange(n_filas),
+        'Sales': ventas,
+        'Segment': catalogo.cliente_segmento[cliente][p],
+        'Ship.Date': envio.to_numpy()[p],
+        'Ship.Mode': np.array(list(MODOS_ENVIO), dtype=object)[modo[p]],
+        'Shipping.Cost': coste_envio,
+        'State': catalogo.ciudad_estado[ciudad][p],
+        'Sub.Category': catalogo.producto_sub[producto],
+        'Year': anio[p],
+        'Market2': catalogo.ciudad_mercado[ciudad][p],
+        'weeknum': _semana(fecha)[p],
+    })
+
+
+def generar(n_filas=TAMANOS['51k'], semilla=0, tamano_bloque=1_000_000, esquema='final', ruta_indicadores=RUTA_INDICADORES):
+    """
+    Genera un dataset sintético con el esquema y las distribuciones de Global Superstore, por bloques.
+
+    - Reproduce las proporciones de mercados, países, categorías, subcategorías, segmentos, prioridades,
+      modos de envío, descuentos, años y meses del dataset original, y el tamaño de su catálogo
+      (productos, nombres, clientes, estados y ciudades).
+    - Las ventas, beneficios y costes de envío se derivan del precio de cada producto, la cantidad,
+      el descuento, el modo de envío y la prioridad, con distribuciones asimétricas como las reales.
+    - El resultado es determinista para la misma semilla, número de filas y tamaño de bloque.
+    - Con `esquema='final'`, cada bloque pasa por la misma unión con los indicadores y limpieza que el
+      pipeline, y tiene las 28 columnas del dataset final (sin las filas de países sin indicadores).
+
+    Parámetros:
+    n_filas (int, opcional): Filas de superstore.csv a generar (por defecto `TAMANOS['51k']`).
+    semilla (int, opcional): Semilla del generador (por defecto 0).
+    tamano_bloque (int, opcional): Filas por bloque (por defecto 1.000.000).
+    esquema (str, opcional): 'raw' (columnas de superstore.csv) o 'final' (dataset final) (por defecto 'final').
+    ruta_indicadores (str, opcional): Ruta de indicators.xlsx, para el esquema final (por defecto `RUTA_INDICADORES`).
+
+    Retorno:
+    generator: Bloques del dataset (pd.DataFrame).
+    """
+
+    if esquema not in ('raw', 'final'):
+        raise ValueError(f'Esquema no soportado: {esquema!r}. Usar "raw" o "final"')
+
+    catalogo = Catalogo(semilla)
+    tabla = cargar_indicadores(ruta_indicadores) if esquema == 'final' else None
+
+    for i, inicio in enumerate(range(0, n_filas, tamano_bloque)):
+        n = min(tamano_bloque, n_filas - inicio)
+        # Un pedido tiene como mucho 14 líneas, así que los números de pedido no se solapan entre bloques
+        bloque = _generar_bloque(catalogo, np.random.default_rng((semilla, 1, i)), n,
+                                 primer_pedido=100_000 + inicio, primera_fila=inicio + 1)
+        if esquema == 'final':
+            bloque = tabla.unir(bloque, verbose=False)[0].reset_index(drop=True)
+            bloque = limpiar_columnas(bloque)
+            agregar_columnas_fecha(bloque)
+        yield bloque
+
+
+def generar_df(n_filas=TAMANOS['51k'], semilla=0, esquema='final', **kwargs):
+    """
+    Genera el dataset sintético completo en memoria (ver `generar`).
+
+    Retorno:
+    pd.DataFrame: Dataset sintético.
+    """
+
+    return pd.concat(generar(n_filas, semilla, esquema=esquema, **kwargs), ignore_index=True)
+
+
+def escribir(ruta, n_filas=TAMANOS['51k'], semilla=0, esquema='raw', tamano_bloque=1_000_000, **kwargs):
+    """
+    Escribe el dataset sintético en disco bloque a bloque, con memoria acotada por el tamaño de bloque.
+
+    El formato se deduce de la extensión: '.csv' (como superstore.csv) o '.parquet'.
+
+    Parámetros:
+    ruta (str): Fichero de destino.
+    n_filas (int, opcional): Filas a generar (por defecto `TAMANOS['51k']`).
+    semilla (int, opcional): Semilla del generador (por defecto 0).
+    esquema (str, opcional): 'raw' o 'final' (por defecto 'raw').
+    tamano_bloque (int, opcional): Filas por bloque (por defecto 1.000.000).
+    **kwargs: Argumentos adicionales para `generar`.
+
+    Retorno:
+    str: Ruta del fichero escrito.
+    """
+
+    formato = os.path.splitext(ruta)[1].lstrip('.')
+    if formato not in ('csv', 'parquet'):
+        raise ValueError(f'Formato no soportado: {formato!r}. Usar .csv o .parquet')
+
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+
+    escritor = None
+    try:
+        for i, bloque in enumerate(generar(n_filas, semilla, tamano_bloque, esquema, **kwargs)):
+            if formato == 'csv':
+                bloque.to_csv(ruta, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+                continue
+
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(ruta, tabla.schema)
+            escritor.write_table(tabla.cast(escritor.schema))
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return ruta
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera un dataset sintético con el esquema de Global Superstore.')
+    parser.add_argument('ruta', help='Fichero de destino (.csv o .parquet)')
+    parser.add_argument('--filas', default='51k', help=f'Número de filas o uno de {list(TAMANOS)} (por defecto 51k)')
+    parser.add_argument('--semilla', type=int, default=0, help='Semilla del generador (por defecto 0)')
+    parser.add_argument('--esquema', choices=['raw', 'final'], default='raw', help='Esquema de columnas (por defecto raw)')
+    parser.add_argument('--bloque', type=int, default=1_000_000, help='Filas por bloque (por defecto 1.000.000)')
+    args = parser.parse_args()
+
+    n_filas = TAMANOS[args.filas] if args.filas in TAMANOS else int(args.filas)
+    escribir(args.ruta, n_filas, args.semilla, args.esquema, args.bloque)
+    print(f'{n_filas} filas escritas en {args.ruta}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+import pandas as pd
+import numpy as np
+
+from . import sp_cache
+from .sp_perfil import columnas_categoricas, recuento_valores
+
+
+# Filas por bloque: cada actualización de un boceto solo materializa un bloque (hashes, recuentos),
+# de modo que la memoria no crece con el número de filas ni de valores distintos de la columna
+TAMANO_BLOQUE = 100_000
+
+
+def _bloques(datos, tamano_bloque=TAMANO_BLOQUE):
+    """Divide un DataFrame o una columna en bloques consecutivos de `tamano_bloque` filas (vistas, sin copia)."""
+
+    for inicio in range(0, len(datos), tamano_bloque):
+        yield datos.iloc[inicio:inicio + tamano_bloque]
+
+
+def _hash_valores(valores):
+    """
+    Hash de 64 bits de cada valor no nulo de un bloque (pd.Series o pd.Index).
+
+    El hash no depende del tipo de la columna (texto, object o categoría), de modo que se pueden
+    fusionar bocetos de bloques con tipos distintos.
+    """
+
+    return pd.util.hash_pandas_object(valores.dropna(), index=False).to_numpy()
+
+
+def _recuentos(bloque):
+    """Recuento de los valores de un bloque, con el índice en el tipo de los valores (no categórico)."""
+
+    recuentos = recuento_valores(bloque)
+    if isinstance(recuentos.index, pd.CategoricalIndex):
+        recuentos.index = recuentos.index.astype(recuentos.index.categories.dtype)
+    return recuentos
+
+
+def _longitud_bits(x):
+    """Número de bits significativos de cada entero sin signo de 64 bits (0 para el 0)."""
+
+    alto = (x >> np.uint64(32)).astype(np.float64)
+    bajo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(alto > 0, 32 + np.frexp(alto)[1], np.frexp(bajo)[1])
+
+
+class HyperLogLog:
+    """
+    Estimador de cardinalidad (número de valores distintos) HyperLogLog.
+
+    - Usa 2**precision registros de un byte, con un error relativo típico de 1.04 / sqrt(2**precision)
+      (0.8 % con la precisión por defecto, 16 KB de memoria), independientemente del número de filas.
+    - Dos estimadores con la misma precisión se combinan con `fusionar` (máximo de los registros).
+
+    Parámetros:
+    precision (int, opcional): Bits del hash usados para elegir el registro, entre 4 y 18 (por defecto 14).
+    """
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError('La precisión debe estar entre 4 y 18')
+        self.precision = precision
+        self.registros = np.zeros(1 << precision, dtype=np.uint8)
+
+    def __repr__(self):
+        return f'HyperLogLog(precision={self.precision}, estimacion={self.estimacion():.0f})'
+
+    def actualizar(self, serie, tamano_bloque=TAMANO_BLOQUE):
+        """
+        Añade los valores de una columna al estimador, por bloques de `tamano_bloque` filas.
+
+        Parámetros:
+        serie (pd.Series): Valores a añadir (los nulos se ignoran).
+        tamano_bloque (int, opcional): Filas por bloque (por defecto `TAMANO_BLOQUE`).
+
+        Retorno:
+        HyperLogLog: El propio estimador.
+        """
+
+        for bloque in _bloques(serie, tamano_bloque):
+            self._anadir(_hash_valores(bloque))
+        return self
+
+    def _anadir(self, hashes):
+        if not len(hashes):
+            return
+        bits = 64 - self.precision
+        registro = (hashes >> np.uint64(bits)).astype(np.int64)
+        resto = hashes & np.uint64((1 << bits) - 1)
+        rango = (bits - _longitud_bits(resto) + 1).astype(np.uint8)
+        np.maximum.at(self.registros, registro, rango)
+
+    def fusionar(self, otro):
+        """
+        Combina otro estimador en este.
+
+        Parámetros:
+        otro (HyperLogLog): Estimador con la misma precisión.
+
+        Retorno:
+        HyperLogLog: El propio estimador.
+        """
+
+        if otro.precision != self.precision:
+            raise ValueError('Los estimadores tienen precisiones distintas')
+        np.maximum(self.registros, otro.registros, out=self.registros)
+        return self
+
+    def estimacion(self):
+        """
+        Devuelve el número estimado de valores distintos.
+
+        Retorno:
+        float: Cardinalidad estimada.
+        """
+
+        m = len(self.registros)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimacion = alfa * m * m / np.sum(np.ldexp(1.0, -self.registros.astype(np.int64)))
+
+        # Corrección para cardinalidades pequeñas (conteo lineal)
+        vacios = np.count_nonzero(self.registros == 0)
+        if estimacion <= 2.5 * m and vacios:
+            estimacion = m * np.log(m / vacios)
+        return float(estimacion)
+
+
+class ContadorFrecuentes:
+    """
+    Resumen de los valores más frecuentes de una columna (algoritmo de Misra-Gries).
+
+    - Mantiene como máximo `capacidad` contadores. Mientras la columna tenga menos valores distintos,
+      los recuentos son exactos.
+    - Si no, cada recuento infravalora el real en como mucho `error` (≤ filas / (capacidad + 1)), y todo
+      valor con más de ese número de filas está en el resumen.
+    - Dos resúmenes se combinan con `fusionar`, con la misma garantía.
+
+    Parámetros:
+    capacidad (int, opcional): Número máximo de contadores (por defecto 1000).
+    """
+
+    def __init__(self, capacidad=1000):
+        self.capacidad = capacidad
+        self.contadores = pd.Series(dtype='int64')
+        self.n = 0
+        self.error = 0
+
+    def __repr__(self):
+        return f'ContadorFrecuentes(capacidad={self.capacidad}, valores={len(self.contadores)}, error={self.error})'
+
+    def actualizar(self, serie, tamano_bloque=TAMANO_BLOQUE):
+        """
+        Añade los valores de una columna al resumen, por bloques de `tamano_bloque` filas.
+
+        Cada bloque se cuenta por separado y se combina con los contadores, que vuelven a reducirse
+        a `capacidad`: nunca se cuenta la columna completa.
+
+        Parámetros:
+        serie (pd.Series): Valores a añadir (los nulos se ignoran).
+        tamano_bloque (int, opcional): Filas por bloque (por defecto `TAMANO_BLOQUE`).
+
+        Retorno:
+        ContadorFrecuentes: El propio resumen.
+        """
+
+        for bloque in _bloques(serie, tamano_bloque):
+            recuentos = _recuentos(bloque)
+            self._combinar(recuentos, int(recuentos.sum()), 0)
+        return self
+
+    def fusionar(self, otro):
+        """
+        Combina otro resumen en este.
+
+        Parámetros:
+        otro (ContadorFrecuentes): Resumen a combinar.
+
+        Retorno:
+        ContadorFrecuentes: El propio resumen.
+        """
+
+        return self._combinar(otro.contadores, otro.n, otro.error)
+
+    def _combinar(self, recuentos, n, error):
+        contadores = self.contadores.add(recuentos, fill_value=0).astype('int64')
+        self.n += n
+        self.error += error
+
+        if len(contadores) > self.capacidad:
+            # Restar el recuento (capacidad + 1)-ésimo a todos y quedarse con los positivos
+            umbral = int(contadores.nlargest(self.capacidad + 1).iloc[-1])
+            contadores = contadores - umbral
+            contadores = contadores[contadores > 0]
+            self.error += umbral
+
+        self.contadores = contadores.sort_values(ascending=False, kind='stable')
+        return self
+
+    def top(self, k=10):
+        """
+        Devuelve los `k` valores más frecuentes y su recuento (aproximado si `error` > 0).
+
+        Retorno:
+        pd.Series: Recuento de los valores más frecuentes.
+        """
+
+        return self.contadores.head(k)
+
+
+class BocetosCategoricas:
+    """
+    Bocetos (sketches) fusionables de las columnas categóricas de un DataFrame, en una sola pasada
+    y con memoria acotada: un `HyperLogLog` y un `ContadorFrecuentes` por columna. Los datos se
+    procesan por bloques de `TAMANO_BLOQUE` filas.
+
+    Los bocetos de bloques distintos (o de procesos distintos) se combinan con `fusionar`.
+
+    Parámetros:
+    capacidad (int, opcional): Contadores de valores frecuentes por columna (por defecto 1000).
+    precision (int, opcional): Precisión de los HyperLogLog (por defecto 14).
+    """
+
+    def __init__(self, capacidad=1000, precision=14):
+        self.capacidad = capacidad
+        self.precision = precision
+        self.n_filas = 0
+        self.nulos = pd.Series(dtype='int64')
+        self.distintos = {}
+        self.frecuentes = {}
+
+    def __repr__(self):
+        return f'BocetosCategoricas(n_filas={self.n_filas}, columnas={list(self.distintos)})'
+
+    @property
+    def columnas_categoricas(self):
+        """Lista de columnas incluidas en los bocetos."""
+        return list(self.distintos)
+
+    def actualizar(self, datos, tamano_bloque=TAMANO_BLOQUE):
+        """
+        Añade filas a los bocetos, por bloques de `tamano_bloque` filas.
+
+        Parámetros:
+        datos (pd.DataFrame): Datos a añadir (un DataFrame completo o un bloque de lectura).
+        tamano_bloque (int, opcional): Filas por bloque (por defecto `TAMANO_BLOQUE`).
+
+        Retorno:
+        BocetosCategoricas: Los propios bocetos.
+        """
+
+        columnas = columnas_categoricas(datos)
+        for bloque in _bloques(datos, tamano_bloque):
+            self.n_filas += len(bloque)
+            self.nulos = self.nulos.add(bloque[columnas].isnull().sum(), fill_value=0).astype('int64')
+
+            for col in columnas:
+                if col not in self.distintos:
+                    self.distintos[col] = HyperLogLog(self.precision)
+                    self.frecuentes[col] = ContadorFrecuentes(self.capacidad)
+                # Un único recuento por bloque y columna: sus valores distintos alimentan el HyperLogLog
+                recuentos = _recuentos(bloque[col])
+                self.distintos[col]._anadir(_hash_valores(recuentos.index))
+                self.frecuentes[col]._combinar(recuentos, int(recuentos.sum()), 0)
+        return self
+
+    def fusionar(self, otro):
+        """
+        Combina otros bocetos en estos.
+
+        Parámetros:
+        otro (BocetosCategoricas): Bocetos a combinar.
+
+        Retorno:
+        BocetosCategoricas: Los propios bocetos.
+        """
+
+        self.n_filas += otro.n_filas
+        self.nulos = self.nulos.add(otro.nulos, fill_value=0).astype('int64')
+
+        for col in otro.distintos:
+            if col not in self.distintos:
+                self.distintos[col] = HyperLogLog(otro.precision)
+                self.frecuentes[col] = ContadorFrecuentes(self.capacidad)
+            self.distintos[col].fusionar(otro.distintos[col])
+            self.frecuentes[col].fusionar(otro.frecuentes[col])
+        return self
+
+    @property
+    def cardinalidad(self):
+        """
+        Número aproximado de valores distintos (sin contar nulos) de cada columna (pd.Series).
+
+        Si el resumen de frecuentes es exacto (menos valores que su capacidad), se usa su recuento exacto.
+        """
+
+        return pd.Series({col: (len(self.frecuentes[col].contadores) if self.frecuentes[col].error == 0
+                                else round(self.distintos[col].estimacion()))
+                          for col in self.distintos}, dtype='int64')
+
+    def top(self, col, k=10):
+        """
+        Devuelve los `k` valores más frecuentes de una columna y su recuento.
+        """
+
+        return self.frecuentes[col].top(k)
+
+    def proporciones(self, col, k=None):
+        """
+        Devuelve la proporción de filas no nulas de los valores más frecuentes de una columna.
+
+        Equivale a `df[col].value_counts(normalize=True)` para los valores del resumen.
+        """
+
+        frecuentes = self.frecuentes[col]
+        vc = frecuentes.contadores if k is None else frecuentes.top(k)
+        return (vc / frecuentes.n if frecuentes.n else vc.astype(float)).rename('proportion')
+
+    def describir_cat(self, col):
+        """
+        Devuelve los estadísticos descriptivos de una columna categórica (count, unique, top y freq),
+        con la cardinalidad y la frecuencia aproximadas.
+        """
+
+        vc = self.frecuentes[col].contadores
+        datos = {'count': self.n_filas - self.nulos.get(col, 0), 'unique': self.cardinalidad[col]}
+        if len(vc):
+            datos['top'] = vc.index[0]
+            datos['freq'] = vc.iloc[0]
+        return pd.Series(datos, name=col, dtype=object)
+
+
+def bosquejar(df, capacidad=1000, precision=14, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Calcula los bocetos de las columnas categóricas de un DataFrame, una sola vez por DataFrame (`sp_cache`).
+
+    El DataFrame se recorre en bloques de `tamano_bloque` filas: la memoria usada depende del tamaño
+    del bloque y de `capacidad`, no del número de filas ni de valores distintos.
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a analizar.
+    capacidad (int, opcional): Contadores de valores frecuentes por columna (por defecto 1000).
+    precision (int, opcional): Precisión de los HyperLogLog (por defecto 14).
+    tamano_bloque (int, opcional): Filas por bloque (por defecto `TAMANO_BLOQUE`).
+
+    Retorno:
+    BocetosCategoricas: Bocetos de las columnas categóricas.
+    """
+
+    clave = ('bocetos', capacidad, precision)
+    return sp_cache.obtener(df, clave,
+                            lambda: BocetosCategoricas(capacidad, precision).actualizar(df, tamano_bloque))
@@ -0,0 +1,243 @@
+import os
+
+import pandas as pd
+import numpy as np
+
+from .sp_cleaning import convertir_col, unir_indicadores, limpiar_columnas, agregar_columnas_fecha
+from .sp_duplicados import DetectorDuplicados
+from .sp_perfil import PerfilDatos
+from .sp_sketch import BocetosCategoricas
+
+
+class AcumuladorPerfil:
+    """
+    Acumulador fusionable de estadísticos para procesar un dataset por bloques.
+
+    Mantiene, con memoria acotada por el número de columnas y por `capacidad` (no por el
+    número de filas ni de valores distintos):
+    - El número de filas y de nulos por columna.
+    - Los bocetos de las columnas categóricas (`sp_sketch.BocetosCategoricas`): valores más
+      frecuentes y número de valores distintos. Son exactos mientras la columna tenga menos de
+      `capacidad` valores distintos (Market, Segment, Category...) y aproximados en las claves
+      (Order_ID, Customer_ID, Product_Name...).
+    - Un resumen de las columnas numéricas (count, media, M2, mínimo y máximo) que se
+      combina de forma exacta entre bloques.
+
+    Dos acumuladores calculados por separado (por ejemplo, en procesos distintos) se
+    combinan con `fusionar`.
+
+    Parámetros:
+    detector (DetectorDuplicados, opcional): Detector con el que contar las filas duplicadas entre
+                                             bloques (por defecto no se cuentan).
+    capacidad (int, opcional): Contadores de valores frecuentes por columna (por defecto 1000).
+    precision (int, opcional): Precisión de los HyperLogLog (por defecto 14).
+    """
+
+    def __init__(self, detector=None, capacidad=1000, precision=14):
+        self.n_filas = 0
+        self.dtypes = None
+        self.nulos = None
+        self.bocetos = BocetosCategoricas(capacidad, precision)
+        self.numericas = None
+        self.detector = detector
+
+    def actualizar(self, bloque):
+        """
+        Añade un bloque de filas al acumulador.
+
+        Parámetros:
+        bloque (pd.DataFrame): Bloque de datos a acumular.
+
+        Retorno:
+        AcumuladorPerfil: El propio acumulador.
+        """
+
+        if self.detector is not None:
+            self.detector.actualizar(bloque)
+
+        otro = AcumuladorPerfil(capacidad=self.bocetos.capacidad, precision=self.bocetos.precision)
+        otro.n_filas = bloque.shape[0]
+        otro.dtypes = bloque.dtypes
+        otro.nulos = bloque.isnull().sum()
+        otro.bocetos.actualizar(bloque)
+
+        numericas = bloque.select_dtypes(include=['number'])
+        otro.numericas = pd.DataFrame({
+            'count': numericas.count(),
+            'mean': numericas.mean(),
+            'M2': numericas.var(ddof=0) * numericas.count(),
+            'min': numericas.min(),
+            'max': numericas.max(),
+        })
+        return self.fusionar(otro)
+
+    def fusionar(self, otro):
+        """
+        Combina otro acumulador en este.
+
+        Parámetros:
+        otro (AcumuladorPerfil): Acumulador a combinar.
+
+        Retorno:
+        AcumuladorPerfil: El propio acumulador.
+        """
+
+        if otro.detector is not None:
+            if self.detector is None:
+                self.detector = DetectorDuplicados(otro.detector.clave)
+            self.detector.fusionar(otro.detector)
+
+        if otro.dtypes is None:
+            return self
+        self.bocetos.fusionar(otro.bocetos)
+        if self.dtypes is None:
+            self.n_filas = otro.n_filas
+            self.dtypes = otro.dtypes
+            self.nulos = otro.nulos.copy()
+            self.numericas = otro.numericas.copy()
+            return self
+
+        self.n_filas += otro.n_filas
+        self.nulos = self.nulos.add(otro.nulos, fill_value=0).astype('int64')
+
+        # Combinación de medias y varianzas por el método de Chan et al.
+        a, b = self.numericas.align(otro.numericas, join='outer')
+        a = a.fillna({'count': 0, 'mean': 0, 'M2': 0})
+        b = b.fillna({'count': 0, 'mean': 0, 'M2': 0})
+        n = a['count'] + b['count']
+        delta = b['mean'] - a['mean']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            peso = np.where(n > 0, b['count'] / n, 0)
+        self.numericas = pd.DataFrame({
+            'count': n,
+            'mean': a['mean'] + delta * peso,
+            'M2': a['M2'] + b['M2'] + delta ** 2 * a['count'] * peso,
+            'min': pd.concat([a['min'], b['min']], axis=1).min(axis=1),
+            'max': pd.concat([a['max'], b['max']], axis=1).max(axis=1),
+        })
+        return self
+
+    def resultado(self, top_k=10):
+        """
+        Devuelve el perfil acumulado.
+
+        El resumen numérico incluye count, mean, std, min y max (los cuantiles no se pueden
+        combinar de forma exacta entre bloques). Las frecuencias y la cardinalidad de las columnas
+        categóricas salen de los bocetos (aproximadas si la columna supera `capacidad` valores
+        distintos). Los duplicados solo se cuentan si el acumulador tiene un `DetectorDuplicados`.
+
+        Parámetros:
+        top_k (int, opcional): Número de valores más frecuentes a devolver por defecto.
+
+        Retorno:
+        PerfilDatos: Perfil del dataset completo.
+        """
+
+        if self.dtypes is None:
+            raise ValueError('El acumulador no contiene datos')
+
+        num = self.numericas
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(num['M2'] / (num['count'] - 1))
+        resumen = pd.DataFrame({'count': num['count'], 'mean': num['mean'], 'std': std,
+                                'min': num['min'], 'max': num['max']}).T
+
+        frecuencias = {col: contador.contadores.sort_values(ascending=False, kind='stable')
+                       for col, contador in self.bocetos.frecuentes.items()}
+        cardinalidad = self.bocetos.cardinalidad.reindex(self.dtypes.index)
+
+        return PerfilDatos(
+            n_filas=self.n_filas,
+            dtypes=self.dtypes,
+            nulos=self.nulos.reindex(self.dtypes.index),
+            cardinalidad=cardinalidad,
+            frecuencias=frecuencias,
+            duplicados=None if self.detector is None else self.detector.duplicados,
+            resumen_numerico=resumen,
+            top_k=top_k,
+        )
+
+
+def transformar_bloque(bloque, df_ind):
+    """
+    Aplica a un bloque de Superstore las transformaciones de los notebooks 1 y 2.
+
+    - Une el bloque con los indicadores (`unir_indicadores`).
+    - Elimina y renombra columnas (`limpiar_columnas`).
+    - Convierte fechas e indicadores (`convertir_col`) y añade "Month" y "Quarter".
+
+    Parámetros:
+    bloque (pd.DataFrame): Bloque de filas leído de superstore.csv.
+    df_ind (pd.DataFrame): DataFrame de indicadores ya renombrado con `renombrar_indicadores`.
+
+    Retorno:
+    pd.DataFrame: Bloque transformado.
+    """
+
+    df = limpiar_columnas(unir_indicadores(bloque, df_ind))
+    convertir_col(df)
+    agregar_columnas_fecha(df)
+    return df
+
+
+def leer_por_bloques(ruta_csv, df_ind, tamano_bloque=100_000, **kwargs):
+    """
+    Lee superstore.csv por bloques y devuelve cada bloque ya transformado.
+
+    Parámetros:
+    ruta_csv (str): Ruta del fichero superstore.csv.
+    df_ind (pd.DataFrame): DataFrame de indicadores ya renombrado con `renombrar_indicadores`.
+    tamano_bloque (int, opcional): Número de filas por bloque (por defecto 100.000).
+    **kwargs: Argumentos adicionales para `pd.read_csv` (por ejemplo, `dtype`).
+
+    Retorno:
+    generator: Bloques transformados (pd.DataFrame).
+    """
+
+    for bloque in pd.read_csv(ruta_csv, chunksize=tamano_bloque, **kwargs):
+        yield transformar_bloque(bloque, df_ind)
+
+
+def procesar_por_bloques(ruta_csv, df_ind, ruta_salida=None, tamano_bloque=100_000, detector=None,
+                         eliminar_duplicados=False, **kwargs):
+    """
+    Ejecuta la limpieza de Superstore en modo streaming, con memoria acotada por el tamaño de bloque.
+
+    - Lee y transforma el CSV bloque a bloque (`leer_por_bloques`).
+    - Acumula nulos, recuentos de valores y resúmenes numéricos en un `AcumuladorPerfil`.
+    - Opcionalmente, detecta las filas duplicadas entre bloques por el hash de su clave
+      (`DetectorDuplicados`) y las elimina antes de escribirlas.
+    - Opcionalmente, escribe cada bloque transformado en un CSV de salida.
+
+    Parámetros:
+    ruta_csv (str): Ruta del fichero superstore.csv.
+    df_ind (pd.DataFrame): DataFrame de indicadores ya renombrado con `renombrar_indicadores`.
+    ruta_salida (str, opcional): Ruta del CSV donde guardar el resultado (por defecto no se guarda).
+    tamano_bloque (int, opcional): Número de filas por bloque (por defecto 100.000).
+    detector (DetectorDuplicados, opcional): Detector de duplicados; puede venir de una carga anterior
+                                             (`DetectorDuplicados.cargar`) para deduplicar cargas incrementales.
+    eliminar_duplicados (bool, opcional): Si es True, no acumula ni escribe las filas duplicadas (por defecto False).
+    **kwargs: Argumentos adicionales para `pd.read_csv`.
+
+    Retorno:
+    AcumuladorPerfil: Acumulador con los estadísticos del dataset completo.
+    """
+
+    if eliminar_duplicados and detector is None:
+        detector = DetectorDuplicados()
+    acumulador = AcumuladorPerfil()
+
+    if ruta_salida is not None and os.path.exists(ruta_salida):
+        os.remove(ruta_salida)
+
+    for i, bloque in enumerate(leer_por_bloques(ruta_csv, df_ind, tamano_bloque, **kwargs)):
+        if eliminar_duplicados:
+            bloque = detector.deduplicar(bloque)
+        elif detector is not None:
+            detector.actualizar(bloque)
+        acumulador.actualizar(bloque)
+        if ruta_salida is not None:
+            bloque.to_csv(ruta_salida, mode='a', header=(i == 0), index=False)
+
+    acumulador.detector = detector
+    return acumulador
@@ -0,0 +1,98 @@
+import pandas as pd
+import numpy as np
+
+
+# Modo Arrow: el texto y los numéricos (con nulos) se guardan en memoria de Apache Arrow en lugar de
+# objetos de Python o arrays de NumPy. Las fechas se mantienen en datetime64 de NumPy, que ya ocupan
+# 8 bytes por fila y son las que admiten los periodos (`to_period`) y los desplazamientos de pandas
+
+
+def es_arrow(serie):
+    """
+    Indica si una columna está respaldada por Arrow (`pd.ArrowDtype`).
+
+    Parámetros:
+    serie (pd.Series): Columna a comprobar.
+
+    Retorno:
+    bool: True si la columna usa un tipo de Arrow.
+    """
+
+    return isinstance(serie.dtype, pd.ArrowDtype)
+
+
+def a_arrow(df, columnas=None):
+    """
+    Convierte las columnas de texto y numéricas de un DataFrame a tipos de Arrow.
+
+    - El texto (object o str) pasa a `string[pyarrow]`, con `value_counts`, `isin` y agrupaciones
+      vectorizadas en Arrow y sin un objeto de Python por valor.
+    - Los enteros, decimales y booleanos pasan a sus tipos de Arrow, que admiten nulos sin convertir
+      los enteros a float.
+    - Las categorías no se modifican y las fechas de Arrow (por ejemplo, las del lector de CSV de pyarrow)
+      pasan a datetime64[ns].
+
+    Parámetros:
+    df (pd.DataFrame): DataFrame a convertir.
+    columnas (list, opcional): Columnas a convertir (por defecto todas).
+
+    Retorno:
+    pd.DataFrame: Copia del DataFrame con las columnas convertidas.
+    """
+
+    columnas = df.columns if columnas is None else columnas
+    fechas = [col for col in columnas if pd.api.types.is_datetime64_any_dtype(df[col])]
+    convertibles = [col for col in columnas
+                    if col not in fechas and not es_arrow(df[col])
+                    and not isinstance(df[col].dtype, pd.CategoricalDtype)]
+
+    columnas_nuevas = {col: a_numpy(df[col]) for col in fechas if es_arrow(df[col])}
+    if convertibles:
+        columnas_nuevas.update(df[convertibles].convert_dtypes(dtype_backend='pyarrow'))
+    return df.assign(**columnas_nuevas)
+
+
+def a_numpy(datos, columnas=None):
+    """
+    Convierte las columnas de Arrow a tipos de NumPy, por ejemplo antes de pasarlas a seaborn.
+
+    - Los numéricos pasan a float64 (los nulos a NaN) o a int64/bool si no tienen nulos.
+    - Las fechas pasan a datetime64[ns] y el texto a object (los nulos a NaN).
+    - Las columnas que no son de Arrow se devuelven sin copiar.
+
+    Parámetros:
+    datos (pd.DataFrame o pd.Series): Datos a convertir.
+    columnas (list, opcional): Columnas del DataFrame a conservar (por defecto todas).
+
+    Retorno:
+    pd.DataFrame o pd.Series: Datos con tipos de NumPy.
+    """
+
+    if isinstance(datos, pd.Series):
+        return _serie_numpy(datos)
+
+    if columnas is not None:
+        datos = datos[list(columnas)]
+    arrow = [col for col in datos.columns if es_arrow(datos[col])]
+    if not arrow:
+        return datos
+    return datos.assign(**{col: _serie_numpy(datos[col]) for col in arrow})
+
+
+def _serie_numpy(serie):
+    """Convierte una columna de Arrow a su tipo equivalente de NumPy."""
+
+    if not es_arrow(serie):
+        return serie
+
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.astype('datetime64[ns]')
+
+    tipo = serie.dtype.numpy_dtype
+    if tipo.kind in 'iub' and not serie.hasnans:
+        return serie.astype(tipo)
+    if tipo.kind in 'iufb':
+        valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+    else:
+        valores = serie.to_numpy(dtype=object, na_value=np.nan)
+    return pd.Series(valores, index=serie.index, name=serie.name)
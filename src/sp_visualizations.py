@@ -2,12 +2,18 @@
 import pandas as pd
 import numpy as np
 
-import matplotlib.pyplot as plt
-import seaborn as sns
 import math
 
+from .sp_calculos import (ventas_por, rentabilidad_por_mercado, medias_con_error, tiempo_envio_mercado, tendencias,
+                          porcentaje_nulos, muestra_estratificada)
+from .sp_graficos import plt, sns, dibujar_densidad, dibujar_recta, finalizar
+from .sp_instrumentacion import instrumentar_si_activado
+from .sp_perfil import columnas_categoricas
+from .sp_tipos import a_numpy
+from .sp_sketch import bosquejar
 
-def subplot_col_cat(df, top_n=10):
+
+def subplot_col_cat(df, top_n=10, mostrar=True, aproximado=False):
     """
     Genera subgráficos para mostrar la distribución de las columnas categóricas de un DataFrame.
 
@@ -17,12 +23,16 @@ def subplot_col_cat(df, top_n=10):
     Parámetros:
     df (pd.DataFrame): DataFrame con las columnas categóricas.
     top_n (int, opcional): Número de categorías principales a mostrar en cada gráfico (por defecto 10).
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
+    aproximado (bool, opcional): Si es True, dibuja los recuentos de los bocetos de memoria acotada
+                                 (`sp_sketch.bosquejar`) sin filtrar el DataFrame (por defecto False).
 
     Retorno:
-    None (muestra los gráficos directamente).
+    None (muestra los gráficos directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
     # seleccionar columnas categóricas
-    categorical_cols = df.select_dtypes(include=['object']).columns
+    bocetos = bosquejar(df) if aproximado else None
+    categorical_cols = bocetos.columnas_categoricas if aproximado else columnas_categoricas(df)
 
     if len(categorical_cols) == 0:
         print('No hay columnas categóricas en el dataframe')
@@ -36,10 +46,21 @@ def subplot_col_cat(df, top_n=10):
 
     # generar gráficos para cada columna categórica 
     for i, col in enumerate(categorical_cols):
+        if aproximado:
+            recuentos = bocetos.top(col, top_n)
+            etiquetas = recuentos.index.astype(str)
+            sns.barplot(x=etiquetas, y=recuentos.to_numpy(), ax=axes[i], hue=etiquetas, palette='tab10', legend=False)
+            axes[i].set(xlabel=col, ylabel='count')
+            axes[i].set_title(f'Distribución de {col} (Top {top_n}, aproximada)')
+            axes[i].tick_params(axis='x', rotation=45)
+            continue
+
         top_categories = df[col].value_counts().nlargest(top_n).index
         filtered_df = df[df[col].isin(top_categories)]
+        if isinstance(filtered_df[col].dtype, pd.CategoricalDtype):
+            filtered_df = filtered_df.assign(**{col: filtered_df[col].cat.remove_unused_categories()})
 
-        sns.countplot(data=filtered_df, x=col, ax=axes[i], hue=col, palette='tab10', legend=False)
+        sns.countplot(data=a_numpy(filtered_df, [col]), x=col, ax=axes[i], hue=col, palette='tab10', legend=False)
         axes[i].set_title(f'Distribución de {col} (Top {top_n})')
         axes[i].tick_params(axis='x', rotation=45)
 
@@ -49,10 +70,10 @@ def subplot_col_cat(df, top_n=10):
 
     # ajustar diseño
     plt.tight_layout()
-    plt.show()
+    return finalizar(fig, mostrar)
 
 
-def subplot_col_num(df,col):
+def subplot_col_num(df,col, mostrar=True):
     """
     Genera un conjunto de gráficos (histograma y boxplot) para las columnas numéricas especificadas.
 
@@ -61,9 +82,10 @@ def subplot_col_num(df,col):
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas numéricas a analizar.
     col (list): Lista de nombres de columnas numéricas para las que se generarán los gráficos.
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra los gráficos directamente).
+    None (muestra los gráficos directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
 
 # Creo una sola paleta de gráficos de histogramas y boxplot 
@@ -72,20 +94,21 @@ def subplot_col_num(df,col):
     fig, axes= plt.subplots(num_graphs, 2, figsize=(15, rows * 5))     
 
     for i, col in enumerate(col):
-        sns.histplot(data=df, x=col, ax=axes[i,0], bins=200)
+        datos = a_numpy(df, [col])
+        sns.histplot(data=datos, x=col, ax=axes[i,0], bins=200)
         axes[i,0].set_title(f'Distribución de {col}')
 
-        sns.boxplot(data=df, x=col, ax=axes[i,1])
+        sns.boxplot(data=datos, x=col, ax=axes[i,1])
         axes[i,1].set_title(f'Boxplot de {col}')
 
     for j in range(i+1, len(axes)):
         fig.delaxes(axes[j])
 
     plt.tight_layout()
-    plt.show()
+    return finalizar(fig, mostrar)
 
 
-def boxplot_con_nulos(df):
+def boxplot_con_nulos(df, mostrar=True):
     """
     Crea un gráfico de boxplot para las columnas numéricas de un DataFrame e incluye el porcentaje de valores nulos.
 
@@ -93,9 +116,10 @@ def boxplot_con_nulos(df):
 
     Parámetros:
     df (pd.DataFrame): DataFrame con las columnas numéricas a analizar.
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra el gráfico directamente).
+    None (muestra el gráfico directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
    
     # Seleccionar solo columnas numéricas
@@ -106,11 +130,11 @@ def boxplot_con_nulos(df):
         return
 
     # Calcular porcentaje de valores nulos
-    null_percentage = df[numeric_cols].isnull().mean() * 100
+    null_percentage = porcentaje_nulos(df)
 
     # Crear el gráfico de boxplot
     fig, ax = plt.subplots(figsize=(12, 6))
-    sns.boxplot(data=df[numeric_cols], ax=ax)
+    sns.boxplot(data=a_numpy(df, numeric_cols), ax=ax)
 
     # Configurar los ticks de los ejes
     ax.set_xticks(range(len(numeric_cols)))
@@ -124,26 +148,28 @@ def boxplot_con_nulos(df):
                 ha='center', va='bottom', fontsize=10, color='red')
 
     plt.title("Boxplot con porcentaje de valores nulos")
-    plt.show()
+    return finalizar(fig, mostrar)
 
 
-def categorias_mas_vendidas(df):
+def categorias_mas_vendidas(df, mostrar=True):
     """
     Crea visualizaciones de las categorías y subcategorías más vendidas en función de las ventas.
 
+    - Toma las ventas por categoría y subcategoría del cubo de ventas (`obtener_cubo`).
     - Genera un gráfico de pastel para mostrar la distribución de ventas por categorías.
     - Genera un gráfico de barras horizontales para mostrar las subcategorías más vendidas.
 
     Parámetros:
     df (pd.DataFrame): DataFrame con las columnas "Category", "Sub_Category" y "Sales" para realizar el análisis.
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra los gráficos directamente).
+    None (muestra los gráficos directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
    
     # Agrupar datos por categorías y subcategorías
-    ventas_categoria = df.groupby("Category")["Sales"].sum().sort_values(ascending=False)
-    ventas_subcategoria = df.groupby("Sub_Category")["Sales"].sum().sort_values(ascending=False)
+    ventas_categoria = ventas_por(df, "Category")
+    ventas_subcategoria = ventas_por(df, "Sub_Category")
 
     # Crear la figura y los subgráficos en una fila
     fig, axes = plt.subplots(1, 2, figsize=(14, 6))
@@ -159,27 +185,28 @@ def categorias_mas_vendidas(df):
     axes[1].set_ylabel("Subcategoría", fontsize=12)
 
     plt.tight_layout()
-    plt.show()
+    return finalizar(fig, mostrar)
 
 
-def mercados_rentabilidad(df):
+def mercados_rentabilidad(df, mostrar=True):
     """
     Crea un gráfico de barras para mostrar la rentabilidad total por mercado.
 
-    - Agrupa los datos por "Market" y calcula la rentabilidad total (Profit) para cada uno.
+    - Toma la rentabilidad total (Profit) de cada "Market" del cubo de ventas (`obtener_cubo`).
     - Genera un gráfico de barras verticales para visualizar la rentabilidad de cada mercado.
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas "Market" y "Profit" para realizar el análisis.
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra el gráfico directamente).
+    None (muestra el gráfico directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
    
-    plt.figure(figsize=(8, 5))
+    fig = plt.figure(figsize=(8, 5))
 
-    # Agrupar por Market y sumar el Profit
-    market_profit = df.groupby("Market")["Profit"].sum()
+    # Rentabilidad total por Market
+    market_profit = rentabilidad_por_mercado(df)
 
     # Crear gráfico de barras verticales
     ax = sns.barplot(x=market_profit.index, y=market_profit.values, palette="plasma", hue=market_profit.index, legend=False)
@@ -189,48 +216,97 @@ def mercados_rentabilidad(df):
     plt.ylabel("Rentabilidad Total (Profit)", fontsize=12)
 
     plt.xticks(rotation=45, ha="right")  
-    plt.show()
+    return finalizar(fig, mostrar)
 
 
-def comparativa_mercado_segmento(df):
+def _barras_agrupadas(ax, datos, x, y, hue, error=None, palette=None):
+    """
+    Dibuja un gráfico de barras agrupadas a partir de datos ya agregados (una fila por x × hue).
+
+    Parámetros:
+    ax (matplotlib.axes.Axes): Eje donde dibujar.
+    datos (pd.DataFrame): Datos agregados con las columnas `x`, `hue`, `y` y, opcionalmente, `error`.
+    x (str): Columna del eje x.
+    y (str): Columna con la altura de las barras.
+    hue (str): Columna que define los grupos de barras.
+    error (str, opcional): Columna con la semiamplitud de las barras de error.
+    palette (str, opcional): Paleta de colores de seaborn.
+    """
+
+    medias = datos.pivot(index=x, columns=hue, values=y)
+    errores = datos.pivot(index=x, columns=hue, values=error) if error else None
+
+    n_grupos = medias.shape[1]
+    ancho = 0.8 / n_grupos
+    posiciones = np.arange(len(medias))
+    colores = sns.color_palette(palette, n_grupos)
+
+    for i, (nivel, color) in enumerate(zip(medias.columns, colores)):
+        ax.bar(posiciones - 0.4 + ancho * (i + 0.5), medias[nivel], width=ancho, color=color, label=nivel,
+               yerr=None if errores is None else errores[nivel], ecolor='0.26')
+
+    ax.set_xticks(posiciones)
+    ax.set_xticklabels(medias.index)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    ax.legend(title=hue)
+
+
+def comparativa_mercado_segmento(df, errorbar=('ci', 95), mostrar=True):
     """
     Crea una comparativa de ventas y beneficios por mercado y segmento.
 
+    - Toma las medias de ventas y beneficios por mercado y segmento del cubo de ventas (`obtener_cubo`).
+    - Calcula las barras de error de forma analítica (`semiamplitud_error`), sin bootstrap sobre las filas.
     - Genera dos gráficos de barras: uno para comparar las ventas y otro para comparar los beneficios en diferentes mercados y segmentos.
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas "Market", "Sales", "Profit" y "Segment" para realizar la comparación.
+    errorbar (str, tuple o None, opcional): Tipo de barra de error ('ci', 'se', 'sd', con nivel o múltiplo opcional,
+                                            o None para no dibujarlas). Por defecto el intervalo de confianza del 95%.
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra los gráficos directamente).
+    None (muestra los gráficos directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
 
+    # Medias y errores por mercado y segmento
+    medias = medias_con_error(df, ['Market', 'Segment'], ['Sales', 'Profit'], errorbar)
+    con_error = errorbar is not None
+
     # Crear subgráficos
     fig, axes = plt.subplots(nrows=2, ncols=1, figsize=(9, 9))
 
     # Comparar las ventas en diferentes mercados usando un gráfico de barras
-    sns.barplot(ax=axes[0], x='Market', y='Sales', data=df, hue='Segment', palette='pastel')
+    _barras_agrupadas(axes[0], medias, 'Market', 'Sales', 'Segment', 'Sales_error' if con_error else None, 'pastel')
     axes[0].set_title('Comparación de Ventas por Mercados y Segmentos')
 
     # Comparar los beneficios en diferentes mercados usando un gráfico de barras
-    sns.barplot(ax=axes[1], x='Market', y='Profit', data=df, hue='Segment', palette='dark')
+    _barras_agrupadas(axes[1], medias, 'Market', 'Profit', 'Segment', 'Profit_error' if con_error else None, 'dark')
     axes[1].set_title('Comparación de Beneficios por Mercados y Segmentos')
 
     plt.tight_layout()
-    plt.show()
+    return finalizar(fig, mostrar)
 
 
-def impacto_variables_beneficio(df):
+def impacto_variables_beneficio(df, modo='puntos', bins=80, muestra=0, mostrar=True):
     """
     Analiza el impacto de las variables "Shipping_Cost", "Discount" y "Sales" sobre el beneficio ("Profit").
 
-    - Genera tres gráficos de dispersión con una línea de regresión para mostrar la relación entre cada variable y el beneficio.
+    - Genera tres gráficos de dispersión (o de densidad) con una línea de regresión para mostrar la relación entre cada variable y el beneficio.
+    - Las tres regresiones se ajustan juntas en un único cálculo vectorizado (`obtener_regresiones`).
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas "Shipping_Cost", "Discount", "Sales" y "Profit" para realizar el análisis.
+    modo (str, opcional): 'puntos' dibuja cada fila; 'densidad' dibuja una rejilla 2-D de recuentos,
+                          cuyo coste no depende del número de filas (por defecto 'puntos').
+    bins (int, opcional): Número de intervalos por eje en modo 'densidad' (por defecto 80).
+    muestra (int, opcional): En modo 'densidad', número de filas de una muestra estratificada por mercado
+                             que se superpone como puntos (por defecto 0, sin muestra).
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra los gráficos directamente).
+    None (muestra los gráficos directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
     
     fig, axes = plt.subplots(1, 3, figsize=(15, 5))
@@ -238,80 +314,83 @@ def impacto_variables_beneficio(df):
     variables = ["Shipping_Cost", "Discount", "Sales"]
     titles = ["Profit vs Shipping Cost", "Profit vs Discount", "Profit vs Sales"]
 
+    if modo == 'densidad' and muestra:
+        puntos = muestra_estratificada(df, muestra, estratos='Market' if 'Market' in df.columns else None)
+    else:
+        puntos = None
+
+    ajustes = tendencias(df)
+
     for i, var in enumerate(variables):
-        sns.regplot(data=df, x=var, y="Profit", scatter_kws={"alpha": 0.5}, line_kws={"color": "red"}, ax=axes[i])
+        if modo == 'densidad':
+            dibujar_densidad(axes[i], df[var], df["Profit"], bins=bins, muestra=puntos, barra_color=(i == 2))
+        else:
+            axes[i].scatter(df[var], df["Profit"], alpha=0.5)
+            axes[i].set_xlabel(var)
+            axes[i].set_ylabel("Profit")
+        dibujar_recta(axes[i], ajustes.loc[var], color="red")
         axes[i].set_title(titles[i])
 
     plt.tight_layout()
-    plt.show()
+    return finalizar(fig, mostrar)
 
 
-def tiempo_envio(df):
+def tiempo_envio(df, mostrar=True):
     """
     Calcula el tiempo de envío promedio por mercado y lo visualiza en un gráfico de barras.
 
-    - Convierte las fechas de "Order_Date" y "Ship_Date" a formato datetime.
-    - Calcula el tiempo de envío en días restando las fechas de pedido y envío.
-    - Calcula el tiempo promedio de envío por mercado.
+    - Toma el tiempo promedio de envío en días por mercado del cubo de ventas (`obtener_cubo`).
     - Genera un gráfico de barras para mostrar el tiempo promedio de envío por mercado.
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas "Order_Date", "Ship_Date" y "Market" para realizar el cálculo.
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra el gráfico directamente).
+    None (muestra el gráfico directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
     
-    # Convertir fechas a formato datetime si no lo están
-    df['Order_Date'] = pd.to_datetime(df['Order_Date'])
-    df['Ship_Date'] = pd.to_datetime(df['Ship_Date'])
-    
-    # Calcular el tiempo de envío en días
-    df['Shipping_Time'] = (df['Ship_Date'] - df['Order_Date']).dt.days
-    
-    # Calcular el tiempo promedio de envío por mercado
-    shipping_avg = df.groupby('Market')['Shipping_Time'].mean().reset_index()
+    # Tiempo promedio de envío por mercado (el DataFrame original no se modifica)
+    shipping_avg = tiempo_envio_mercado(df)
     
     # Visualizar los resultados en un gráfico de barras
-    plt.figure(figsize=(8, 5))
+    fig = plt.figure(figsize=(8, 5))
     sns.barplot(x='Market', y='Shipping_Time', data=shipping_avg, hue='Market', palette='viridis', legend=False)
     plt.title("Tiempo Promedio de Envío por Mercado")
     plt.xlabel("Mercado")
     plt.ylabel("Días promedio de envío")
     plt.xticks(rotation=45)
-    plt.show()
+    return finalizar(fig, mostrar)
 
 
-def coste_envio_mercado(df):
+def coste_envio_mercado(df, errorbar=('ci', 95), mostrar=True):
     """
     Visualiza el coste de envío por mercado y categoría en un gráfico de barras.
 
+    - Toma el coste medio de envío por mercado y categoría del cubo de ventas (`obtener_cubo`).
+    - Calcula las barras de error de forma analítica (`semiamplitud_error`), sin bootstrap sobre las filas.
     - Utiliza un gráfico de barras para mostrar la relación entre el coste de envío, el mercado y la categoría.
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene las columnas "Market", "Shipping_Cost" y "Category" para realizar la visualización.
+    errorbar (str, tuple o None, opcional): Tipo de barra de error ('ci', 'se', 'sd', con nivel o múltiplo opcional,
+                                            o None para no dibujarlas). Por defecto el intervalo de confianza del 95%.
+    mostrar (bool, opcional): Si es True, muestra el gráfico; si es False, devuelve la figura sin mostrarla (por defecto True).
 
     Retorno:
-    None (muestra el gráfico directamente).
+    None (muestra el gráfico directamente) o la figura (matplotlib.figure.Figure) si mostrar=False.
     """
        
-    sns.catplot(x="Market", y="Shipping_Cost", data=df, hue="Category", kind="bar", height=5, aspect=1.5)
+    coste_medio = medias_con_error(df, ["Market", "Category"], ["Shipping_Cost"], errorbar)
+
+    fig, ax = plt.subplots(figsize=(7.5, 5))
+    _barras_agrupadas(ax, coste_medio, "Market", "Shipping_Cost", "Category", "Shipping_Cost_error" if errorbar is not None else None)
     
     plt.title("Coste de Envío por Mercado y Categoría", fontsize=14)
     plt.xlabel('Mercado', fontsize=12)
     plt.ylabel('Coste de Envío', fontsize=12)
-    plt.show()
-
-
-
-
-
-
-
-
-
-
-
-
+    return finalizar(fig, mostrar)
 
 
+# Instrumentación opcional (variable de entorno SP_INSTRUMENTACION)
+instrumentar_si_activado(__name__)